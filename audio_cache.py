@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pre-decoded audio cache for the training loaders.
+
+Every recording named by a JSONL file's "audio" field is decoded once,
+mixed down to mono, resampled to 16 kHz and stored as int16 (or float16)
+samples in a few large shard files. index.json maps each "audio" value to
+(shard, offset, length); readers memory-map the shards and get zero-copy
+array slices, so an epoch never decodes or resamples again and forked
+loader workers share the same page cache.
+
+    python audio_cache.py [--records data.jsonl] [--out-dir DIR]
+                          [--dtype int16|float16] [--workers N] [--force]
+
+Cache layout:
+    index.json          format, sample rate, dtype, shard lengths and, per
+                        audio value: shard, offset, length (in samples) and
+                        the source file's size and mtime
+    shard-NNNNN.pcm     raw little-endian samples, recordings back to back
+
+WAV files are decoded with numpy from their data chunk. MP3 and other
+formats need soundfile (libsndfile >= 1.1 for MP3), and sample rates
+other than 16 kHz need soxr; both are only imported when needed.
+"""
+
+import argparse
+import json
+import os
+import shutil
+from collections import deque
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from audio_probe import (
+    WAVE_FORMAT_IEEE_FLOAT,
+    WAVE_FORMAT_PCM,
+    read_wav_layout,
+)
+
+RECORDS_PATH = "data.jsonl"
+DEFAULT_CACHE_DIR = "archive/audio_cache"
+SAMPLE_RATE = 16000
+CACHE_FORMAT = 1
+DTYPES = ("int16", "float16")
+SHARD_BYTES = 1 << 30
+
+
+def resolve_audio_path(audio: str, root: str = ".") -> str:
+    """
+    Local path of a record's "audio" value. Records carry Colab paths
+    (/content/dataset/...) or Windows separators; fall back to the part
+    below /content/ under root when the path does not exist as given.
+    """
+    path = audio.replace("\\", "/")
+    if os.path.exists(path):
+        return path
+    if path.startswith("/content/"):
+        path = path[len("/content/"):]
+    return os.path.join(root, path)
+
+
+def _decode_wav(path: str) -> Tuple[np.ndarray, int]:
+    """(samples x channels array, sample rate); int16 PCM stays int16"""
+    layout = read_wav_layout(path)
+    width = layout.block_align // layout.channels
+    count = layout.data_size // layout.block_align * layout.channels
+    if layout.format_tag == WAVE_FORMAT_PCM and width in (1, 2, 4):
+        dtype = {1: np.uint8, 2: np.dtype("<i2"), 4: np.dtype("<i4")}[width]
+        samples = np.fromfile(path, dtype, count, offset=layout.data_offset)
+    elif layout.format_tag == WAVE_FORMAT_PCM and width == 3:
+        raw = np.fromfile(path, np.uint8, count * 3, offset=layout.data_offset)
+        # Place the three bytes in the top of an int32 to keep the sign
+        wide = np.zeros((count, 4), np.uint8)
+        wide[:, 1:] = raw.reshape(-1, 3)
+        samples = wide.view("<i4").ravel()
+    elif layout.format_tag == WAVE_FORMAT_IEEE_FLOAT and width in (4, 8):
+        samples = np.fromfile(path, "<f%d" % width, count, offset=layout.data_offset)
+    else:
+        raise ValueError(f"{path}: unsupported WAV format {layout.format_tag}/{width * 8} bit")
+    return samples.reshape(-1, layout.channels), layout.sample_rate
+
+
+def _to_float(samples: np.ndarray) -> np.ndarray:
+    if samples.dtype == np.uint8:
+        return (samples.astype(np.float32) - 128) / 128
+    if samples.dtype.kind == "i":
+        return samples.astype(np.float32) / -float(np.iinfo(samples.dtype).min)
+    return samples.astype(np.float32, copy=False)
+
+
+def decode_audio(path: str, sample_rate: int = SAMPLE_RATE, dtype: str = "int16") -> np.ndarray:
+    """One recording as mono samples at sample_rate, in dtype"""
+    with open(path, "rb") as f:
+        is_wav = f.read(4) == b"RIFF"
+    if is_wav:
+        samples, source_rate = _decode_wav(path)
+    else:
+        try:
+            import soundfile
+        except ImportError:
+            raise ImportError(f"decoding {path} needs the soundfile package") from None
+        samples, source_rate = soundfile.read(path, dtype="float32", always_2d=True)
+
+    # Already in the stored layout: no float round trip
+    if samples.dtype == np.dtype("<i2") and samples.shape[1] == 1 \
+            and source_rate == sample_rate and dtype == "int16":
+        return samples.ravel()
+
+    mono = _to_float(samples).mean(axis=1, dtype=np.float32)
+    if source_rate != sample_rate:
+        try:
+            import soxr
+        except ImportError:
+            raise ImportError(f"resampling {path} from {source_rate} Hz needs the soxr package") from None
+        mono = soxr.resample(mono, source_rate, sample_rate).astype(np.float32, copy=False)
+
+    if dtype == "int16":
+        return np.round(np.clip(mono, -1.0, 1.0) * 32767).astype("<i2")
+    return mono.astype("<f2")
+
+
+def read_audio_values(records_path: str = RECORDS_PATH) -> List[str]:
+    """Distinct "audio" values of a JSONL file, in file order"""
+    values = {}
+    with open(records_path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                values.setdefault(json.loads(line)["audio"], None)
+    return list(values)
+
+
+def _decode_ordered(paths: Iterable[str], dtype: str, workers: int) -> Iterator[np.ndarray]:
+    """decode_audio over paths on a thread pool, in order, with a bounded window"""
+    paths = iter(paths)
+    if workers == 1:
+        for path in paths:
+            yield decode_audio(path, SAMPLE_RATE, dtype)
+        return
+
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = deque(executor.submit(decode_audio, path, SAMPLE_RATE, dtype)
+                        for path in islice(paths, workers * 2))
+        while pending:
+            samples = pending.popleft().result()
+            for path in islice(paths, 1):
+                pending.append(executor.submit(decode_audio, path, SAMPLE_RATE, dtype))
+            yield samples
+
+
+def build_audio_cache(audio_values: List[str], out_dir: str = DEFAULT_CACHE_DIR,
+                      dtype: str = "int16", root: str = ".", workers: int = 4,
+                      shard_bytes: int = SHARD_BYTES) -> None:
+    """Decode every recording and write the shards and index to out_dir"""
+    if dtype not in DTYPES:
+        raise ValueError(f"dtype must be one of {DTYPES}, not {dtype!r}")
+    itemsize = np.dtype(dtype).itemsize
+    paths = [resolve_audio_path(audio, root) for audio in audio_values]
+
+    # Build beside the old cache and swap at the end; readers keep their maps
+    tmp_dir = out_dir.rstrip("/") + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    files: Dict[str, dict] = {}
+    shards: List[int] = []
+    shard = None
+    try:
+        for audio, path, samples in zip(audio_values, paths, _decode_ordered(paths, dtype, workers)):
+            if shard is None or (shards[-1] and (shards[-1] + len(samples)) * itemsize > shard_bytes):
+                if shard is not None:
+                    shard.close()
+                shard = open(os.path.join(tmp_dir, f"shard-{len(shards):05d}.pcm"), "wb")
+                shards.append(0)
+            samples.tofile(shard)
+            stat = os.stat(path)
+            files[audio] = {"shard": len(shards) - 1, "offset": shards[-1], "length": len(samples),
+                            "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+            shards[-1] += len(samples)
+    finally:
+        if shard is not None:
+            shard.close()
+
+    index = {"format": CACHE_FORMAT, "sample_rate": SAMPLE_RATE, "dtype": dtype,
+             "shards": shards, "files": files}
+    with open(os.path.join(tmp_dir, "index.json"), "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False)
+    shutil.rmtree(out_dir, ignore_errors=True)
+    os.replace(tmp_dir, out_dir)
+
+
+class AudioCache:
+    """Read-only view of a cache directory; arrays are slices of memory maps"""
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR):
+        self.cache_dir = cache_dir
+        with open(os.path.join(cache_dir, "index.json"), encoding="utf-8") as f:
+            index = json.load(f)
+        if index.get("format") != CACHE_FORMAT:
+            raise ValueError(f"{cache_dir} is not a version {CACHE_FORMAT} audio cache")
+        self.sample_rate = index["sample_rate"]
+        self.dtype = np.dtype(index["dtype"]).newbyteorder("<")
+        self.files: Dict[str, dict] = index["files"]
+        self.shard_lengths: List[int] = index["shards"]
+        self._shards: List[Optional[np.memmap]] = [None] * len(self.shard_lengths)
+
+    def __len__(self) -> int:
+        return len(self.files)
+
+    def __contains__(self, audio: str) -> bool:
+        return audio in self.files
+
+    def _shard(self, number: int) -> np.memmap:
+        # Mapped on first use, so a forked loader worker maps only what it reads
+        shard = self._shards[number]
+        if shard is None:
+            shard = self._shards[number] = np.memmap(
+                os.path.join(self.cache_dir, f"shard-{number:05d}.pcm"), self.dtype, "r",
+                shape=(self.shard_lengths[number],))
+        return shard
+
+    def __getitem__(self, audio: str) -> np.ndarray:
+        """Samples of one recording, without copying"""
+        entry = self.files[audio]
+        offset = entry["offset"]
+        return self._shard(entry["shard"])[offset:offset + entry["length"]]
+
+    def sample(self, audio: str, float32: bool = False) -> dict:
+        """
+        The recording in the shape datasets.Audio decodes to: path, array
+        and sampling_rate. float32=True converts (and copies) the samples.
+        """
+        array = self[audio]
+        if float32:
+            array = _to_float(array)
+        return {"path": audio, "array": array, "sampling_rate": self.sample_rate}
+
+    def is_current(self, audio_values: Iterable[str], dtype: str, root: str = ".") -> bool:
+        """True if the cache holds exactly these recordings, unchanged, in dtype"""
+        if self.dtype != np.dtype(dtype) or self.sample_rate != SAMPLE_RATE:
+            return False
+        audio_values = list(audio_values)
+        if set(audio_values) != set(self.files):
+            return False
+        for audio in audio_values:
+            entry = self.files[audio]
+            stat = os.stat(resolve_audio_path(audio, root))
+            if (stat.st_size, stat.st_mtime_ns) != (entry["size"], entry["mtime_ns"]):
+                return False
+        return True
+
+
+def load_audio_cache(records_path: str = RECORDS_PATH, cache_dir: str = DEFAULT_CACHE_DIR,
+                     dtype: str = "int16", root: str = ".", workers: int = 4) -> AudioCache:
+    """
+    Open the cache for the recordings of records_path, (re)building it
+    first if it is missing, was built for other recordings or another
+    dtype, or any source file has changed since
+    """
+    audio_values = read_audio_values(records_path)
+    try:
+        cache = AudioCache(cache_dir)
+    except (OSError, ValueError):
+        pass
+    else:
+        if cache.is_current(audio_values, dtype, root):
+            return cache
+
+    build_audio_cache(audio_values, cache_dir, dtype, root, workers)
+    return AudioCache(cache_dir)
+
+
+class CachedAudioDataset:
+    """
+    Map-style dataset over a JSONL file whose "audio" field is replaced by
+    AudioCache.sample(): usable directly as a torch Dataset (only __len__
+    and __getitem__ are needed).
+    """
+
+    def __init__(self, records_path: str = RECORDS_PATH, cache: Optional[AudioCache] = None,
+                 float32: bool = False):
+        with open(records_path, encoding="utf-8") as f:
+            self.records = [json.loads(line) for line in f if line.strip()]
+        self.cache = cache or load_audio_cache(records_path)
+        self.float32 = float32
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __getitem__(self, i: int) -> dict:
+        record = dict(self.records[i])
+        record["audio"] = self.cache.sample(record["audio"], self.float32)
+        return record
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Decode recordings once into a memory-mapped cache")
+    parser.add_argument("--records", default=RECORDS_PATH, help="JSONL file with an audio field")
+    parser.add_argument("--out-dir", default=DEFAULT_CACHE_DIR, help="cache directory")
+    parser.add_argument("--dtype", choices=DTYPES, default="int16", help="stored sample type")
+    parser.add_argument("--root", default=".", help="directory /content/ paths are relative to")
+    parser.add_argument("--workers", type=int, default=4, help="decoding threads")
+    parser.add_argument("--force", action="store_true", help="rebuild even if the cache is current")
+    args = parser.parse_args()
+
+    if args.force:
+        build_audio_cache(read_audio_values(args.records), args.out_dir, args.dtype,
+                          args.root, args.workers)
+        cache = AudioCache(args.out_dir)
+    else:
+        cache = load_audio_cache(args.records, args.out_dir, args.dtype, args.root, args.workers)
+    total = sum(entry["length"] for entry in cache.files.values())
+    print(f"{len(cache)} recordings, {total / cache.sample_rate / 3600:.2f} h of audio "
+          f"in {len(cache.shard_lengths)} shard(s) under {args.out_dir}")
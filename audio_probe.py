@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Header-only audio metadata: duration, sample rate, channel count and
+byte size, without decoding any samples.
+
+WAV files are read chunk by chunk up to the start of the data chunk. MP3
+files use the Xing/Info or VBRI frame count when the encoder wrote one
+and otherwise walk the frame headers. probe_many() runs probes on a
+thread pool; they are I/O bound and release the GIL while reading.
+
+    python audio_probe.py FILE...
+"""
+
+import argparse
+import mmap
+import os
+import struct
+from dataclasses import asdict, dataclass
+from typing import Iterable, List, Optional, Tuple, Union
+
+RIFF_HEADER = struct.Struct("<4sI4s")
+CHUNK_HEADER = struct.Struct("<4sI")
+# format tag, channels, sample rate, byte rate, block align, bits per sample
+WAV_FMT = struct.Struct("<HHIIHH")
+WAVE_FORMAT_PCM = 1
+WAVE_FORMAT_IEEE_FLOAT = 3
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+# kbps by [version is MPEG-1][layer], layer 1..3 at index 0..2
+MP3_BITRATES = {
+    True: (
+        (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+        (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+        (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    ),
+    False: (
+        (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+        (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+        (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    ),
+}
+# Hz by version bits (0: MPEG-2.5, 2: MPEG-2, 3: MPEG-1)
+MP3_SAMPLE_RATES = {0: (11025, 12000, 8000), 2: (22050, 24000, 16000), 3: (44100, 48000, 32000)}
+
+
+@dataclass
+class AudioInfo:
+    duration: float
+    sample_rate: int
+    channels: int
+    num_bytes: int
+    codec: str
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+@dataclass
+class Mp3Frame:
+    """Fields of one MPEG audio frame header"""
+    mpeg1: bool
+    layer: int
+    sample_rate: int
+    channels: int
+    length: int
+    samples: int
+    side_info: int
+
+
+def parse_mp3_frame(header: bytes) -> Optional[Mp3Frame]:
+    """Decode a 4-byte frame header; None if it is not a valid one"""
+    if len(header) < 4 or header[0] != 0xFF or header[1] & 0xE0 != 0xE0:
+        return None
+    version = header[1] >> 3 & 3
+    layer = 4 - (header[1] >> 1 & 3)
+    bitrate_index = header[2] >> 4
+    rate_index = header[2] >> 2 & 3
+    if version == 1 or layer == 4 or bitrate_index in (0, 15) or rate_index == 3:
+        return None  # reserved values, or free format which has no fixed frame length
+
+    mpeg1 = version == 3
+    bitrate = MP3_BITRATES[mpeg1][layer - 1][bitrate_index] * 1000
+    sample_rate = MP3_SAMPLE_RATES[version][rate_index]
+    padding = header[2] >> 1 & 1
+    channels = 1 if header[3] >> 6 == 3 else 2
+
+    if layer == 1:
+        samples = 384
+        length = (12 * bitrate // sample_rate + padding) * 4
+    elif layer == 2 or mpeg1:
+        samples = 1152
+        length = 144 * bitrate // sample_rate + padding
+    else:
+        samples = 576
+        length = 72 * bitrate // sample_rate + padding
+
+    if mpeg1:
+        side_info = 17 if channels == 1 else 32
+    else:
+        side_info = 9 if channels == 1 else 17
+    return Mp3Frame(mpeg1, layer, sample_rate, channels, length, samples, side_info)
+
+
+@dataclass
+class WavLayout:
+    """Sample format of a WAV file and where its data chunk lies"""
+    format_tag: int
+    channels: int
+    sample_rate: int
+    block_align: int
+    bits_per_sample: int
+    data_offset: int
+    data_size: int
+
+
+def read_wav_layout(path: str) -> WavLayout:
+    """Walk a WAV file's chunks up to the data chunk; no sample is read"""
+    num_bytes = os.path.getsize(path)
+    with open(path, "rb") as f:
+        riff, _, wave = RIFF_HEADER.unpack(f.read(RIFF_HEADER.size))
+        if riff != b"RIFF" or wave != b"WAVE":
+            raise ValueError(f"{path} is not a RIFF/WAVE file")
+
+        fmt = None
+        while True:
+            header = f.read(CHUNK_HEADER.size)
+            if len(header) < CHUNK_HEADER.size:
+                raise ValueError(f"{path} has no data chunk")
+            chunk_id, size = CHUNK_HEADER.unpack(header)
+            if chunk_id == b"fmt ":
+                body = f.read(size + (size & 1))
+                fmt = list(WAV_FMT.unpack_from(body))
+                if fmt[0] == WAVE_FORMAT_EXTENSIBLE and size >= 26:
+                    # The real format tag leads the sub-format GUID
+                    fmt[0] = struct.unpack_from("<H", body, 24)[0]
+            elif chunk_id == b"data":
+                if fmt is None:
+                    raise ValueError(f"{path} has no fmt chunk before its data")
+                # Streamed writers may leave the size unset; trust the file
+                data_offset = f.tell()
+                size = min(size, num_bytes - data_offset)
+                break
+            else:
+                f.seek(size + (size & 1), os.SEEK_CUR)
+
+    format_tag, channels, sample_rate, _, block_align, bits = fmt
+    if sample_rate == 0 or block_align == 0:
+        raise ValueError(f"{path} has an invalid fmt chunk")
+    return WavLayout(format_tag, channels, sample_rate, block_align, bits, data_offset, size)
+
+
+def probe_wav(path: str) -> AudioInfo:
+    layout = read_wav_layout(path)
+    frames = layout.data_size // layout.block_align
+    return AudioInfo(frames / layout.sample_rate, layout.sample_rate, layout.channels,
+                     os.path.getsize(path), "wav")
+
+
+def _id3v2_size(data) -> int:
+    if data[:3] != b"ID3" or len(data) < 10:
+        return 0
+    size = (data[6] & 0x7F) << 21 | (data[7] & 0x7F) << 14 | (data[8] & 0x7F) << 7 | data[9] & 0x7F
+    footer = 10 if data[5] & 0x10 else 0
+    return 10 + size + footer
+
+
+def _vbr_header(data, offset: int, frame: Mp3Frame) -> Tuple[bool, Optional[int]]:
+    """
+    Whether the first frame is a Xing/Info or VBRI tag frame rather than
+    audio, and the frame count it gives (None if it has none)
+    """
+    # The tag follows the side information; encoders disagree on its size
+    # for some channel modes, so every size is tried
+    for side_info in dict.fromkeys((frame.side_info, 9, 17, 32)):
+        xing = offset + 4 + side_info
+        if data[xing:xing + 4] in (b"Xing", b"Info"):
+            flags = struct.unpack_from(">I", data, xing + 4)[0]
+            if flags & 1:
+                return True, struct.unpack_from(">I", data, xing + 8)[0]
+            return True, None
+    vbri = offset + 36
+    if data[vbri:vbri + 4] == b"VBRI":
+        return True, struct.unpack_from(">I", data, vbri + 14)[0]
+    return False, None
+
+
+def probe_mp3(path: str) -> AudioInfo:
+    num_bytes = os.path.getsize(path)
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        # First frame: after any ID3v2 tag, at a sync whose successor also parses
+        offset = _id3v2_size(data)
+        while True:
+            offset = data.find(b"\xff", offset)
+            if offset < 0:
+                raise ValueError(f"{path} has no MPEG audio frames")
+            frame = parse_mp3_frame(data[offset:offset + 4])
+            if frame is not None:
+                following = offset + frame.length
+                if following + 4 > num_bytes or parse_mp3_frame(data[following:following + 4]):
+                    break
+            offset += 1
+
+        first = frame
+        tagged, frames = _vbr_header(data, offset, frame)
+        if frames is None:
+            # CBR or untagged VBR: walk the headers until sync is lost (e.g. an ID3v1 tag)
+            frames = 0
+            if tagged:
+                # A tag without a count is not audio; the walk starts after it
+                offset += frame.length
+                frame = parse_mp3_frame(data[offset:offset + 4])
+            while frame is not None:
+                frames += 1
+                offset += frame.length
+                frame = parse_mp3_frame(data[offset:offset + 4])
+
+    duration = frames * first.samples / first.sample_rate
+    return AudioInfo(duration, first.sample_rate, first.channels, num_bytes, "mp3")
+
+
+def probe(path: str) -> AudioInfo:
+    """
+    Metadata of a WAV or MP3 file, chosen by its first bytes. Raises
+    ValueError for other or malformed files and OSError if unreadable.
+    """
+    with open(path, "rb") as f:
+        magic = f.read(4)
+    try:
+        if magic == b"RIFF":
+            return probe_wav(path)
+        if magic[:3] == b"ID3" or magic[:1] == b"\xff":
+            return probe_mp3(path)
+    except struct.error as e:
+        raise ValueError(f"{path} is truncated: {e}") from None
+    raise ValueError(f"{path} is neither WAV nor MP3")
+
+
+def _probe_or_error(path: str) -> Union[AudioInfo, Exception]:
+    try:
+        return probe(path)
+    except (OSError, ValueError) as e:
+        return e
+
+
+def probe_many(paths: Iterable[str], workers: int = 8,
+               strict: bool = True) -> List[Union[AudioInfo, Exception]]:
+    """
+    probe() every path on a thread pool, in input order. With strict=False
+    a file that cannot be probed gives its exception instead of raising.
+    """
+    func = probe if strict else _probe_or_error
+    paths = list(paths)
+    if workers == 1 or len(paths) <= 1:
+        return [func(path) for path in paths]
+
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(func, paths))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Print header-only audio metadata")
+    parser.add_argument("paths", nargs="+", help="WAV or MP3 files")
+    args = parser.parse_args()
+
+    for path, info in zip(args.paths, probe_many(args.paths)):
+        print(f"{path}: {info.codec} {info.duration:.3f}s {info.sample_rate} Hz "
+              f"{info.channels} ch {info.num_bytes} bytes")
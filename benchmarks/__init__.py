@@ -0,0 +1,4 @@
+"""
+Benchmarks for the tajweed rule engine.
+Run from the repository root, e.g. `python -m benchmarks.bench_dispatch`
+"""
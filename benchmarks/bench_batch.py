@@ -0,0 +1,46 @@
+"""
+Vectorised batch engine vs. the scalar per-character engine. Checks that
+both produce the same RuleApplication lists and word maps for every ayah.
+
+    python -m benchmarks.bench_batch [--limit N]
+"""
+
+import argparse
+
+from tajweed_rule import get_processor
+from tajweed_batch import BatchRuleEngine
+from benchmarks.corpus import load_texts, timed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--limit", type=int, default=None, help="only use the first N ayat")
+    args = parser.parse_args()
+
+    texts = load_texts(limit=args.limit)
+    processor = get_processor()
+    engine = BatchRuleEngine(processor)
+
+    scalar_time, scalar_apps = timed(
+        lambda: [processor.process_text(t).rule_applications for t in texts])
+    batch_time, batch_apps = timed(engine.rule_applications, texts)
+    scalar_words_time, scalar_words = timed(
+        lambda: [processor.extract_tajweed_rules_for_words(t) for t in texts])
+    batch_words_time, batch_words = timed(engine.word_rules, texts)
+
+    app_mismatches = [i for i, (a, b) in enumerate(zip(scalar_apps, batch_apps)) if a != b]
+    word_mismatches = [i for i, (a, b) in enumerate(zip(scalar_words, batch_words))
+                       if a != b or list(a) != list(b)]
+
+    print(f"Ayat: {len(texts)}")
+    print(f"process_text:     scalar {scalar_time:.2f}s, batch {batch_time:.2f}s "
+          f"({scalar_time / batch_time:.1f}x)")
+    print(f"words:            scalar {scalar_words_time:.2f}s, batch {batch_words_time:.2f}s "
+          f"({scalar_words_time / batch_words_time:.1f}x)")
+    print(f"Mismatches:       {len(app_mismatches)} applications, {len(word_mismatches)} word maps")
+    if app_mismatches or word_mismatches:
+        raise SystemExit(f"Output differs for ayat {(app_mismatches + word_mismatches)[:10]}")
+
+
+if __name__ == "__main__":
+    main()
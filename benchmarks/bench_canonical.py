@@ -0,0 +1,91 @@
+"""
+Per-character throughput of the table-driven canonicaliser against the
+regex chains it replaces (normalize_arabic's three re.sub passes and the
+tashkeel regex), on the whole corpus. Outputs are checked to be equal, and
+the run fails if the canonicaliser is slower than a regex chain.
+
+    python -m benchmarks.bench_canonical [--limit N] [--repeat N]
+"""
+
+import argparse
+import re
+import timeit
+
+from tajweed_rule import ENGINE_MARKS, TASHKEEL_PATTERN, get_canonicalizer
+from benchmarks.corpus import load_texts
+
+
+def regex_normalize(text):
+    """normalize_arabic before the canonicaliser"""
+    text = re.sub(r'[ـ]', '', text)
+    text = re.sub(r'[إأٱآ]', 'ا', text)
+    text = re.sub(r'ة', 'ه', text)
+    return text
+
+
+def regex_remove_tashkeel(text):
+    return TASHKEEL_PATTERN.sub('', text)
+
+
+def regex_normalize_and_strip(text):
+    return regex_remove_tashkeel(regex_normalize(text))
+
+
+def regex_normalize_without_marks(text):
+    """normalize_arabic's default, Uthmani marks dropped, as a regex chain"""
+    return re.sub(r'[\u06D6-\u06ED]', '', regex_normalize(text))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--limit", type=int, default=None, help="only use the first N ayat")
+    parser.add_argument("--repeat", type=int, default=5, help="best of N runs")
+    args = parser.parse_args()
+
+    texts = load_texts(limit=args.limit)
+    n_chars = sum(map(len, texts))
+
+    normalize = get_canonicalizer()
+    strip = get_canonicalizer(normalize=False, strip_tashkeel=True)
+    both = get_canonicalizer(strip_tashkeel=True)
+    engine = get_canonicalizer(marks=ENGINE_MARKS)
+    cases = [
+        ("normalize", regex_normalize, normalize),
+        ("normalize - marks", regex_normalize_without_marks, engine),
+        ("remove tashkeel", regex_remove_tashkeel, strip),
+        ("normalize + tashkeel", regex_normalize_and_strip, both),
+    ]
+
+    def ns_per_char(func):
+        seconds = min(timeit.repeat(lambda: [func(t) for t in texts],
+                                    number=1, repeat=args.repeat))
+        return seconds / n_chars * 1e9
+
+    print(f"Ayat: {len(texts)}, characters: {n_chars}")
+    print(f"{'':<22} {'regex ns/char':>14} {'table ns/char':>14} {'speedup':>8}")
+    slower = []
+    for name, regex_func, canonicalizer in cases:
+        assert [regex_func(t) for t in texts] == [canonicalizer(t) for t in texts]
+        regex_ns = ns_per_char(regex_func)
+        table_ns = ns_per_char(canonicalizer)
+        print(f"{name:<22} {regex_ns:>14.1f} {table_ns:>14.1f} {regex_ns / table_ns:>7.2f}x")
+        if table_ns > regex_ns:
+            slower.append(name)
+
+    # Word-at-a-time callers (preload_word_cache, streaming) pay per-call overhead
+    words = [word for text in texts for word in text.split()]
+    regex_ns = min(timeit.repeat(lambda: [regex_normalize(w) for w in words],
+                                 number=1, repeat=args.repeat)) / n_chars * 1e9
+    table_ns = min(timeit.repeat(lambda: [normalize(w) for w in words],
+                                 number=1, repeat=args.repeat)) / n_chars * 1e9
+    print(f"{'normalize per word':<22} {regex_ns:>14.1f} {table_ns:>14.1f} {regex_ns / table_ns:>7.2f}x")
+
+    offsets_ns = ns_per_char(both.canonicalize)
+    print(f"{'+ offset map':<22} {'':>14} {offsets_ns:>14.1f}")
+
+    if slower:
+        raise SystemExit(f"Canonicaliser slower than the regex chain for: {', '.join(slower)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Per-character rule dispatch vs. evaluating every rule at every position.
+Checks that both engines agree on the whole corpus and reports the speedup.
+
+    python -m benchmarks.bench_dispatch [--limit N]
+"""
+
+import argparse
+
+from tajweed_rule import GenericQuranPhoneticScript
+from benchmarks.corpus import load_texts, timed
+
+
+class ExhaustiveQuranPhoneticScript(GenericQuranPhoneticScript):
+    """Reference engine: every rule is a candidate at every position"""
+
+    def candidate_rules(self, char):
+        return self.tajweed_rules
+
+
+def run_engine(processor, texts):
+    words = [processor.extract_tajweed_rules_for_words(t) for t in texts]
+    apps = [
+        [(a.rule_name, a.position, a.phoneme_after, a.duration)
+         for a in processor.process_text(t).rule_applications]
+        for t in texts
+    ]
+    return words, apps
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--limit", type=int, default=None, help="only use the first N ayat")
+    args = parser.parse_args()
+
+    texts = load_texts(limit=args.limit)
+    print(f"Ayat: {len(texts)}")
+
+    base_time, base = timed(run_engine, ExhaustiveQuranPhoneticScript(word_cache_size=0), texts)
+    fast_time, fast = timed(run_engine, GenericQuranPhoneticScript(word_cache_size=0), texts)
+
+    mismatches = [i for i in range(len(texts))
+                  if base[0][i] != fast[0][i] or base[1][i] != fast[1][i]]
+
+    print(f"Exhaustive: {base_time:.2f}s")
+    print(f"Dispatch:   {fast_time:.2f}s")
+    print(f"Speedup:    {base_time / fast_time:.2f}x")
+    print(f"Mismatches: {len(mismatches)}")
+    if mismatches:
+        raise SystemExit(f"Output differs for ayat {mismatches[:10]}")
+
+
+if __name__ == "__main__":
+    main()
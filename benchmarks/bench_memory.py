@@ -0,0 +1,65 @@
+"""
+Memory and pickling cost of rule applications on the full corpus:
+lazy context (default), materialised context dicts (the old eager
+behaviour) and the CompactRuleApplications struct-of-arrays form.
+
+    python -m benchmarks.bench_memory [--limit N]
+"""
+
+import argparse
+import gc
+import pickle
+import tracemalloc
+
+from tajweed_rule import CompactRuleApplications, get_processor
+from benchmarks.corpus import load_texts
+
+
+def retained_mb(build):
+    """Memory held by build()'s result, in MB"""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--limit", type=int, default=None, help="only use the first N ayat")
+    args = parser.parse_args()
+
+    texts = load_texts(limit=args.limit)
+    processor = get_processor()
+
+    apps, lazy_mb = retained_mb(
+        lambda: [processor.process_text(t).rule_applications for t in texts])
+    lazy_pickle = len(pickle.dumps(apps)) / 1e6
+
+    def materialise():
+        for verse in apps:
+            for app in verse:
+                app.context
+        return None
+    gc.collect()
+    tracemalloc.start()
+    materialise()
+    context_mb = tracemalloc.get_traced_memory()[0] / 1e6
+    tracemalloc.stop()
+    eager_pickle = len(pickle.dumps(apps)) / 1e6
+
+    compact, compact_mb = retained_mb(
+        lambda: [CompactRuleApplications.for_processor(verse, processor) for verse in apps])
+    compact_pickle = len(pickle.dumps(compact)) / 1e6
+
+    print(f"Ayat: {len(texts)}, applications: {sum(len(v) for v in apps)}")
+    print(f"{'Form':<22} {'Memory MB':>10} {'Pickle MB':>10}")
+    print(f"{'lazy context':<22} {lazy_mb:>10.1f} {lazy_pickle:>10.1f}")
+    print(f"{'materialised context':<22} {lazy_mb + context_mb:>10.1f} {eager_pickle:>10.1f}")
+    print(f"{'struct-of-arrays':<22} {compact_mb:>10.1f} {compact_pickle:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+A regex-only rule pack (two rules per letter plus one with a
+backreference, 57 in all) run through the combined pattern scanner vs. the old per-position evaluation, which
+compiled the pattern and sliced the text at every position.
+
+    python -m benchmarks.bench_patterns [--limit N]
+"""
+
+import argparse
+import re
+
+from tajweed_rule import GenericQuranPhoneticScript, TajweedRule, TajweedRuleCategory
+from tajweed_batch import BatchRuleEngine
+from benchmarks.corpus import load_texts, timed
+
+LETTERS = 'ءبتثجحخدذرزسشصضطظعغفقكلمنهوي'
+
+
+def pattern_pack():
+    rules = []
+    for i, letter in enumerate(LETTERS):
+        rules.append(TajweedRule(
+            name=f"pack_{i}_sakin", category=TajweedRuleCategory.HAMS,
+            pattern=f"{letter}ْ", sifa_output="H", description="letter with sukun"))
+        rules.append(TajweedRule(
+            name=f"pack_{i}_mushaddad", category=TajweedRuleCategory.JAHR,
+            pattern=f"{letter}ّ[َُِ]?", sifa_output="J",
+            description="letter with shadda"))
+    # Has a capture group, so the scanner must keep it out of the combined regex
+    rules.append(TajweedRule(
+        name="pack_repeated_letter", category=TajweedRuleCategory.HAMS,
+        pattern=f"([{LETTERS}])[َُِ]?\\1", sifa_output="H",
+        description="letter repeated across a short vowel"))
+    return rules
+
+
+def legacy_condition(pattern):
+    def condition(text, pos, ctx):
+        return bool(re.compile(pattern).match(text[pos:]))
+    return condition
+
+
+def legacy_pack():
+    return [TajweedRule(name=r.name, category=r.category, pattern=r.pattern,
+                        sifa_output=r.sifa_output, description=r.description,
+                        condition_func=legacy_condition(r.pattern))
+            for r in pattern_pack()]
+
+
+def with_pack(rules):
+    processor = GenericQuranPhoneticScript(word_cache_size=0)
+    processor.tajweed_rules.extend(rules)
+    processor._init_rule_dispatch()
+    return processor
+
+
+def run(processor, texts):
+    return ([processor.process_text(t).rule_applications for t in texts],
+            [processor.extract_tajweed_rules_for_words(t) for t in texts])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--limit", type=int, default=1000, help="only use the first N ayat")
+    args = parser.parse_args()
+
+    texts = load_texts(limit=args.limit)
+    legacy_time, expected = timed(run, with_pack(legacy_pack()), texts)
+    scanner = with_pack(pattern_pack())
+    scanner_time, actual = timed(run, scanner, texts)
+    batch_time, batch_apps = timed(BatchRuleEngine(scanner).rule_applications, texts)
+
+    print(f"Ayat: {len(texts)}, pattern rules: {len(scanner.pattern_rules)}")
+    print(f"Per-position compile + slice: {legacy_time:.2f}s")
+    print(f"Combined scanner:             {scanner_time:.2f}s ({legacy_time / scanner_time:.1f}x)")
+    print(f"Batch engine with scanner:    {batch_time:.2f}s")
+    if actual != expected or batch_apps != expected[0]:
+        raise SystemExit("Scanner output differs from per-position evaluation")
+    print("Outputs match")
+
+
+if __name__ == "__main__":
+    main()
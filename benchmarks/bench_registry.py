@@ -0,0 +1,48 @@
+"""
+Cold start (new processor per call, the old behaviour) vs. warm calls
+through the shared processor registry.
+
+    python -m benchmarks.bench_registry [--limit N]
+"""
+
+import argparse
+
+from tajweed_rule import (
+    GenericQuranPhoneticScript,
+    extract_tajweed_rules,
+    reset_processors,
+)
+from benchmarks.corpus import load_texts, timed
+
+
+def cold(texts):
+    return [GenericQuranPhoneticScript().extract_tajweed_rules_for_words(t) for t in texts]
+
+
+def warm(texts):
+    return [extract_tajweed_rules(t) for t in texts]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--limit", type=int, default=500, help="only use the first N ayat")
+    args = parser.parse_args()
+
+    texts = load_texts(limit=args.limit)
+    n = len(texts)
+
+    construct_time, _ = timed(lambda: [GenericQuranPhoneticScript() for _ in range(n)])
+    cold_time, cold_out = timed(cold, texts)
+    reset_processors()
+    warm_time, warm_out = timed(warm, texts)
+    assert cold_out == warm_out
+
+    print(f"Ayat: {n}")
+    print(f"Construction:   {construct_time / n * 1e3:.3f} ms/verse")
+    print(f"Cold calls:     {cold_time / n * 1e3:.3f} ms/verse")
+    print(f"Registry calls: {warm_time / n * 1e3:.3f} ms/verse")
+    print(f"Speedup:        {cold_time / warm_time:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Priority/conflict resolution alone: the old sort-and-scan resolve_rules
+vs. the compiled bitmask resolve_mask(), on every position of the corpus
+where some rule matched. Matching is done once up front and not timed.
+
+    python -m benchmarks.bench_resolution [--limit N]
+"""
+
+import argparse
+
+from tajweed_rule import RuleApplication, TajweedRuleCategory, VerseView, get_processor
+from benchmarks.corpus import load_texts, timed
+
+
+def legacy_resolve(processor, text, pos, current_phoneme, context, matching_rules):
+    """resolve_rules() as it was before priorities and conflicts were compiled"""
+    applications = []
+    modified_phoneme = current_phoneme
+    matching_rules = list(matching_rules)
+    matching_rules.sort(key=lambda r: processor.rule_priority.get(r.category, 0), reverse=True)
+
+    applied_categories = set()
+    for rule in matching_rules:
+        if rule.name in processor.rule_conflicts:
+            conflict_rules = processor.rule_conflicts[rule.name]
+            if any(c in [r.name for r in applications] for c in conflict_rules):
+                continue
+        if rule.category not in applied_categories:
+            application = RuleApplication(
+                rule_name=rule.name, category=rule.category.value, position=pos,
+                arabic_char=text[pos], phoneme_before=modified_phoneme,
+                phoneme_after=modified_phoneme, sifa_applied=rule.sifa_output,
+                duration=rule.duration, text=text)
+            if rule.category == TajweedRuleCategory.IQLAB:
+                modified_phoneme = 'm'
+            elif rule.category == TajweedRuleCategory.IDGHAM:
+                if rule.name == 'idgham_bi_ghunnah':
+                    modified_phoneme = ''
+            application.phoneme_after = modified_phoneme
+            applications.append(application)
+            applied_categories.add(rule.category)
+    return modified_phoneme, applications
+
+
+def collect_matches(processor, texts):
+    """(text, pos, phoneme, matching rules) for every position with a match"""
+    cases = []
+    for text in texts:
+        view = VerseView(text)
+        for pos, char in enumerate(text):
+            if char.isspace():
+                continue
+            context = processor.get_letter_context(view, pos)
+            rules = [r for r in processor.candidate_rules(char) if r.matches(view, pos, context)]
+            if rules:
+                phoneme = processor.reverse_phoneme_map.get(char, {'phoneme': char})['phoneme']
+                cases.append((view, pos, phoneme, context, rules))
+    return cases
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--limit", type=int, default=None, help="only use the first N ayat")
+    args = parser.parse_args()
+
+    processor = get_processor()
+    cases = collect_matches(processor, load_texts(limit=args.limit))
+    masks = [processor.rule_mask(rules) for *_, rules in cases]
+
+    legacy_time, legacy = timed(lambda: [legacy_resolve(processor, *case) for case in cases])
+    rules_time, by_rules = timed(lambda: [processor.resolve_rules(*case) for case in cases])
+    mask_time, by_mask = timed(lambda: [processor.resolve_mask(*case[:4], mask)
+                                        for case, mask in zip(cases, masks)])
+    assert legacy == by_rules == by_mask
+
+    print(f"Positions with matches: {len(cases)}")
+    print(f"Sort and scan:          {legacy_time:.2f}s")
+    print(f"resolve_rules (mask):   {rules_time:.2f}s ({legacy_time / rules_time:.2f}x)")
+    print(f"resolve_mask:           {mask_time:.2f}s ({legacy_time / mask_time:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
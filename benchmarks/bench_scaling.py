@@ -0,0 +1,54 @@
+"""
+Checks that per-verse processing time grows linearly with input length.
+Inputs are built by joining consecutive ayat up to each target length;
+the time per character should stay roughly flat.
+
+    python -m benchmarks.bench_scaling [--max-ratio 2.0]
+"""
+
+import argparse
+
+from tajweed_rule import GenericQuranPhoneticScript
+from benchmarks.corpus import load_texts, timed
+
+LENGTHS = [500, 1000, 2000, 4000, 8000]
+
+
+def build_input(texts, length):
+    parts = []
+    total = 0
+    for text in texts:
+        if total >= length:
+            break
+        parts.append(text)
+        total += len(text) + 1
+    return ' '.join(parts)[:length]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--max-ratio", type=float, default=2.0,
+                        help="fail if us/char at the longest input exceeds the shortest by this factor")
+    args = parser.parse_args()
+
+    processor = GenericQuranPhoneticScript()
+    texts = load_texts()
+
+    print(f"{'Chars':>6} {'process_text us/char':>22} {'words us/char':>15}")
+    per_char = []
+    for length in LENGTHS:
+        text = build_input(texts, length)
+        process_time, _ = timed(processor.process_text, text)
+        words_time, _ = timed(processor.extract_tajweed_rules_for_words, text)
+        per_char.append(process_time / len(text))
+        print(f"{len(text):>6} {process_time / len(text) * 1e6:>22.2f} "
+              f"{words_time / len(text) * 1e6:>15.2f}")
+
+    ratio = per_char[-1] / per_char[0]
+    print(f"Growth ratio: {ratio:.2f}")
+    if ratio > args.max_ratio:
+        raise SystemExit(f"process_text is not linear: ratio {ratio:.2f} > {args.max_ratio}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Start-up cost of a short-lived process: a fresh interpreter that imports
+the engine, builds a processor and handles one ayah. Run with the compiled
+rule cache present and with it cleared before every start.
+
+    python -m benchmarks.bench_startup [--runs N]
+"""
+
+import argparse
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+
+from tajweed_rule import RULE_CACHE_DIR
+
+ONE_REQUEST = (
+    "from tajweed_rule import extract_tajweed_rules; "
+    "extract_tajweed_rules('بِسْمِ ٱللَّهِ ٱلرَّحْمَٰنِ ٱلرَّحِيمِ')"
+)
+
+
+def start_once(code: str, clear_cache: bool = False) -> float:
+    if clear_cache:
+        shutil.rmtree(RULE_CACHE_DIR, ignore_errors=True)
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", code], check=True)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=20, help="process starts per case")
+    args = parser.parse_args()
+
+    # Interleaved so that disk and page cache effects hit every case alike
+    bare, cold, warm = [], [], []
+    for _ in range(args.runs):
+        bare.append(start_once("pass"))
+        cold.append(start_once(ONE_REQUEST, clear_cache=True))
+        warm.append(start_once(ONE_REQUEST))
+    bare, cold, warm = (statistics.median(times) for times in (bare, cold, warm))
+
+    print(f"Bare interpreter:    {bare * 1e3:.1f} ms")
+    print(f"Cache cleared:       {cold * 1e3:.1f} ms")
+    print(f"Compiled rule cache: {warm * 1e3:.1f} ms")
+    print(f"Engine share:        {(warm - bare) * 1e3:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Streaming engine fed word by word vs. process_text on the whole ayah:
+checks the event sets match, then streams every ayah as one text and
+checks the buffer and the event lag (characters fed past an event's
+position when it comes out) stay within fixed bounds.
+
+    python -m benchmarks.bench_stream [--limit N] [--max-buffer C] [--max-lag C]
+"""
+
+import argparse
+import re
+
+from tajweed_rule import get_processor
+from tajweed_stream import RuleStream
+from benchmarks.corpus import load_texts, timed
+
+
+def app_key(app):
+    return (app.position, app.rule_name, app.phoneme_before, app.phoneme_after,
+            tuple(sorted(app.context.items())))
+
+
+def stream_text(text, processor):
+    """Events, largest buffer, largest lag and events held until close()"""
+    stream = RuleStream(processor)
+    events, peak, lag = [], 0, 0
+    for chunk in re.findall(r'\S+\s*|\s+', text):
+        fed = stream.feed(chunk)
+        events.extend(fed)
+        peak = max(peak, stream.buffered)
+        lag = max([lag] + [stream.length - event.position for event in fed])
+    held = stream.close()
+    events.extend(held)
+    return events, peak, lag, len(held)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--limit", type=int, default=None, help="only use the first N ayat")
+    parser.add_argument("--max-buffer", type=int, default=64,
+                        help="largest buffer allowed on the long stream, in chars")
+    parser.add_argument("--max-lag", type=int, default=64,
+                        help="largest event lag allowed on the long stream, in chars")
+    args = parser.parse_args()
+
+    texts = load_texts(limit=args.limit)
+    processor = get_processor()
+
+    mismatches, peak = [], 0
+    elapsed = 0.0
+    for i, text in enumerate(texts):
+        seconds, (events, text_peak, _, _) = timed(stream_text, text, processor)
+        elapsed += seconds
+        peak = max(peak, text_peak)
+        expected = processor.process_text(text).rule_applications
+        if sorted(map(app_key, events)) != sorted(map(app_key, expected)):
+            mismatches.append(i)
+
+    print(f"Ayat: {len(texts)}, streamed in {elapsed:.2f}s")
+    print(f"Largest buffer: {peak} chars (longest ayah {max(map(len, texts))} chars)")
+    print(f"Mismatches: {len(mismatches)}")
+
+    # All ayat as one stream: memory and latency must not grow with it
+    text = ' '.join(texts)
+    seconds, (events, text_peak, lag, held) = timed(stream_text, text, processor)
+    expected = processor.process_text(text).rule_applications
+    same = sorted(map(app_key, events)) == sorted(map(app_key, expected))
+    print(f"One stream of {len(text)} chars: {seconds:.2f}s, largest buffer {text_peak} chars, "
+          f"largest lag {lag} chars, {held} events at close, {'match' if same else 'MISMATCH'}")
+    if not same:
+        mismatches.append(-1)
+
+    if mismatches:
+        raise SystemExit(f"Events differ for ayat {mismatches[:10]}")
+    if text_peak > args.max_buffer:
+        raise SystemExit(f"Buffer grew to {text_peak} chars, over --max-buffer {args.max_buffer}")
+    if lag > args.max_lag:
+        raise SystemExit(f"Events lagged {lag} chars, over --max-lag {args.max_lag}")
+
+
+if __name__ == "__main__":
+    main()
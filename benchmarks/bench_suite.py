@@ -0,0 +1,170 @@
+"""
+Corpus benchmark suite for the engine's public entry points over fixed
+slices of the Quran CSV. Reports verses/sec, p50/p99 latency per verse and
+peak traced memory (results are kept, as a dataset build would), and can
+save the numbers as a JSON baseline or compare against one.
+
+    python -m benchmarks.bench_suite [--slices short,baqarah,full] [--methods ...]
+                                     [--repeat N] [--save PATH] [--compare PATH]
+                                     [--tolerance 0.1]
+
+With --compare the exit status is 1 when any (slice, method) throughput
+falls more than --tolerance below the baseline. Baselines are machine
+specific; compare only against one saved on the same host. The short
+slice runs in a fraction of a second per case, so on a busy machine give
+it more --repeat or a wider --tolerance.
+"""
+
+import argparse
+import gc
+import json
+import math
+import platform
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+from tajweed_rule import analyze_verse, get_processor
+from benchmarks.corpus import load_ayat
+
+# Slice name -> surah numbers
+SLICES = {
+    "short": range(78, 115),   # Juz 'Amma
+    "baqarah": range(2, 3),
+    "full": range(1, 115),
+}
+
+
+def entry_points(processor) -> Dict[str, Callable[[str], object]]:
+    return {
+        "process_text": processor.process_text,
+        "extract_rules_only": processor.extract_rules_only,
+        "extract_tajweed_rules_for_words": processor.extract_tajweed_rules_for_words,
+        "analyze_verse": analyze_verse,
+        "format_rule_extraction": processor.format_rule_extraction,
+    }
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an ascending list"""
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def run_case(processor, func: Callable, texts: List[str], repeat: int = 5) -> Dict[str, float]:
+    clock = time.perf_counter
+    func(texts[0])
+
+    # Throughput from the fastest repeat, latency percentiles over all of them
+    latencies = []
+    total = math.inf
+    for _ in range(repeat):
+        # Same starting state every time; the word cache warms up within a run
+        processor.word_cache.clear()
+        gc.collect()
+        start = clock()
+        for text in texts:
+            t0 = clock()
+            func(text)
+            latencies.append(clock() - t0)
+        total = min(total, clock() - start)
+
+    # Separate pass: tracemalloc slows allocation-heavy code down
+    processor.word_cache.clear()
+    gc.collect()
+    tracemalloc.start()
+    results = [func(text) for text in texts]
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del results
+
+    latencies.sort()
+    return {
+        "verses": len(texts),
+        "verses_per_sec": len(texts) / total,
+        "p50_ms": percentile(latencies, 0.50) * 1e3,
+        "p99_ms": percentile(latencies, 0.99) * 1e3,
+        "peak_mb": peak / 1e6,
+    }
+
+
+def compare(results: Dict, baseline: Dict, tolerance: float) -> bool:
+    """Print throughput against the baseline; False on any regression"""
+    ok = True
+    print(f"\n{'slice':<8} {'method':<32} {'baseline':>9} {'now':>9} {'change':>8}")
+    for slice_name, methods in results.items():
+        for method, now in methods.items():
+            before = baseline.get("results", {}).get(slice_name, {}).get(method)
+            if before is None:
+                print(f"{slice_name:<8} {method:<32} {'-':>9} {now['verses_per_sec']:>9.1f}")
+                continue
+            change = now["verses_per_sec"] / before["verses_per_sec"] - 1
+            regressed = change < -tolerance
+            ok = ok and not regressed
+            print(f"{slice_name:<8} {method:<32} {before['verses_per_sec']:>9.1f} "
+                  f"{now['verses_per_sec']:>9.1f} {change:>+8.1%}"
+                  f"{'  REGRESSION' if regressed else ''}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--slices", default=",".join(SLICES),
+                        help="comma-separated slices to run")
+    parser.add_argument("--methods", default=None,
+                        help="comma-separated entry points to run (default: all)")
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="timed runs per case; the fastest sets throughput")
+    parser.add_argument("--save", metavar="PATH", help="write the results as a JSON baseline")
+    parser.add_argument("--compare", metavar="PATH", help="compare against a saved baseline")
+    parser.add_argument("--tolerance", type=float, default=0.10,
+                        help="allowed throughput drop for --compare (fraction, default 0.10)")
+    args = parser.parse_args()
+
+    processor = get_processor()
+    funcs = entry_points(processor)
+    if args.methods:
+        funcs = {name: funcs[name] for name in args.methods.split(",")}
+
+    ayat = load_ayat()
+    results = {}
+    print(f"{'slice':<8} {'method':<32} {'verses':>6} {'verses/s':>9} "
+          f"{'p50 ms':>8} {'p99 ms':>8} {'peak MB':>8}")
+    for slice_name in args.slices.split(","):
+        surahs = set(SLICES[slice_name])
+        texts = [row["ayah_ar"] for row in ayat if int(row["surah_no"]) in surahs]
+        results[slice_name] = {}
+        for method, func in funcs.items():
+            stats = run_case(processor, func, texts, args.repeat)
+            results[slice_name][method] = stats
+            print(f"{slice_name:<8} {method:<32} {stats['verses']:>6} "
+                  f"{stats['verses_per_sec']:>9.1f} {stats['p50_ms']:>8.3f} "
+                  f"{stats['p99_ms']:>8.3f} {stats['peak_mb']:>8.1f}")
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "rule_fingerprint": processor.rule_fingerprint(),
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nBaseline written to {args.save}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if not compare(results, baseline, args.tolerance):
+            print(f"\nThroughput regressed by more than {args.tolerance:.0%}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
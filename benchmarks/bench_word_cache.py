@@ -0,0 +1,45 @@
+"""
+extract_tajweed_rules_for_words over the corpus without the word cache,
+with a cold cache, and with a cache preloaded from list_of_words.
+
+    python -m benchmarks.bench_word_cache [--limit N] [--size N]
+"""
+
+import argparse
+
+from tajweed_rule import GenericQuranPhoneticScript, quran_csv_words
+from benchmarks.corpus import load_texts, timed
+
+
+def run(processor, texts):
+    return [processor.extract_tajweed_rules_for_words(t) for t in texts]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--limit", type=int, default=None, help="only use the first N ayat")
+    parser.add_argument("--size", type=int, default=32768, help="word cache size")
+    args = parser.parse_args()
+
+    texts = load_texts(limit=args.limit)
+
+    uncached_time, expected = timed(run, GenericQuranPhoneticScript(word_cache_size=0), texts)
+
+    cold = GenericQuranPhoneticScript(word_cache_size=args.size)
+    cold_time, cold_out = timed(run, cold, texts)
+
+    warm = GenericQuranPhoneticScript(word_cache_size=args.size)
+    preload_time, added = timed(warm.preload_word_cache, quran_csv_words())
+    warm_time, warm_out = timed(run, warm, texts)
+
+    assert cold_out == expected and warm_out == expected
+
+    print(f"Ayat: {len(texts)}")
+    print(f"No cache:   {uncached_time:.2f}s")
+    print(f"Cold cache: {cold_time:.2f}s  {cold.word_cache.stats()}")
+    print(f"Preload:    {preload_time:.2f}s for {added} words")
+    print(f"Warm cache: {warm_time:.2f}s  {warm.word_cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+"""
+Corpus helpers shared by the benchmarks
+"""
+
+import csv
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+QURAN_CSV = "archive/The Quran Dataset.csv"
+
+
+def load_ayat(path: str = QURAN_CSV, limit: Optional[int] = None) -> List[Dict[str, str]]:
+    """Load ayah rows from the Quran CSV (stdlib only, no pandas)"""
+    with open(path, encoding="utf-8", newline="") as f:
+        rows = list(csv.DictReader(f))
+    return rows[:limit] if limit else rows
+
+
+def load_texts(path: str = QURAN_CSV, limit: Optional[int] = None) -> List[str]:
+    """Load only the ayah texts"""
+    return [row["ayah_ar"] for row in load_ayat(path, limit)]
+
+
+def timed(func: Callable, *args, **kwargs) -> Tuple[float, object]:
+    """Run func once and return (elapsed seconds, result)"""
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return time.perf_counter() - start, result
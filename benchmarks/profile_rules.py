@@ -0,0 +1,43 @@
+"""
+Per-rule profile of the engine over the corpus: evaluations, matches,
+condition time and conflict suppressions, plus the cost of profiling
+itself (same run with profiling off).
+
+    python -m benchmarks.profile_rules [--limit N] [--json]
+"""
+
+import argparse
+
+from tajweed_rule import GenericQuranPhoneticScript
+from benchmarks.corpus import load_texts, timed
+
+
+def run_engine(processor, texts):
+    return [processor.process_text(t).rule_applications for t in texts]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--limit", type=int, default=None, help="only use the first N ayat")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    texts = load_texts(limit=args.limit)
+    processor = GenericQuranPhoneticScript(word_cache_size=0)
+
+    plain_time, plain_out = timed(run_engine, processor, texts)
+    with processor.profiling() as profiler:
+        profiled_time, profiled_out = timed(run_engine, processor, texts)
+    assert plain_out == profiled_out
+    after_time, _ = timed(run_engine, processor, texts)
+
+    print(profiler.report("json" if args.json else "table"))
+    if not args.json:
+        print(f"\nAyat: {len(texts)}")
+        print(f"Profiling off:   {plain_time:.2f}s")
+        print(f"Profiling on:    {profiled_time:.2f}s ({profiled_time / plain_time:.2f}x)")
+        print(f"Off again:       {after_time:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,35 +1,330 @@
-import json
+"""
+Builds data.jsonl: one record per recording under dataset/<reciter>/,
+annotated with the ayah text, its tajweed rules and the recording's
+duration, sample rate, channel count and size (read from the file header
+by audio_probe on a thread pool in each worker).
+
+    python createjsonfile.py [--workers N] [--chunksize N] [--full] [--verbose]
+
+The build is a pipeline: the enumerator walks the reciter folders and
+looks up each file's ayah by key (audioN is ayah N of --surah) in the
+indexed Quran text store, a process pool turns jobs into JSON lines,
+and a single writer emits them in enumeration order, so the output is
+byte-identical whatever the worker count.
+
+Builds are incremental. <output>.manifest.json records each file's size,
+mtime, sha256 and ayah row along with the rule engine fingerprint; files
+whose entry still matches keep their line from the previous output and
+only new or changed recordings go through the workers. Every new line is
+also appended to <output>.journal as it is written, so an interrupted
+build resumes from there. The output is replaced atomically at the end,
+after which the journal is folded into the manifest and removed.
+"""
+
+import argparse
 import glob
+import hashlib
+import json
 import os
-import pandas as pd
 import re
-from  tajweed_rule import extract_tajweed_rules
-# function to remove tashkeel
-def remove_tashkeel(text):
-    tashkeel = re.compile(r'[\u0617-\u061A\u064B-\u0652]')
-    return re.sub(tashkeel, '', text)
-
-data_aya = pd.read_csv("archive/The Quran Dataset.csv")
-with open("data.jsonl", "w", encoding="utf-8") as json_file:
-    for i, folderpath in enumerate(sorted(glob.glob("dataset/*"))): 
-        print(f"Processing folder: {folderpath}")
-        for j, filepath in enumerate(sorted(glob.glob(folderpath+"/*"))):
-            print(f"Processing file: {filepath}")
-            aya_with_tashkeel = data_aya.iloc[j]["ayah_ar"]
-            aya_without_tashkeel = remove_tashkeel(aya_with_tashkeel)
-            path = "\\content\\" + filepath
-            path = path.replace("\\", "/")
-            data = {
-                "audio": path,
-                "aya_with_tashkeel": str(aya_with_tashkeel),
-                "aya_without_tashkeel": str(aya_without_tashkeel),
-                "surah_name": str(data_aya.iloc[j]["surah_name_roman"]),
-                "ayah": int(data_aya.iloc[j]["ayah_no_surah"]),  # convert to Python int
-                "reciter": folderpath.split(os.sep)[-1] , # extract reciter name from folder path
-                "tajweed_rules": extract_tajweed_rules(aya_with_tashkeel),  # extract tajweed rules
-                "error_exit": False,  # flag to indicate if there was an error during reading
-                "Feedback_message": "All tajweed rules extracted successfully"  # field to store error message if any
-
-            }
-
-            json_file.write(json.dumps(data, ensure_ascii=False) + "\n")
+import sys
+import time
+from collections import Counter, deque
+from itertools import islice
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+from audio_probe import AudioInfo, probe_many
+from quran_text import QURAN_CSV, QuranText, load_quran_text
+from tajweed_rule import extract_tajweed_rules, get_processor, remove_tashkeel
+
+DATASET_DIR = "dataset"
+OUTPUT_PATH = "data.jsonl"
+RECORDING_NUMBER = re.compile(r"(\d+)$")
+# Bump when the record layout changes so old manifests are discarded
+BUILD_FORMAT = 2
+# Threads per worker process probing audio headers
+PROBE_THREADS = 8
+
+
+class Job(NamedTuple):
+    filepath: str
+    reciter: str
+    aya_with_tashkeel: str
+    surah_name: str
+    ayah: int
+
+
+# Every reciter recites the same ayat: each worker annotates a distinct
+# ayah text once and reuses the rules for all of its recordings
+_rules_cache: Dict[str, list] = {}
+
+
+def recording_number(filepath: str) -> int:
+    """Ayah number of a recording, from the digits in its file name (audio7.wav -> 7)"""
+    match = RECORDING_NUMBER.search(os.path.splitext(os.path.basename(filepath))[0])
+    if match is None:
+        raise ValueError(f"no ayah number in file name {filepath!r}")
+    return int(match.group(1))
+
+
+def enumerate_jobs(quran: QuranText, dataset_dir: str = DATASET_DIR,
+                   surah_no: int = 1) -> Iterator[Job]:
+    """One job per audio file, in output order; audioN of a reciter is ayah N of surah_no"""
+    for folderpath in sorted(glob.glob(os.path.join(dataset_dir, "*"))):
+        reciter = folderpath.split(os.sep)[-1]  # extract reciter name from folder path
+        for filepath in sorted(glob.glob(folderpath + "/*")):
+            ayah = quran.ayah(surah_no, recording_number(filepath))
+            yield Job(filepath, reciter, ayah.text, ayah.surah_name, ayah.ayah_no_surah)
+
+
+def build_record(job: Job, audio: Union[AudioInfo, Exception]) -> str:
+    """The data.jsonl line for one job, given its probe result"""
+    rules = _rules_cache.get(job.aya_with_tashkeel)
+    if rules is None:
+        rules = _rules_cache[job.aya_with_tashkeel] = extract_tajweed_rules(job.aya_with_tashkeel)
+    path = ("\\content\\" + job.filepath).replace("\\", "/")
+    probed = isinstance(audio, AudioInfo)
+    data = {
+        "audio": path,
+        "duration": round(audio.duration, 3) if probed else None,
+        "sample_rate": audio.sample_rate if probed else None,
+        "channels": audio.channels if probed else None,
+        "num_bytes": audio.num_bytes if probed else None,
+        "aya_with_tashkeel": job.aya_with_tashkeel,
+        "aya_without_tashkeel": remove_tashkeel(job.aya_with_tashkeel),
+        "surah_name": job.surah_name,
+        "ayah": job.ayah,
+        "reciter": job.reciter,
+        "tajweed_rules": rules,
+        "error_exit": not probed,  # flag to indicate if there was an error during reading
+        # field to store error message if any
+        "Feedback_message": "All tajweed rules extracted successfully" if probed
+                            else f"Could not read audio: {audio}"
+    }
+    return json.dumps(data, ensure_ascii=False) + "\n"
+
+
+def file_entry(job: Job) -> dict:
+    """Manifest entry for a job's audio file, hashing its contents"""
+    stat = os.stat(job.filepath)
+    digest = hashlib.sha256()
+    with open(job.filepath, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return {
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha256": digest.hexdigest(),
+        "ayah": [job.aya_with_tashkeel, job.surah_name, job.ayah],
+    }
+
+
+def _build_chunk(jobs: List[Job]) -> Tuple[List[Tuple[str, dict]], int]:
+    """(line, manifest entry) per job, and how many ayat the engine annotated"""
+    audio = probe_many([job.filepath for job in jobs], PROBE_THREADS, strict=False)
+    cached = len(_rules_cache)
+    built = [(build_record(job, info), file_entry(job)) for job, info in zip(jobs, audio)]
+    return built, len(_rules_cache) - cached
+
+
+def build_records(jobs: Iterator[Job], workers: int = 1, chunksize: int = 16,
+                  counts: Optional[Counter] = None) -> Iterator[Tuple[str, dict]]:
+    """
+    (JSON line, manifest entry) for jobs, in input order. Only twice the
+    worker count of chunks is in flight, so the enumerator never runs far
+    ahead of the writer. counts, if given, gets "annotated" (engine calls;
+    each worker process has its own rule cache) added to it.
+    """
+    counts = Counter() if counts is None else counts
+    if workers == 1:
+        while True:
+            chunk = list(islice(jobs, chunksize))
+            if not chunk:
+                return
+            built, annotated = _build_chunk(chunk)
+            counts.update(annotated=annotated)
+            yield from built
+
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        while True:
+            while len(pending) < workers * 2:
+                chunk = list(islice(jobs, chunksize))
+                if not chunk:
+                    break
+                pending.append(executor.submit(_build_chunk, chunk))
+            if not pending:
+                break
+            built, annotated = pending.popleft().result()
+            counts.update(annotated=annotated)
+            yield from built
+
+
+class BuildManifest:
+    """
+    Per-file entries of the last build of one output file, plus the
+    journal of lines written since. Entries are only trusted when the
+    build format and rule engine fingerprint match.
+    """
+
+    def __init__(self, output_path: str, engine: str):
+        self.output_path = output_path
+        self.path = output_path + ".manifest.json"
+        self.journal_path = output_path + ".journal"
+        self.engine = engine
+        self.files: Dict[str, dict] = {}
+        self.records: Dict[str, str] = {}
+
+    def _current(self, header: dict) -> bool:
+        return header.get("format") == BUILD_FORMAT and header.get("engine") == self.engine
+
+    def load(self) -> None:
+        """Read the manifest, the previous output's lines and any journal"""
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    manifest = json.load(f)
+                if not isinstance(manifest, dict) or not isinstance(manifest.get("files"), dict):
+                    raise ValueError("not a manifest object")
+            except ValueError as e:
+                # Treated as missing: only the journal's entries are reused
+                print(f"Ignoring unreadable manifest {self.path}: {e}", file=sys.stderr)
+                manifest = {}
+            if self._current(manifest) and os.path.exists(self.output_path):
+                self.files = manifest["files"]
+                with open(self.output_path, encoding="utf-8") as f:
+                    lines = list(f)
+                # The manifest lists files in output order
+                if len(lines) == len(self.files):
+                    self.records = dict(zip(self.files, lines))
+                else:
+                    self.files = {}
+
+        if os.path.exists(self.journal_path):
+            complete = 0
+            with open(self.journal_path, "rb") as f:
+                for raw in f:
+                    try:
+                        if not raw.endswith(b"\n"):
+                            raise ValueError
+                        entry = json.loads(raw)
+                    except ValueError:
+                        break  # torn write at the interruption point
+                    complete += len(raw)
+                    if self._current(entry):
+                        self.files[entry["file"]] = entry["entry"]
+                        self.records[entry["file"]] = entry["record"]
+            # Drop the torn tail so this run's entries start on a line of their own
+            if complete < os.path.getsize(self.journal_path):
+                os.truncate(self.journal_path, complete)
+
+    def lookup(self, job: Job) -> Optional[Tuple[str, dict]]:
+        """(line, entry) from an earlier build if job's file and ayah are unchanged"""
+        entry = self.files.get(job.filepath)
+        record = self.records.get(job.filepath)
+        if entry is None or record is None:
+            return None
+        if entry["ayah"] != [job.aya_with_tashkeel, job.surah_name, job.ayah]:
+            return None
+        stat = os.stat(job.filepath)
+        if stat.st_size != entry["size"]:
+            return None
+        if stat.st_mtime_ns != entry["mtime_ns"]:
+            # Touched but maybe not modified: the content hash decides
+            fresh = file_entry(job)
+            if fresh["sha256"] != entry["sha256"]:
+                return None
+            entry = fresh
+        return record, entry
+
+    def save(self, files: Dict[str, dict]) -> None:
+        """Replace the manifest with files (in output order) and drop the journal"""
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"format": BUILD_FORMAT, "engine": self.engine, "files": files},
+                      f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+        if os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
+
+
+class BuildStats(NamedTuple):
+    written: int
+    reused: int
+    built: int
+    removed: int
+    annotated: int
+
+    @property
+    def cache_hits(self) -> int:
+        """Built files whose rules came from a worker's rule cache"""
+        return self.built - self.annotated
+
+
+def build_dataset(output_path: str = OUTPUT_PATH, workers: int = 1, chunksize: int = 16,
+                  full: bool = False, verbose: bool = False, surah_no: int = 1) -> BuildStats:
+    """Bring output_path up to date with dataset/ and return what was done"""
+    manifest = BuildManifest(output_path, get_processor().rule_fingerprint())
+    if not full:
+        manifest.load()
+    previous = set(manifest.files)
+
+    with load_quran_text(QURAN_CSV) as quran:
+        plan = [(job, manifest.lookup(job)) for job in enumerate_jobs(quran, surah_no=surah_no)]
+    todo = (job for job, cached in plan if cached is None)
+    if verbose:
+        todo = _announce(todo)
+    counts = Counter()
+    built = build_records(todo, workers, chunksize, counts)
+
+    files = {}
+    reused = 0
+    tmp_path = output_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as json_file, \
+            open(manifest.journal_path, "a", encoding="utf-8") as journal:
+        for job, cached in plan:
+            if cached is not None:
+                line, entry = cached
+                reused += 1
+            else:
+                line, entry = next(built)
+                journal.write(json.dumps({"format": BUILD_FORMAT, "engine": manifest.engine,
+                                          "file": job.filepath, "entry": entry,
+                                          "record": line}, ensure_ascii=False) + "\n")
+                journal.flush()
+            json_file.write(line)
+            files[job.filepath] = entry
+    os.replace(tmp_path, output_path)
+    manifest.save(files)
+
+    return BuildStats(written=len(files), reused=reused, built=len(files) - reused,
+                      removed=len(previous - set(files)), annotated=counts["annotated"])
+
+
+def _announce(jobs: Iterator[Job]) -> Iterator[Job]:
+    for job in jobs:
+        print(f"Processing file: {job.filepath}")
+        yield job
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build data.jsonl from dataset/")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="worker processes (1 builds in this process)")
+    parser.add_argument("--chunksize", type=int, default=16, help="files per worker task")
+    parser.add_argument("--output", default=OUTPUT_PATH, help="output JSONL path")
+    parser.add_argument("--surah", type=int, default=1, help="surah recited in dataset/")
+    parser.add_argument("--full", action="store_true", help="ignore the manifest and rebuild everything")
+    parser.add_argument("--verbose", action="store_true", help="print every file as it is queued")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    stats = build_dataset(args.output, args.workers, args.chunksize, args.full, args.verbose,
+                          args.surah)
+    elapsed = time.perf_counter() - start
+    print(f"Wrote {stats.written} records to {args.output} in {elapsed:.2f}s: "
+          f"{stats.built} built ({stats.built / elapsed:.1f} files/s, {args.workers} workers), "
+          f"{stats.reused} reused, {stats.removed} removed")
+    print(f"Audio files read: {stats.built}, ayat annotated: {stats.annotated}, "
+          f"rule cache hits: {stats.cache_hits} ({stats.cache_hits / max(stats.built, 1):.0%})")
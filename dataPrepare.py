@@ -4,10 +4,14 @@
 # dataset = load_dataset("ZeinabMoawad/quran-dataset")
 
 # print(dataset["train"][0])
-from datasets import load_dataset, Features, Value, Audio
+from datasets import Dataset, Features, Value, Audio
+
+from audio_cache import SAMPLE_RATE, CachedAudioDataset, load_audio_cache
+
+RECORDS_PATH = "train.jsonl"
 
 features = Features({
-    "audio": Audio(sampling_rate=16000),
+    "audio": Audio(sampling_rate=SAMPLE_RATE),
     "aya_with_tashkeel": Value("string"),
     "aya_without_tashkeel": Value("string"),
     "surah_name": Value("string"),
@@ -15,6 +19,15 @@ features = Features({
     "reciter": Value("string"),
 })
 
-dataset = load_dataset("json", data_files="train.jsonl", features=features)
-dataset.push_to_hub("ZeinabMoawad/quran-dataset")
+# Recordings come from the decoded 16 kHz cache (audio_cache.py) rather than
+# being decoded and resampled again by datasets.Audio
+records = CachedAudioDataset(RECORDS_PATH, load_audio_cache(RECORDS_PATH))
+
 
+def cached_records():
+    for i in range(len(records)):
+        yield records[i]
+
+
+dataset = Dataset.from_generator(cached_records, features=features)
+dataset.push_to_hub("ZeinabMoawad/quran-dataset")
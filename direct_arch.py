@@ -12,18 +12,26 @@
 """
 import torch
 import json
-from datasets import load_dataset, Audio
+from datasets import load_dataset
 from unsloth import FastLanguageModel
 from trl import SFTTrainer, SFTConfig
 
+from audio_cache import load_audio_cache
+from feature_store import load_feature_store
+
 print("GPU:", torch.cuda.get_device_name(0))
 print("VRAM:", torch.cuda.get_device_properties(0).total_memory / 1e9, "GB")
 DATA_PATH = "/mnt/data/data.jsonl"
+AUDIO_CACHE_DIR = "/mnt/data/audio_cache"
+FEATURE_STORE_DIR = "/mnt/data/feature_store"
 
 dataset = load_dataset("json", data_files=DATA_PATH)
 
-# Convert audio column to HF Audio format
-dataset = dataset.cast_column("audio", Audio(sampling_rate=16000))
+# Recordings are decoded and resampled to 16 kHz once, into memory-mapped
+# shards (audio_cache.py); the audio column stays a path until formatting
+audio_cache = load_audio_cache(DATA_PATH, AUDIO_CACHE_DIR)
+# Log-mel features of every recording, computed once (feature_store.py)
+feature_store = load_feature_store(audio_cache, store_dir=FEATURE_STORE_DIR)
 
 print(dataset)
 print("Sample keys:", dataset["train"][0].keys())
@@ -103,10 +111,28 @@ def formatting_func(example):
 ### Response:
 {example['output']}"""
 
-    return {
-        "text": prompt,
-        "audio": example["audio"]
-    }
+    return prompt
+
+def collate_fn(examples):
+
+    batch = tokenizer(
+        text=[formatting_func(example) for example in examples],
+        padding=True,
+        truncation=True,
+        max_length=2048,
+        return_tensors="pt"
+    )
+    labels = batch["input_ids"].clone()
+    labels[batch["attention_mask"] == 0] = -100
+    batch["labels"] = labels
+
+    # Encoder input read from the store, no STFT per step; padded to the
+    # longest recording of the batch, with the mask marking real frames
+    input_features, feature_attention_mask = feature_store.batch(
+        [example["audio"] for example in examples])
+    batch["input_features"] = torch.from_numpy(input_features)
+    batch["feature_attention_mask"] = torch.from_numpy(feature_attention_mask)
+    return batch
 
 training_args = SFTConfig(
     output_dir="./tajweed_error_model",
@@ -126,6 +152,9 @@ training_args = SFTConfig(
     gradient_checkpointing=True,
     optim="paged_adamw_8bit",
     report_to="none",
+    # collate_fn formats and tokenizes; keep the raw columns for it
+    remove_unused_columns=False,
+    dataset_kwargs={"skip_prepare_dataset": True},
 )
 
 trainer = SFTTrainer(
@@ -133,7 +162,7 @@ trainer = SFTTrainer(
     tokenizer=tokenizer,
     train_dataset=train_dataset,
     eval_dataset=eval_dataset,
-    formatting_func=formatting_func,
+    data_collator=collate_fn,
     args=training_args,
     max_seq_length=2048,
 )
@@ -148,19 +177,19 @@ model.eval()
 
 sample = eval_dataset[0]
 
-audio_input = sample["audio"]
 text_prompt = f"""
 Analyze the recited Quran audio and identify tajweed mistakes.
 
 Ayah:
 {sample['aya_with_tashkeel']}
 """
-inputs = tokenizer(
-    text=text_prompt,
-    audio=audio_input["array"],
-    sampling_rate=16000,
-    return_tensors="pt"
-).to("cuda")
+inputs = tokenizer(text=text_prompt, return_tensors="pt")
+# The stored features the model was trained on, as in collate_fn: the
+# recording is not decoded, converted to float32 or put through an STFT
+input_features, feature_attention_mask = feature_store.batch([sample["audio"]])
+inputs["input_features"] = torch.from_numpy(input_features)
+inputs["feature_attention_mask"] = torch.from_numpy(feature_attention_mask)
+inputs = inputs.to("cuda")
 outputs = model.generate(
     **inputs,
     max_new_tokens=256,
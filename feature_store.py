@@ -0,0 +1,412 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Precomputed log-mel features for the audio encoder.
+
+Waveforms come from the audio cache (audio_cache.py). Features are the
+Whisper-style log-mel spectrogram the Qwen2.5-Omni feature extractor
+computes (128 mel bins, 25 ms Hann window, 10 ms hop, log10 clamped to
+8 below the recording's peak, scaled by (x + 4) / 4), but without padding
+to 30 s. They are computed with NumPy in batches of recordings, one FFT
+and one mel matmul per batch, and stored frame-major in shard files keyed
+by the record's "audio" value, so training and evaluation never run an
+STFT. pad_features() pads a batch to its longest recording and builds
+the matching feature_attention_mask.
+
+    python feature_store.py [--records data.jsonl] [--audio-cache DIR]
+                            [--out-dir DIR] [--dtype float16|float32]
+                            [--n-mels N] [--batch-seconds S] [--force]
+
+Store layout:
+    index.json          format, feature parameters, shard lengths and, per
+                        audio value: shard, offset, frames and the audio
+                        cache entry it was computed from
+    shard-NNNNN.f16     (frames, n_mels) rows, recordings back to back
+                        (.f32 for float32 stores)
+
+The index records every parameter that shapes the features. Opening a
+store with different parameters drops all of its entries; entries whose
+audio changed are recomputed, and new recordings are appended as new
+shards. Shards left without live entries are deleted; other rows of
+replaced or dropped entries stay until they make up COMPACT_DEAD_FRACTION
+of the store, when the live entries are copied into fresh shards.
+"""
+
+import argparse
+import json
+import os
+import shutil
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from audio_cache import DEFAULT_CACHE_DIR, RECORDS_PATH, AudioCache, load_audio_cache
+
+DEFAULT_STORE_DIR = "archive/feature_store"
+STORE_FORMAT = 1
+DTYPES = ("float16", "float32")
+SHARD_BYTES = 1 << 30
+# Rewrite the store once this fraction of its stored rows is dead
+COMPACT_DEAD_FRACTION = 0.5
+
+
+@dataclass(frozen=True)
+class MelParams:
+    sample_rate: int = 16000
+    n_fft: int = 400
+    hop_length: int = 160
+    n_mels: int = 128
+    fmin: float = 0.0
+    fmax: float = 8000.0
+    dtype: str = "float16"
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+def _hz_to_mel(freqs: np.ndarray) -> np.ndarray:
+    """Slaney mel scale: linear below 1 kHz, logarithmic above"""
+    freqs = np.asarray(freqs, dtype=np.float64)
+    mels = freqs / (200.0 / 3)
+    log_region = freqs >= 1000.0
+    mels[log_region] = 15.0 + np.log(freqs[log_region] / 1000.0) / (np.log(6.4) / 27.0)
+    return mels
+
+
+def _mel_to_hz(mels: np.ndarray) -> np.ndarray:
+    mels = np.asarray(mels, dtype=np.float64)
+    freqs = mels * (200.0 / 3)
+    log_region = mels >= 15.0
+    freqs[log_region] = 1000.0 * np.exp(np.log(6.4) / 27.0 * (mels[log_region] - 15.0))
+    return freqs
+
+
+def mel_filters(params: MelParams) -> np.ndarray:
+    """(n_mels, n_fft // 2 + 1) Slaney-normalised triangular filter bank"""
+    fft_freqs = np.linspace(0, params.sample_rate / 2, params.n_fft // 2 + 1)
+    mel_points = np.linspace(_hz_to_mel(np.array([params.fmin]))[0],
+                             _hz_to_mel(np.array([params.fmax]))[0], params.n_mels + 2)
+    hz_points = _mel_to_hz(mel_points)
+
+    widths = np.diff(hz_points)
+    ramps = hz_points[:, None] - fft_freqs[None, :]
+    lower = -ramps[:-2] / widths[:-1, None]
+    upper = ramps[2:] / widths[1:, None]
+    weights = np.maximum(0, np.minimum(lower, upper))
+    weights *= (2.0 / (hz_points[2:] - hz_points[:-2]))[:, None]
+    return weights.astype(np.float32)
+
+
+class LogMelExtractor:
+    """Batched log-mel spectrograms for a fixed MelParams"""
+
+    def __init__(self, params: MelParams = MelParams()):
+        self.params = params
+        self.window = np.hanning(params.n_fft + 1)[:-1].astype(np.float32)
+        self.filters_t = np.ascontiguousarray(mel_filters(params).T)
+
+    def _frames(self, waveform: np.ndarray) -> np.ndarray:
+        """Centred analysis frames; the trailing frame is dropped as Whisper does"""
+        n_fft, hop = self.params.n_fft, self.params.hop_length
+        n_frames = len(waveform) // hop
+        if n_frames == 0:
+            return np.empty((0, n_fft), np.float32)
+        mode = "reflect" if len(waveform) > n_fft // 2 else "constant"
+        padded = np.pad(waveform.astype(np.float32, copy=False), n_fft // 2, mode=mode)
+        return np.lib.stride_tricks.sliding_window_view(padded, n_fft)[::hop][:n_frames]
+
+    def __call__(self, waveforms: List[np.ndarray]) -> List[np.ndarray]:
+        """(frames, n_mels) float32 log-mel of each float waveform"""
+        framed = [self._frames(waveform) for waveform in waveforms]
+        counts = [len(frames) for frames in framed]
+        if not sum(counts):
+            return [np.empty((0, self.params.n_mels), np.float32) for _ in waveforms]
+
+        # One FFT and one filter-bank product for the whole batch
+        spectrum = np.fft.rfft(np.concatenate(framed) * self.window, axis=1)
+        power = spectrum.real ** 2 + spectrum.imag ** 2
+        log_mel = np.log10(np.maximum(power @ self.filters_t, 1e-10))
+
+        # Dynamic range is clamped per recording, against its own peak
+        features = []
+        start = 0
+        for count in counts:
+            rows = log_mel[start:start + count]
+            if count:
+                rows = np.maximum(rows, rows.max() - 8.0)
+            features.append((rows + 4.0) / 4.0)
+            start += count
+        return features
+
+
+class FeatureStore:
+    """
+    Read-only view of a store directory; arrays are slices of memory maps.
+    Shards are mapped lazily, so reopen the store after it is rebuilt.
+    """
+
+    def __init__(self, store_dir: str = DEFAULT_STORE_DIR):
+        self.store_dir = store_dir
+        with open(os.path.join(store_dir, "index.json"), encoding="utf-8") as f:
+            index = json.load(f)
+        if index.get("format") != STORE_FORMAT:
+            raise ValueError(f"{store_dir} is not a version {STORE_FORMAT} feature store")
+        self.params = MelParams(**index["params"])
+        self.files: Dict[str, dict] = index["files"]
+        self.shard_lengths: List[int] = index["shards"]
+        self._shards: List[Optional[np.memmap]] = [None] * len(self.shard_lengths)
+
+    def __len__(self) -> int:
+        return len(self.files)
+
+    def __contains__(self, audio: str) -> bool:
+        return audio in self.files
+
+    def _shard(self, number: int) -> np.memmap:
+        shard = self._shards[number]
+        if shard is None:
+            shard = self._shards[number] = np.memmap(
+                _shard_path(self.store_dir, number, self.params), _disk_dtype(self.params), "r",
+                shape=(self.shard_lengths[number], self.params.n_mels))
+        return shard
+
+    def __getitem__(self, audio: str) -> np.ndarray:
+        """(frames, n_mels) features of one recording, without copying"""
+        entry = self.files[audio]
+        offset = entry["offset"]
+        return self._shard(entry["shard"])[offset:offset + entry["frames"]]
+
+    def input_features(self, audio: str, float32: bool = True) -> np.ndarray:
+        """(n_mels, frames) features, the layout feature extractors return"""
+        features = self[audio].T
+        return features.astype(np.float32) if float32 else features
+
+    def batch(self, audio_values: List[str],
+              pad_to: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """pad_features() over the stored features of audio_values"""
+        return pad_features([self[audio] for audio in audio_values], pad_to)
+
+
+def pad_features(features: List[np.ndarray],
+                 pad_to: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Stack (frames, n_mels) features into (input_features, feature_attention_mask):
+    float32 (batch, n_mels, length) and int32 (batch, length), length being
+    the longest recording or pad_to. Padding frames get the value Whisper
+    gives silence, 2 below the recording's peak, and mask 0.
+    """
+    length = max([len(rows) for rows in features] + [pad_to or 0])
+    n_mels = features[0].shape[1] if features else 0
+    input_features = np.empty((len(features), n_mels, length), np.float32)
+    mask = np.zeros((len(features), length), np.int32)
+    for i, rows in enumerate(features):
+        frames = len(rows)
+        input_features[i, :, :frames] = rows.T
+        input_features[i, :, frames:] = rows.max() - 2.0 if frames else 0.0
+        mask[i, :frames] = 1
+    return input_features, mask
+
+
+def _disk_dtype(params: MelParams) -> np.dtype:
+    return np.dtype(params.dtype).newbyteorder("<")
+
+
+def _shard_path(store_dir: str, number: int, params: MelParams) -> str:
+    extension = "f16" if params.dtype == "float16" else "f32"
+    return os.path.join(store_dir, f"shard-{number:05d}.{extension}")
+
+
+def _source(audio_cache: AudioCache, audio: str) -> list:
+    entry = audio_cache.files[audio]
+    return [entry["size"], entry["mtime_ns"], entry["length"]]
+
+
+class _ShardWriter:
+    """Appends recordings to shard files of at most shard_bytes each"""
+
+    def __init__(self, store_dir: str, params: MelParams, shards: List[int], shard_bytes: int):
+        self.store_dir = store_dir
+        self.params = params
+        self.shards = shards
+        self.shard_bytes = shard_bytes
+        self.row_bytes = params.n_mels * _disk_dtype(params).itemsize
+        self._file = None
+
+    def write(self, features: np.ndarray) -> dict:
+        """Store (frames, n_mels) features; return their shard, offset and frames"""
+        shards = self.shards
+        if self._file is None or (shards[-1] and
+                                  (shards[-1] + len(features)) * self.row_bytes > self.shard_bytes):
+            self.close()
+            self._file = open(_shard_path(self.store_dir, len(shards), self.params), "wb")
+            shards.append(0)
+        features.astype(_disk_dtype(self.params)).tofile(self._file)
+        entry = {"shard": len(shards) - 1, "offset": shards[-1], "frames": len(features)}
+        shards[-1] += len(features)
+        return entry
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def _write_index(store_dir: str, params: MelParams, shards: List[int],
+                 files: Dict[str, dict]) -> None:
+    index = {"format": STORE_FORMAT, "params": params.to_dict(), "shards": shards, "files": files}
+    tmp_path = os.path.join(store_dir, "index.json.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False)
+    os.replace(tmp_path, os.path.join(store_dir, "index.json"))
+
+
+def _compact(store: FeatureStore, files: Dict[str, dict],
+             shard_bytes: int) -> Tuple[List[int], Dict[str, dict]]:
+    """
+    Rewrite the live entries of store into fresh shards, in their stored
+    order, and swap the result in; return its shard lengths and entries
+    """
+    store_dir = store.store_dir
+    tmp_dir = store_dir.rstrip("/") + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    shards: List[int] = []
+    compacted: Dict[str, dict] = {}
+    writer = _ShardWriter(tmp_dir, store.params, shards, shard_bytes)
+    try:
+        for audio in sorted(files, key=lambda audio: (files[audio]["shard"], files[audio]["offset"])):
+            compacted[audio] = dict(writer.write(store[audio]), source=files[audio]["source"])
+    finally:
+        writer.close()
+    _write_index(tmp_dir, store.params, shards, compacted)
+
+    shutil.rmtree(store_dir, ignore_errors=True)
+    os.replace(tmp_dir, store_dir)
+    return shards, compacted
+
+
+def build_feature_store(audio_cache: AudioCache, audio_values: List[str],
+                        store_dir: str = DEFAULT_STORE_DIR, params: MelParams = MelParams(),
+                        batch_seconds: float = 60.0, full: bool = False,
+                        shard_bytes: int = SHARD_BYTES) -> int:
+    """
+    Bring store_dir up to date for audio_values and return how many
+    recordings were computed. Valid entries are kept; the rest go into
+    new shards. Once dead rows pass COMPACT_DEAD_FRACTION of the stored
+    ones, the live entries are first rewritten into fresh shards.
+    full=True, or different parameters, start from scratch.
+    """
+    if params.dtype not in DTYPES:
+        raise ValueError(f"dtype must be one of {DTYPES}, not {params.dtype!r}")
+    if audio_cache.sample_rate != params.sample_rate:
+        raise ValueError(f"audio cache is {audio_cache.sample_rate} Hz, features expect "
+                         f"{params.sample_rate} Hz")
+
+    wanted = set(audio_values)
+    store = None
+    files: Dict[str, dict] = {}
+    shards: List[int] = []
+    if not full:
+        try:
+            store = FeatureStore(store_dir)
+        except (OSError, ValueError):
+            pass
+        else:
+            if store.params == params:
+                shards = store.shard_lengths
+                files = {audio: entry for audio, entry in store.files.items()
+                         if audio in wanted and audio in audio_cache
+                         and entry["source"] == _source(audio_cache, audio)}
+
+    # Replaced and dropped entries leave dead rows behind in their shards;
+    # shards left with none live are deleted outright
+    referenced = {entry["shard"] for entry in files.values()}
+    unreferenced = [number for number, length in enumerate(shards)
+                    if length and number not in referenced]
+    for number in unreferenced:
+        shards[number] = 0
+    stored = sum(shards)
+    live = sum(entry["frames"] for entry in files.values())
+    if files and stored - live > COMPACT_DEAD_FRACTION * stored:
+        shards, files = _compact(store, files, shard_bytes)
+        unreferenced = []
+    elif not files:
+        shards, unreferenced = [], []
+        shutil.rmtree(store_dir, ignore_errors=True)
+    store = None
+    os.makedirs(store_dir, exist_ok=True)
+
+    todo = [audio for audio in dict.fromkeys(audio_values) if audio not in files]
+
+    extractor = LogMelExtractor(params)
+    batch_samples = int(batch_seconds * params.sample_rate)
+    writer = _ShardWriter(store_dir, params, shards, shard_bytes)
+    try:
+        start = 0
+        while start < len(todo):
+            # Batch by audio length so FFT memory stays bounded
+            end, total = start, 0
+            while end < len(todo) and (end == start or total < batch_samples):
+                total += audio_cache.files[todo[end]]["length"]
+                end += 1
+            batch = todo[start:end]
+            waveforms = [audio_cache.sample(audio, float32=True)["array"] for audio in batch]
+
+            for audio, features in zip(batch, extractor(waveforms)):
+                files[audio] = dict(writer.write(features), source=_source(audio_cache, audio))
+            start = end
+    finally:
+        writer.close()
+
+    _write_index(store_dir, params, shards, files)
+    for number in unreferenced:
+        os.remove(_shard_path(store_dir, number, params))
+    return len(todo)
+
+
+def load_feature_store(audio_cache: AudioCache, audio_values: Optional[List[str]] = None,
+                       store_dir: str = DEFAULT_STORE_DIR,
+                       params: MelParams = MelParams()) -> FeatureStore:
+    """
+    Open the store, first computing whatever is missing or stale for
+    audio_values (default: every recording in the audio cache)
+    """
+    if audio_values is None:
+        audio_values = list(audio_cache.files)
+    try:
+        store = FeatureStore(store_dir)
+    except (OSError, ValueError):
+        pass
+    else:
+        if store.params == params and all(
+                audio in store.files and audio in audio_cache
+                and store.files[audio]["source"] == _source(audio_cache, audio)
+                for audio in audio_values):
+            return store
+
+    build_feature_store(audio_cache, audio_values, store_dir, params)
+    return FeatureStore(store_dir)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute log-mel features for the audio cache")
+    parser.add_argument("--records", default=RECORDS_PATH, help="JSONL file with an audio field")
+    parser.add_argument("--audio-cache", default=DEFAULT_CACHE_DIR, help="audio cache directory")
+    parser.add_argument("--out-dir", default=DEFAULT_STORE_DIR, help="feature store directory")
+    parser.add_argument("--dtype", choices=DTYPES, default="float16", help="stored feature type")
+    parser.add_argument("--n-mels", type=int, default=128, help="mel bins")
+    parser.add_argument("--batch-seconds", type=float, default=60.0,
+                        help="audio per FFT batch, in seconds")
+    parser.add_argument("--force", action="store_true", help="recompute every entry")
+    args = parser.parse_args()
+
+    audio_cache = load_audio_cache(args.records, args.audio_cache)
+    params = MelParams(n_mels=args.n_mels, dtype=args.dtype)
+    computed = build_feature_store(audio_cache, list(audio_cache.files), args.out_dir, params,
+                                   args.batch_seconds, args.force)
+    store = FeatureStore(args.out_dir)
+    frames = sum(entry["frames"] for entry in store.files.values())
+    print(f"{len(store)} recordings, {frames} frames x {params.n_mels} mels in "
+          f"{len(store.shard_lengths)} shard(s); computed {computed}")
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Indexed Quran text store.
+
+Reads the columns the builders need from the Quran CSV once (stdlib csv,
+no pandas) into a compact binary form with O(1) lookup by
+(surah_no, ayah_no_surah) and by ayah_no_quran. The binary form can be
+persisted next to the CSV and memory-mapped on later runs; it records the
+CSV's size and mtime and load_quran_text rebuilds it when they change.
+
+    python quran_text.py [--output PATH] [--csv PATH]
+
+File layout (little-endian):
+    header          magic, format version, source size and mtime, counts
+    surah_start     u32 x (MAX_SURAH + 2)  first ayah slot of each surah
+    ayah_keys       u32 x n_ayat           surah_no << 16 | ayah_no_surah
+    quran_numbers   u32 x n_ayat           ayah_no_quran of each slot
+    quran_slots     u32 x (max_no + 1)     slot of each ayah_no_quran (NO_SLOT if none)
+    text_offsets    u32 x (n_ayat + 1)     byte range in the text blob
+    texts           ayah_ar of every slot (UTF-8)
+    surah names     surah_name_roman of surahs 1..MAX_SURAH, '\n'-joined UTF-8
+
+ayah_no_quran is taken as the CSV gives it; where a number repeats, the
+first row carrying it wins.
+"""
+
+import argparse
+import csv
+import mmap
+import os
+import struct
+from typing import Iterator, List, NamedTuple, Optional, Tuple, Union
+
+QURAN_CSV = "archive/The Quran Dataset.csv"
+DEFAULT_TEXT_PATH = "archive/quran_text.idx"
+
+MAGIC = b"QTXT"
+FORMAT_VERSION = 1
+MAX_SURAH = 114
+NO_SLOT = 0xFFFFFFFF
+
+# magic, format version, source size, source mtime_ns, n_ayat, max ayah_no_quran,
+# texts bytes, names bytes
+HEADER = struct.Struct("<4sIQqIIII")
+
+
+class Ayah(NamedTuple):
+    surah_no: int
+    ayah_no_surah: int
+    ayah_no_quran: int
+    surah_name: str
+    text: str
+
+
+class QuranText:
+    """Read-only view of a text store held in bytes or a memory map"""
+
+    def __init__(self, data: Union[bytes, mmap.mmap], path: Optional[str] = None):
+        self.path = path
+        self._data = data
+        buffer = memoryview(data)
+
+        magic, version, size, mtime_ns, n_ayat, max_no, texts_len, names_len = \
+            HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            buffer.release()
+            raise ValueError(f"{path or 'data'} is not a version {FORMAT_VERSION} Quran text store")
+
+        self.source = (size, mtime_ns)
+        offset = HEADER.size
+
+        def section(count: int, fmt: str, itemsize: int) -> memoryview:
+            nonlocal offset
+            view = buffer[offset:offset + count * itemsize].cast(fmt)
+            offset += count * itemsize
+            return view
+
+        self._surah_start = section(MAX_SURAH + 2, "I", 4)
+        self._ayah_keys = section(n_ayat, "I", 4)
+        self._quran_numbers = section(n_ayat, "I", 4)
+        self._quran_slots = section(max_no + 1, "I", 4)
+        self._text_offsets = section(n_ayat + 1, "I", 4)
+        self._texts = section(texts_len, "B", 1)
+        names = section(names_len, "B", 1)
+        self.surah_names = [""] + bytes(names).decode("utf-8").split("\n")
+        names.release()
+        self._buffer = buffer
+
+    @classmethod
+    def open(cls, path: str = DEFAULT_TEXT_PATH) -> "QuranText":
+        """Memory-map a persisted store"""
+        with open(path, "rb") as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            return cls(data, path)
+        except ValueError:
+            data.close()
+            raise
+
+    def __len__(self) -> int:
+        return len(self._ayah_keys)
+
+    def __contains__(self, key: Tuple[int, int]) -> bool:
+        return self._slot(*key) is not None
+
+    def __iter__(self) -> Iterator[Ayah]:
+        for slot in range(len(self)):
+            yield self._ayah(slot)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self) -> None:
+        for view in (self._surah_start, self._ayah_keys, self._quran_numbers,
+                     self._quran_slots, self._text_offsets, self._texts, self._buffer):
+            view.release()
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+
+    def _slot(self, surah_no: int, ayah_no_surah: int) -> Optional[int]:
+        if not 1 <= surah_no <= MAX_SURAH or ayah_no_surah < 1:
+            return None
+        slot = self._surah_start[surah_no] + ayah_no_surah - 1
+        if slot >= self._surah_start[surah_no + 1]:
+            return None
+        if self._ayah_keys[slot] != (surah_no << 16 | ayah_no_surah):
+            return None
+        return slot
+
+    def _text(self, slot: int) -> str:
+        start, end = self._text_offsets[slot], self._text_offsets[slot + 1]
+        return bytes(self._texts[start:end]).decode("utf-8")
+
+    def _ayah(self, slot: int) -> Ayah:
+        key = self._ayah_keys[slot]
+        surah_no = key >> 16
+        return Ayah(surah_no, key & 0xFFFF, self._quran_numbers[slot],
+                    self.surah_names[surah_no], self._text(slot))
+
+    def ayah(self, surah_no: int, ayah_no_surah: int) -> Ayah:
+        slot = self._slot(surah_no, ayah_no_surah)
+        if slot is None:
+            raise KeyError((surah_no, ayah_no_surah))
+        return self._ayah(slot)
+
+    def by_number(self, ayah_no_quran: int) -> Ayah:
+        """Look an ayah up by its ayah_no_quran"""
+        if not 0 <= ayah_no_quran < len(self._quran_slots) or \
+                self._quran_slots[ayah_no_quran] == NO_SLOT:
+            raise KeyError(ayah_no_quran)
+        return self._ayah(self._quran_slots[ayah_no_quran])
+
+    def text(self, surah_no: int, ayah_no_surah: int) -> str:
+        """ayah_ar of an ayah"""
+        slot = self._slot(surah_no, ayah_no_surah)
+        if slot is None:
+            raise KeyError((surah_no, ayah_no_surah))
+        return self._text(slot)
+
+
+def _read_rows(csv_path: str) -> List[Tuple[int, int, int, str, str]]:
+    with open(csv_path, encoding="utf-8", newline="") as f:
+        return [
+            (int(row["surah_no"]), int(row["ayah_no_surah"]), int(row["ayah_no_quran"]),
+             row["surah_name_roman"], row["ayah_ar"])
+            for row in csv.DictReader(f)
+        ]
+
+
+def build_quran_text(csv_path: str = QURAN_CSV) -> bytes:
+    """Read the CSV and return the store's binary form"""
+    stat = os.stat(csv_path)
+    rows = _read_rows(csv_path)
+    ayat = sorted(rows, key=lambda row: row[:2])
+
+    surah_start = [0] * (MAX_SURAH + 2)
+    surah_names = [""] * MAX_SURAH
+    ayah_keys, quran_numbers, text_offsets = [], [], [0]
+    texts = bytearray()
+    for slot, (surah_no, ayah_no_surah, ayah_no_quran, surah_name, text) in enumerate(ayat):
+        ayah_keys.append(surah_no << 16 | ayah_no_surah)
+        quran_numbers.append(ayah_no_quran)
+        surah_names[surah_no - 1] = surah_name
+        texts += text.encode("utf-8")
+        text_offsets.append(len(texts))
+
+    # Each surah starts at the first slot not before it
+    slot = len(ayat)
+    for surah_no in range(MAX_SURAH + 1, 0, -1):
+        while slot > 0 and ayah_keys[slot - 1] >> 16 >= surah_no:
+            slot -= 1
+        surah_start[surah_no] = slot
+
+    max_no = max(quran_numbers, default=0)
+    quran_slots = [NO_SLOT] * (max_no + 1)
+    first_row = {}
+    for row_no, row in enumerate(rows):
+        first_row.setdefault(row[2], row_no)
+    slot_of_key = {key: slot for slot, key in enumerate(ayah_keys)}
+    for ayah_no_quran, row_no in first_row.items():
+        surah_no, ayah_no_surah = rows[row_no][:2]
+        quran_slots[ayah_no_quran] = slot_of_key[surah_no << 16 | ayah_no_surah]
+
+    names_blob = "\n".join(surah_names).encode("utf-8")
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, stat.st_size, stat.st_mtime_ns,
+                         len(ayat), max_no, len(texts), len(names_blob))
+    parts = [header]
+    for column in (surah_start, ayah_keys, quran_numbers, quran_slots, text_offsets):
+        parts.append(struct.pack(f"<{len(column)}I", *column))
+    parts.append(bytes(texts))
+    parts.append(names_blob)
+    return b"".join(parts)
+
+
+def save_quran_text(path: str = DEFAULT_TEXT_PATH, csv_path: str = QURAN_CSV) -> None:
+    """Build the store from the CSV and write it to path"""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(build_quran_text(csv_path))
+    os.replace(tmp_path, path)
+
+
+def load_quran_text(csv_path: str = QURAN_CSV,
+                    path: Optional[str] = DEFAULT_TEXT_PATH) -> QuranText:
+    """
+    Open the persisted store at path, (re)building it first if it is
+    missing or the CSV has changed since. path=None builds in memory and
+    writes nothing.
+    """
+    if path is None:
+        return QuranText(build_quran_text(csv_path))
+
+    stat = os.stat(csv_path)
+    if os.path.exists(path):
+        try:
+            store = QuranText.open(path)
+        except ValueError:
+            pass
+        else:
+            if store.source == (stat.st_size, stat.st_mtime_ns):
+                return store
+            store.close()
+
+    save_quran_text(path, csv_path)
+    return QuranText.open(path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the indexed Quran text store")
+    parser.add_argument("--output", default=DEFAULT_TEXT_PATH, help="store file to write")
+    parser.add_argument("--csv", default=QURAN_CSV, help="Quran dataset CSV")
+    args = parser.parse_args()
+
+    save_quran_text(args.output, args.csv)
+    with QuranText.open(args.output) as store:
+        print(f"Stored {len(store)} ayat, {os.path.getsize(args.output)} bytes")
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Precomputed Tajweed rule index for the whole Quran.
+
+The engine is run once over every ayah of the Quran CSV and the per-word
+rule matches are written to a compact binary file. At runtime the file is
+memory-mapped, so looking up the rules of an ayah is O(1) and never calls
+the engine. The file stores the rule fingerprint of the engine that built
+it; load_rule_index rebuilds it automatically when the rules change.
+
+    python rule_index.py [--output PATH] [--csv PATH]
+
+File layout (little-endian):
+    header          magic, format version, fingerprint, counts
+    surah_start     u32 x (MAX_SURAH + 2)  first ayah slot of each surah
+    ayah_keys       u32 x n_ayat           surah_no << 16 | ayah_no_surah
+    record_offsets  u32 x (n_ayat + 1)     record range of each ayah
+    word_offsets    u32 x (n_ayat + 1)     byte range in the word blob
+    rule_ids        u16 x n_records
+    word_ids        u16 x n_records        word number within the ayah
+    positions       u16 x n_records        character position within the word
+    rule names      '\n'-joined UTF-8
+    words           per ayah, normalized words joined by ' ' (UTF-8)
+"""
+
+import argparse
+import csv
+import mmap
+import os
+import struct
+from typing import Dict, List, Optional, Tuple
+
+from tajweed_rule import GenericQuranPhoneticScript, get_processor
+
+QURAN_CSV = "archive/The Quran Dataset.csv"
+DEFAULT_INDEX_PATH = "archive/tajweed_rules.idx"
+
+MAGIC = b"QTRI"
+FORMAT_VERSION = 1
+MAX_SURAH = 114
+
+# magic, format version, fingerprint, n_ayat, n_records, names bytes, words bytes
+HEADER = struct.Struct("<4sI64sIIII")
+
+
+class RuleIndex:
+    """Read-only, memory-mapped view of a rule index file"""
+
+    def __init__(self, path: str = DEFAULT_INDEX_PATH):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        buffer = memoryview(self._mmap)
+
+        magic, version, fingerprint, n_ayat, n_records, names_len, words_len = \
+            HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            buffer.release()
+            self._mmap.close()
+            raise ValueError(f"{path} is not a version {FORMAT_VERSION} rule index")
+
+        self.fingerprint = fingerprint.decode("ascii")
+        offset = HEADER.size
+
+        def section(count: int, fmt: str, itemsize: int) -> memoryview:
+            nonlocal offset
+            view = buffer[offset:offset + count * itemsize].cast(fmt)
+            offset += count * itemsize
+            return view
+
+        self._surah_start = section(MAX_SURAH + 2, "I", 4)
+        self._ayah_keys = section(n_ayat, "I", 4)
+        self._record_offsets = section(n_ayat + 1, "I", 4)
+        self._word_offsets = section(n_ayat + 1, "I", 4)
+        self._rule_ids = section(n_records, "H", 2)
+        self._word_ids = section(n_records, "H", 2)
+        self._positions = section(n_records, "H", 2)
+        names = section(names_len, "B", 1)
+        self._words = section(words_len, "B", 1)
+        self.rule_names = bytes(names).decode("utf-8").split("\n")
+        names.release()
+        self._buffer = buffer
+
+    def __len__(self) -> int:
+        return len(self._ayah_keys)
+
+    def __contains__(self, key: Tuple[int, int]) -> bool:
+        return self._slot(*key) is not None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self) -> None:
+        for view in (self._surah_start, self._ayah_keys, self._record_offsets,
+                     self._word_offsets, self._rule_ids, self._word_ids,
+                     self._positions, self._words, self._buffer):
+            view.release()
+        self._mmap.close()
+
+    def _slot(self, surah_no: int, ayah_no_surah: int) -> Optional[int]:
+        if not 1 <= surah_no <= MAX_SURAH or ayah_no_surah < 1:
+            return None
+        slot = self._surah_start[surah_no] + ayah_no_surah - 1
+        if slot >= self._surah_start[surah_no + 1]:
+            return None
+        if self._ayah_keys[slot] != (surah_no << 16 | ayah_no_surah):
+            return None
+        return slot
+
+    def _require_slot(self, surah_no: int, ayah_no_surah: int) -> int:
+        slot = self._slot(surah_no, ayah_no_surah)
+        if slot is None:
+            raise KeyError((surah_no, ayah_no_surah))
+        return slot
+
+    def words(self, surah_no: int, ayah_no_surah: int) -> List[str]:
+        """Normalized words of an ayah, as the engine split them"""
+        slot = self._require_slot(surah_no, ayah_no_surah)
+        start, end = self._word_offsets[slot], self._word_offsets[slot + 1]
+        return bytes(self._words[start:end]).decode("utf-8").split(" ")
+
+    def rules(self, surah_no: int, ayah_no_surah: int) -> List[Tuple[str, int, int]]:
+        """(rule name, word id, position in word) for every match in an ayah"""
+        slot = self._require_slot(surah_no, ayah_no_surah)
+        start, end = self._record_offsets[slot], self._record_offsets[slot + 1]
+        return [
+            (self.rule_names[self._rule_ids[i]], self._word_ids[i], self._positions[i])
+            for i in range(start, end)
+        ]
+
+    def word_rules(self, surah_no: int, ayah_no_surah: int) -> Dict[str, List[str]]:
+        """Same mapping as extract_tajweed_rules() on the ayah text"""
+        words = self.words(surah_no, ayah_no_surah)
+        rules_per_word = [[] for _ in words]
+        for name, word_id, _ in self.rules(surah_no, ayah_no_surah):
+            rules_per_word[word_id].append(name)
+
+        word_tajweed_rules = {}
+        for word, word_rules in zip(words, rules_per_word):
+            if word_rules:
+                word_tajweed_rules[word] = word_rules
+        return word_tajweed_rules
+
+
+def _read_ayat(csv_path: str) -> List[Tuple[int, int, str]]:
+    with open(csv_path, encoding="utf-8", newline="") as f:
+        return [
+            (int(row["surah_no"]), int(row["ayah_no_surah"]), row["ayah_ar"])
+            for row in csv.DictReader(f)
+        ]
+
+
+def build_rule_index(path: str = DEFAULT_INDEX_PATH,
+                     csv_path: str = QURAN_CSV,
+                     processor: Optional[GenericQuranPhoneticScript] = None) -> None:
+    """Run the engine over every ayah and write the index file"""
+    processor = processor or get_processor()
+    ayat = sorted(_read_ayat(csv_path))
+
+    rule_names = [rule.name for rule in processor.tajweed_rules]
+    rule_ids = {name: i for i, name in enumerate(rule_names)}
+
+    surah_start = [0] * (MAX_SURAH + 2)
+    ayah_keys, record_offsets, word_offsets = [], [0], [0]
+    rule_column, word_column, position_column = [], [], []
+    words_blob = bytearray()
+
+    for slot, (surah_no, ayah_no_surah, text) in enumerate(ayat):
+        if ayah_no_surah == 1:
+            surah_start[surah_no] = slot
+        ayah_keys.append(surah_no << 16 | ayah_no_surah)
+
+        words = processor.normalize_arabic(text).split()
+        for word_id, word in enumerate(words):
+            for position, name in processor.match_word_rules(word):
+                rule_column.append(rule_ids[name])
+                word_column.append(word_id)
+                position_column.append(position)
+        record_offsets.append(len(rule_column))
+
+        words_blob += " ".join(words).encode("utf-8")
+        word_offsets.append(len(words_blob))
+
+    # Surahs end where the next one starts
+    surah_start[MAX_SURAH + 1] = len(ayat)
+    for surah_no in range(MAX_SURAH, 0, -1):
+        if surah_start[surah_no] == 0 and surah_no != 1:
+            surah_start[surah_no] = surah_start[surah_no + 1]
+
+    names_blob = "\n".join(rule_names).encode("utf-8")
+    header = HEADER.pack(MAGIC, FORMAT_VERSION,
+                         processor.rule_fingerprint().encode("ascii"),
+                         len(ayat), len(rule_column), len(names_blob), len(words_blob))
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(header)
+        for column, fmt in ((surah_start, "I"), (ayah_keys, "I"),
+                            (record_offsets, "I"), (word_offsets, "I"),
+                            (rule_column, "H"), (word_column, "H"),
+                            (position_column, "H")):
+            f.write(struct.pack(f"<{len(column)}{fmt}", *column))
+        f.write(names_blob)
+        f.write(words_blob)
+    os.replace(tmp_path, path)
+
+
+def load_rule_index(path: str = DEFAULT_INDEX_PATH,
+                    csv_path: str = QURAN_CSV,
+                    qiraat: str = "hafs") -> RuleIndex:
+    """
+    Open the index, (re)building it first if it is missing or was built
+    by a different rule set
+    """
+    processor = get_processor(qiraat)
+    fingerprint = processor.rule_fingerprint()
+
+    if os.path.exists(path):
+        try:
+            index = RuleIndex(path)
+        except ValueError:
+            pass
+        else:
+            if index.fingerprint == fingerprint:
+                return index
+            index.close()
+
+    build_rule_index(path, csv_path, processor)
+    return RuleIndex(path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the precomputed Tajweed rule index")
+    parser.add_argument("--output", default=DEFAULT_INDEX_PATH, help="index file to write")
+    parser.add_argument("--csv", default=QURAN_CSV, help="Quran dataset CSV")
+    args = parser.parse_args()
+
+    build_rule_index(args.output, args.csv)
+    with RuleIndex(args.output) as index:
+        print(f"Indexed {len(index)} ayat, fingerprint {index.fingerprint[:12]}")
@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Vectorised batch rule detection for GenericQuranPhoneticScript.
+
+Many verses are encoded into one contiguous array of code points and every
+known rule is computed as a boolean mask over the whole batch with shifted
+array comparisons. Only the positions where some rule fired go back to
+Python for priority and conflict resolution, so the results are the same
+RuleApplication lists as process_text() and the same word maps as
+extract_tajweed_rules_for_words().
+
+Rules the batch engine has no mask for (e.g. third-party rules) are still
+evaluated with their own matches() at the positions they can fire on.
+"""
+
+from typing import Callable, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from tajweed_rule import GenericQuranPhoneticScript, RuleApplication, VerseView, get_processor
+
+# Two sentinels around every segment, so shifts of up to +-2 never cross into
+# a neighbouring verse and out-of-range lookups compare unequal to any letter
+PAD = 2
+SENTINEL = 0
+
+SUKUN = 'ْ'
+SHADDA = 'ّ'
+FATHA = 'َ'
+DAMMA = 'ُ'
+KASRA = 'ِ'
+HAMZA = 'ء'
+
+
+class EncodedBatch:
+    """Code points of many texts in one padded array, with shift helpers"""
+
+    def __init__(self, texts: Sequence[str]):
+        self.texts = list(texts)
+        lengths = np.fromiter((len(t) for t in self.texts), dtype=np.int64, count=len(self.texts))
+        self.starts = PAD + np.concatenate(([0], np.cumsum(lengths + PAD)[:-1])).astype(np.int64)
+        self.lengths = lengths
+
+        padding = '\0' * PAD
+        joined = padding + padding.join(self.texts) + padding
+        self.codes = np.frombuffer(joined.encode('utf-32-le'), dtype='<u4').astype(np.int32)
+        self._shifted = {0: self.codes}
+        self._space = None
+        self._stripped = None
+
+    def at(self, offset: int, codes: np.ndarray = None) -> np.ndarray:
+        """Array whose element i is the code point at i + offset"""
+        if codes is not None:
+            return np.roll(codes, -offset)
+        if offset not in self._shifted:
+            self._shifted[offset] = np.roll(self.codes, -offset)
+        return self._shifted[offset]
+
+    def exists(self, offset: int) -> np.ndarray:
+        return self.at(offset) != SENTINEL
+
+    def isspace(self, codes: np.ndarray) -> np.ndarray:
+        """str.isspace() for every code point"""
+        unique, inverse = np.unique(codes, return_inverse=True)
+        table = np.fromiter((chr(u).isspace() for u in unique), dtype=bool, count=len(unique))
+        return table[inverse]
+
+    def space(self, offset: int = 0) -> np.ndarray:
+        if self._space is None:
+            self._space = self.isspace(self.codes) & (self.codes != SENTINEL)
+        return np.roll(self._space, -offset) if offset else self._space
+
+    def stripped(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Tashkeel-stripped text of each segment, written from the segment's
+        start and padded with sentinels (the same layout VerseView.stripped
+        is indexed with), and for every position of a kept character its
+        index in that array (VerseView.raw_to_stripped, in batch coordinates)
+        """
+        if self._stripped is not None:
+            return self._stripped
+        codes = self.codes
+        tashkeel = (((codes >= 0x0617) & (codes <= 0x061A)) |
+                    ((codes >= 0x064B) & (codes <= 0x0652)))
+        keep = ~tashkeel & (codes != SENTINEL)
+
+        # Rank of every kept character within its own segment
+        rank = np.cumsum(keep) - 1
+        segment = np.searchsorted(self.starts, np.arange(len(codes)), side='right') - 1
+        segment_base = np.concatenate(([0], np.cumsum(keep)))[self.starts]
+        valid = keep & (segment >= 0)
+        local = rank - segment_base[np.maximum(segment, 0)]
+
+        stripped = np.full_like(codes, SENTINEL)
+        index = np.zeros(len(codes), dtype=np.int64)
+        targets = self.starts[segment[valid]] + local[valid]
+        stripped[targets] = codes[valid]
+        index[valid] = targets
+        self._stripped = stripped, index
+        return self._stripped
+
+    def locate(self, positions: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Global positions -> (segment index, position within segment)"""
+        segment = np.searchsorted(self.starts, positions, side='right') - 1
+        return segment, positions - self.starts[segment]
+
+
+def _chars(chars) -> np.ndarray:
+    return np.array([ord(c) for c in chars], dtype=np.int32)
+
+
+def _member(codes: np.ndarray, chars) -> np.ndarray:
+    """Membership through a lookup table indexed by code point"""
+    members = _chars(chars)
+    table = np.zeros(max(int(codes.max()), int(members.max(initial=0))) + 1, dtype=bool)
+    table[members] = True
+    return table[codes]
+
+
+# ==================== RULE MASKS ====================
+# Each builder mirrors the condition_func of the rule with the same name
+
+def _noon_mask(letters_attr: str) -> Callable:
+    def build(batch: EncodedBatch, p: GenericQuranPhoneticScript) -> np.ndarray:
+        return _member(batch.at(0), p.noon_tanween) & _member(batch.at(1), getattr(p, letters_attr))
+    return build
+
+
+def _meem_mask(follower: Callable[[EncodedBatch], np.ndarray]) -> Callable:
+    def build(batch: EncodedBatch, p: GenericQuranPhoneticScript) -> np.ndarray:
+        return ((batch.at(0) == ord('م')) & (batch.at(1) == ord(SUKUN)) &
+                batch.exists(2) & follower(batch))
+    return build
+
+
+def _lam_definite_mask(letters_attr: str) -> Callable:
+    def build(batch: EncodedBatch, p: GenericQuranPhoneticScript) -> np.ndarray:
+        # The lam is matched in the raw text, its neighbours in the stripped one
+        stripped, index = batch.stripped()
+        return ((batch.at(0) == ord('ل')) &
+                (stripped[index - 1] == ord('ا')) &
+                _member(stripped[index + 2], getattr(p, letters_attr)))
+    return build
+
+
+def _madd_tabii(batch: EncodedBatch, p: GenericQuranPhoneticScript) -> np.ndarray:
+    blocked = batch.exists(1) & (_member(batch.at(1), HAMZA + SUKUN) | (batch.at(2) == ord(SHADDA)))
+    return _member(batch.at(0), p.madd_chars) & ~blocked
+
+
+def _madd_wajib_muttasil(batch, p):
+    return _member(batch.at(0), p.madd_chars) & (batch.at(1) == ord(HAMZA))
+
+
+def _madd_jaiz_munfasil(batch, p):
+    return _member(batch.at(0), p.madd_chars) & batch.space(1) & (batch.at(2) == ord(HAMZA))
+
+
+def _madd_lazim(batch, p):
+    return _member(batch.at(0), p.madd_chars) & (batch.at(2) == ord(SHADDA))
+
+
+def _madd_lin(batch, p):
+    return (_member(batch.at(0), 'وي') & (batch.at(1) == ord(SUKUN)) &
+            batch.exists(2) & ~_member(batch.at(2), p.madd_chars))
+
+
+def _qalqalah(batch, p):
+    return _member(batch.at(0), p.qalqalah_letters) & (batch.at(1) == ord(SUKUN))
+
+
+def _qalqalah_kubra(batch, p):
+    return _qalqalah(batch, p) & (~batch.exists(2) | batch.space(2))
+
+
+def _qalqalah_wusta(batch, p):
+    return _qalqalah(batch, p) & batch.exists(2) & ~batch.space(2)
+
+
+def _tafkhim_daim(batch, p):
+    return _member(batch.at(0), p.always_heavy)
+
+
+def _ra_mask(vowels: str) -> Callable:
+    def build(batch: EncodedBatch, p: GenericQuranPhoneticScript) -> np.ndarray:
+        prev_vowel = _member(batch.at(-1), vowels)
+        prev_sukun = (batch.at(-1) == ord(SUKUN)) & _member(batch.at(-2), vowels)
+        own_vowel = _member(batch.at(1), vowels)
+        return (batch.at(0) == ord('ر')) & (prev_vowel | prev_sukun | own_vowel)
+    return build
+
+
+def _tafkhim_lam_allah(batch, p):
+    # The condition compares a three character slice, so only three
+    # character spellings can ever match
+    mask = np.zeros(len(batch.codes), dtype=bool)
+    for spelling in ['لَّه', 'لَٰه']:
+        if len(spelling) == 3:
+            mask |= ((batch.at(0) == ord(spelling[0])) &
+                     (batch.at(1) == ord(spelling[1])) &
+                     (batch.at(2) == ord(spelling[2])))
+    return mask
+
+
+def _ghunnah_mushaddad(batch, p):
+    return _member(batch.at(0), p.ghunnah_letters) & (batch.at(1) == ord(SHADDA))
+
+
+RULE_MASKS: Dict[str, Callable[[EncodedBatch, GenericQuranPhoneticScript], np.ndarray]] = {
+    'izhaar_halqi': _noon_mask('throat_letters'),
+    'idgham_bi_ghunnah': _noon_mask('idgham_bi_ghunnah'),
+    'idgham_bila_ghunnah': _noon_mask('idgham_bila_ghunnah'),
+    'iqlab': _noon_mask('iqlab_letter'),
+    'ikhfaa': _noon_mask('ikhfaa_letters'),
+    'ikhfaa_shafawi': _meem_mask(lambda b: b.at(2) == ord('ب')),
+    'idgham_shafawi': _meem_mask(lambda b: b.at(2) == ord('م')),
+    'izhaar_shafawi': _meem_mask(lambda b: ~_member(b.at(2), 'بم')),
+    'lam_shamsiyyah': _lam_definite_mask('shamsi_letters'),
+    'lam_qamariyyah': _lam_definite_mask('qamari_letters'),
+    'madd_tabii': _madd_tabii,
+    'madd_wajib_muttasil': _madd_wajib_muttasil,
+    'madd_jaiz_munfasil': _madd_jaiz_munfasil,
+    'madd_lazim': _madd_lazim,
+    'madd_lin': _madd_lin,
+    'qalqalah_kubra': _qalqalah_kubra,
+    'qalqalah_wusta': _qalqalah_wusta,
+    'tafkhim_daim': _tafkhim_daim,
+    'tafkhim_ra': _ra_mask(FATHA + DAMMA),
+    'tarqeeq_ra': _ra_mask(KASRA),
+    'tafkhim_lam_allah': _tafkhim_lam_allah,
+    'ghunnah_mushaddad': _ghunnah_mushaddad,
+}
+
+
+# ==================== BATCH ENGINE ====================
+
+class BatchRuleEngine:
+    """
+    Batch counterpart of GenericQuranPhoneticScript's per-character loop
+    """
+
+    def __init__(self, processor: GenericQuranPhoneticScript = None):
+        self.processor = processor or get_processor()
+
+    def rule_masks(self, batch: EncodedBatch) -> np.ndarray:
+        """(n_rules, n_codes) matrix: rule i matches at code position j"""
+        rules = self.processor.tajweed_rules
+        masks = np.zeros((len(rules), len(batch.codes)), dtype=bool)
+        pattern_rows = {}
+        for i, rule in enumerate(rules):
+            builder = RULE_MASKS.get(rule.name)
+            if builder is not None:
+                masks[i] = builder(batch, self.processor)
+            elif rule.is_pattern_rule:
+                pattern_rows[id(rule)] = i
+            else:
+                masks[i] = self._scalar_mask(batch, rule)
+
+        # Pattern rules come from one combined regex scan per segment
+        if pattern_rows:
+            for text, start in zip(batch.texts, batch.starts.tolist()):
+                for pos, matched in self.processor.scan_patterns(text).items():
+                    for rule in matched:
+                        masks[pattern_rows[id(rule)], start + pos] = True
+        masks[:, batch.codes == SENTINEL] = False
+        return masks
+
+    def _scalar_mask(self, batch: EncodedBatch, rule) -> np.ndarray:
+        """Evaluate a rule without a mask builder through its own matches()"""
+        mask = np.zeros(len(batch.codes), dtype=bool)
+        if rule.triggers:
+            candidates = np.nonzero(_member(batch.codes, rule.triggers))[0]
+        else:
+            candidates = np.nonzero(batch.codes != SENTINEL)[0]
+        segments, positions = batch.locate(candidates)
+        views = {}
+        for index, segment, pos in zip(candidates, segments, positions):
+            if segment not in views:
+                views[segment] = VerseView(batch.texts[segment])
+            view = views[segment]
+            if rule.matches(view, int(pos), self.processor.get_letter_context(view, int(pos))):
+                mask[index] = True
+        return mask
+
+    def _fired(self, texts: Sequence[str], skip_spaces: bool):
+        """
+        (rule indices, group starts, group ends, segments, positions) for the
+        positions where some rule fired, in text order; rule_indices[start:end]
+        are the rules matching at one position, in rule order
+        """
+        batch = EncodedBatch(texts)
+        masks = self.rule_masks(batch)
+        if skip_spaces:
+            # process_text never evaluates rules on whitespace
+            masks[:, batch.space()] = False
+
+        positions, rule_indices = np.nonzero(masks.T)
+        if not len(positions):
+            return None
+        boundaries = np.nonzero(np.diff(positions))[0] + 1
+        starts = np.concatenate(([0], boundaries))
+        ends = np.concatenate((boundaries, [len(positions)]))
+        segments, local = batch.locate(positions[starts])
+        return rule_indices, starts, ends, segments, local
+
+    def _matches(self, texts: Sequence[str], skip_spaces: bool):
+        """Yield (segment, position, matching rules) in text order"""
+        fired = self._fired(texts, skip_spaces)
+        if fired is None:
+            return
+        rule_indices, starts, ends, segments, local = fired
+        rules = self.processor.tajweed_rules
+        matched = [rules[i] for i in rule_indices.tolist()]
+        for segment, pos, start, end in zip(segments.tolist(), local.tolist(),
+                                            starts.tolist(), ends.tolist()):
+            yield segment, pos, matched[start:end]
+
+    def _resolution_masks(self, rule_indices: np.ndarray, starts: np.ndarray) -> List[int]:
+        """Processor rule_mask() of every fired position"""
+        rules = self.processor.tajweed_rules
+        bits = [self.processor.rule_mask([rule]) for rule in rules]
+        if len(rules) < 64:
+            # Bits are distinct, so a segmented sum is the OR
+            weights = np.array(bits, dtype=np.uint64)
+            return np.add.reduceat(weights[rule_indices], starts).tolist()
+        ends = np.append(starts[1:], len(rule_indices)).tolist()
+        indices = rule_indices.tolist()
+        return [sum(bits[i] for i in indices[start:end])
+                for start, end in zip(starts.tolist(), ends)]
+
+    def rule_applications(self, texts: Sequence[str]) -> List[List[RuleApplication]]:
+        """
+        Same as [process_text(t).rule_applications for t in texts]
+        """
+        processor = self.processor
+        # Matched without Uthmani marks, reported in the callers' positions
+        verses = [processor.canonical_verse(t) for t in texts]
+        results = [[] for _ in texts]
+        fired = self._fired(verses, skip_spaces=True)
+        if fired is None:
+            return results
+        rule_indices, starts, _, segments, local = fired
+        masks = self._resolution_masks(rule_indices, starts)
+
+        for segment, pos, mask in zip(segments.tolist(), local.tolist(), masks):
+            text = verses[segment]
+            char = text[pos]
+            if char in processor.reverse_phoneme_map:
+                base_phoneme = processor.reverse_phoneme_map[char]['phoneme']
+            else:
+                base_phoneme = char
+            context = processor.get_letter_context(text, pos)
+            _, applications = processor.resolve_mask(
+                text, pos, base_phoneme, context, mask
+            )
+            if len(text) != len(texts[segment]):
+                # Context as matched, position in the caller's text
+                for app in applications:
+                    app.context = context
+                    app.position = text.original_position(pos)
+            results[segment].extend(applications)
+        return results
+
+    def word_rules(self, texts: Sequence[str]) -> List[Dict[str, List[str]]]:
+        """
+        Same as [extract_tajweed_rules_for_words(t) for t in texts]
+        """
+        processor = self.processor
+        verse_words = [processor.normalize_arabic(t).split() for t in texts]
+        flat_words = [word for words in verse_words for word in words]
+
+        rules_per_word = [[] for _ in flat_words]
+        for segment, _, matching_rules in self._matches(flat_words, skip_spaces=False):
+            rules_per_word[segment].extend(rule.name for rule in matching_rules)
+
+        results = []
+        index = 0
+        for words in verse_words:
+            word_tajweed_rules = {}
+            for word in words:
+                if rules_per_word[index]:
+                    word_tajweed_rules[word] = rules_per_word[index]
+                index += 1
+            results.append(word_tajweed_rules)
+        return results
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Columnar export of engine results to Arrow IPC or Parquet files.
+
+Results are written in two tables, one row group / record batch per
+`batch_size` verses, so memory stays bounded however many verses go
+through:
+
+    verses          verse_id, text, phoneme_sequence list<string>,
+                    sifa_sequence list<string>, duration_sequence list<uint8>,
+                    word_boundaries list<uint32>
+    applications    verse_id, position, rule, category, sifa, duration
+                    (rule, category and sifa are dictionary encoded; the
+                    dictionary index of rule is the engine's rule id)
+
+Both schemas carry the rule fingerprint of the engine that wrote them.
+For the Quran CSV, verse_id is surah_no << 16 | ayah_no_surah.
+Readers pick the columns they need, e.g.
+
+    pyarrow.parquet.read_table(path, columns=["verse_id", "rule"])
+
+    python tajweed_export.py [--csv PATH] [--out-dir DIR] [--format parquet|arrow]
+                             [--batch-size N] [--workers N]
+"""
+
+import argparse
+import os
+from array import array
+from itertools import tee
+from typing import Iterable, List, Optional, Tuple
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from quran_text import DEFAULT_TEXT_PATH, QURAN_CSV, load_quran_text
+from tajweed_rule import (
+    CompactRuleApplications,
+    GenericQuranPhoneticScript,
+    QPSResult,
+    TajweedRuleCategory,
+    get_processor,
+    process_many,
+)
+
+FORMATS = ("parquet", "arrow")
+
+VERSES_SCHEMA = pa.schema([
+    ("verse_id", pa.int32()),
+    ("text", pa.string()),
+    ("phoneme_sequence", pa.list_(pa.string())),
+    ("sifa_sequence", pa.list_(pa.string())),
+    ("duration_sequence", pa.list_(pa.uint8())),
+    ("word_boundaries", pa.list_(pa.uint32())),
+])
+
+APPLICATIONS_SCHEMA = pa.schema([
+    ("verse_id", pa.int32()),
+    ("position", pa.uint32()),
+    ("rule", pa.dictionary(pa.uint16(), pa.string())),
+    ("category", pa.dictionary(pa.uint8(), pa.string())),
+    ("sifa", pa.dictionary(pa.uint8(), pa.string())),
+    ("duration", pa.uint8()),
+])
+
+
+def _column(values: array, arrow_type: pa.DataType) -> pa.Array:
+    """Arrow array over an array.array's buffer, without copying"""
+    return pa.Array.from_buffers(arrow_type, len(values), [None, pa.py_buffer(values)])
+
+
+def _list_column(lists: List[list], arrow_type: pa.DataType) -> pa.Array:
+    offsets = array('i', [0])
+    flat = []
+    for values in lists:
+        flat.extend(values)
+        offsets.append(len(flat))
+    return pa.ListArray.from_arrays(_column(offsets, pa.int32()), pa.array(flat, arrow_type))
+
+
+class ResultWriter:
+    """
+    Streams (verse_id, QPSResult) pairs into a verses file and an
+    applications file. Use as a context manager or call close().
+    """
+
+    def __init__(self, verses_path: str, applications_path: str,
+                 processor: Optional[GenericQuranPhoneticScript] = None,
+                 fmt: str = "parquet", batch_size: int = 512):
+        if fmt not in FORMATS:
+            raise ValueError(f"fmt must be one of {FORMATS}, not {fmt!r}")
+        self.processor = processor or get_processor()
+        self.batch_size = batch_size
+        self.verses_written = 0
+        self.applications_written = 0
+
+        self._rule_names = [rule.name for rule in self.processor.tajweed_rules]
+        self._categories = [category.value for category in TajweedRuleCategory]
+        self._rule_dictionary = pa.array(self._rule_names, pa.string())
+        self._category_dictionary = pa.array(self._categories, pa.string())
+        # Every application carries its rule's sifa output, so the sifa column
+        # reuses the rule ids; IPC files need one dictionary for all batches
+        sifa_values = sorted({rule.sifa_output for rule in self.processor.tajweed_rules})
+        self._sifa_dictionary = pa.array(sifa_values, pa.string())
+        self._sifa_of_rule = pa.array([sifa_values.index(rule.sifa_output)
+                                       for rule in self.processor.tajweed_rules], pa.uint8())
+        self._pending: List[Tuple[int, QPSResult]] = []
+
+        metadata = {"rule_fingerprint": self.processor.rule_fingerprint()}
+        self.verses_schema = VERSES_SCHEMA.with_metadata(metadata)
+        self.applications_schema = APPLICATIONS_SCHEMA.with_metadata(metadata)
+        self._writers = [
+            self._open(verses_path, self.verses_schema, fmt),
+            self._open(applications_path, self.applications_schema, fmt),
+        ]
+
+    @staticmethod
+    def _open(path: str, schema: pa.Schema, fmt: str):
+        if fmt == "parquet":
+            return pq.ParquetWriter(path, schema)
+        return pa.ipc.new_file(path, schema)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def write(self, verse_id: int, result: QPSResult) -> None:
+        self._pending.append((verse_id, result))
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def write_many(self, items: Iterable[Tuple[int, QPSResult]]) -> None:
+        for verse_id, result in items:
+            self.write(verse_id, result)
+
+    def flush(self) -> None:
+        if not self._pending:
+            return
+        verses, applications = self.record_batches(self._pending)
+        self._writers[0].write_batch(verses)
+        self._writers[1].write_batch(applications)
+        self.verses_written += verses.num_rows
+        self.applications_written += applications.num_rows
+        self._pending = []
+
+    def close(self) -> None:
+        if self._writers:
+            self.flush()
+            for writer in self._writers:
+                writer.close()
+            self._writers = []
+
+    def record_batches(self, items: List[Tuple[int, QPSResult]]
+                       ) -> Tuple[pa.RecordBatch, pa.RecordBatch]:
+        """(verses batch, applications batch) for a list of results"""
+        results = [result for _, result in items]
+        verses = pa.record_batch([
+            _column(array('i', [verse_id for verse_id, _ in items]), pa.int32()),
+            pa.array([result.original_text for result in results], pa.string()),
+            _list_column([result.phoneme_sequence for result in results], pa.string()),
+            _list_column([result.sifa_sequence for result in results], pa.string()),
+            _list_column([result.duration_sequence for result in results], pa.uint8()),
+            _list_column([result.word_boundaries for result in results], pa.uint32()),
+        ], schema=self.verses_schema)
+
+        verse_ids = array('i')
+        rule_ids, category_ids = array('H'), array('B')
+        positions, durations = array('I'), array('B')
+        for verse_id, result in items:
+            compact = CompactRuleApplications(result.rule_applications,
+                                              self._rule_names, self._categories)
+            verse_ids.extend([verse_id] * len(compact))
+            rule_ids.extend(compact.rule_ids)
+            category_ids.extend(compact.category_ids)
+            positions.extend(compact.positions)
+            durations.extend(compact.durations)
+        rules = _column(rule_ids, pa.uint16())
+
+        applications = pa.record_batch([
+            _column(verse_ids, pa.int32()),
+            _column(positions, pa.uint32()),
+            pa.DictionaryArray.from_arrays(rules, self._rule_dictionary),
+            pa.DictionaryArray.from_arrays(_column(category_ids, pa.uint8()),
+                                           self._category_dictionary),
+            pa.DictionaryArray.from_arrays(self._sifa_of_rule.take(rules),
+                                           self._sifa_dictionary),
+            _column(durations, pa.uint8()),
+        ], schema=self.applications_schema)
+        return verses, applications
+
+
+def export_verses(items: Iterable[Tuple[int, str]], out_dir: str,
+                  fmt: str = "parquet", batch_size: int = 512,
+                  workers: Optional[int] = 1, qiraat: str = "hafs") -> ResultWriter:
+    """
+    Run process_text over (verse_id, text) pairs and write both tables to
+    out_dir/verses.<ext> and out_dir/applications.<ext>. Verses are read
+    and processed lazily; returns the closed writer for its counters.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    extension = "parquet" if fmt == "parquet" else "arrow"
+    ids, texts = tee(items)
+    results = process_many((text for _, text in texts), workers=workers,
+                           qiraat=qiraat, method="process_text")
+
+    writer = ResultWriter(os.path.join(out_dir, f"verses.{extension}"),
+                          os.path.join(out_dir, f"applications.{extension}"),
+                          get_processor(qiraat), fmt, batch_size)
+    with writer:
+        writer.write_many(zip((verse_id for verse_id, _ in ids), results))
+    return writer
+
+
+def verse_key(surah_no: int, ayah_no_surah: int) -> int:
+    """verse_id of an ayah: surah_no << 16 | ayah_no_surah, as in rule_index"""
+    return surah_no << 16 | ayah_no_surah
+
+
+def quran_verses(csv_path: str = QURAN_CSV) -> Iterable[Tuple[int, str]]:
+    """
+    (verse_key, ayah_ar) for every ayah of the Quran CSV, in surah/ayah
+    order. ayah_no_quran is not used: it repeats in this CSV.
+    """
+    # Only the default CSV gets a persisted store
+    store_path = DEFAULT_TEXT_PATH if csv_path == QURAN_CSV else None
+    seen = set()
+    with load_quran_text(csv_path, store_path) as quran:
+        for ayah in quran:
+            key = verse_key(ayah.surah_no, ayah.ayah_no_surah)
+            if key in seen:
+                raise ValueError(f"duplicate verse_id {key} (surah {ayah.surah_no}, "
+                                 f"ayah {ayah.ayah_no_surah}) in {csv_path}")
+            seen.add(key)
+            yield key, ayah.text
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export engine results as Arrow/Parquet")
+    parser.add_argument("--csv", default=QURAN_CSV, help="Quran dataset CSV")
+    parser.add_argument("--out-dir", default="archive/columnar", help="output directory")
+    parser.add_argument("--format", choices=FORMATS, default="parquet")
+    parser.add_argument("--batch-size", type=int, default=512, help="verses per row group")
+    parser.add_argument("--workers", type=int, default=1, help="worker processes")
+    args = parser.parse_args()
+
+    writer = export_verses(quran_verses(args.csv), args.out_dir, args.format,
+                           args.batch_size, args.workers)
+    print(f"Wrote {writer.verses_written} verses and "
+          f"{writer.applications_written} rule applications to {args.out_dir}")
@@ -5,12 +5,21 @@ Complete Quran Phonetic Script (QPS) - Generic Tajweed Rules Implementation
 A fully generic system that extracts and applies ALL Tajweed rules to ANY Quranic text
 """
 
-from pydoc import text
-from typing import List, Tuple, Dict, Optional, Any, Union
+from typing import List, Tuple, Dict, Optional, Any, Union, Iterable, Iterator, Sequence
+import os
 import re
+import csv
+import hashlib
+import json
+import threading
+import time
+from contextlib import contextmanager
 from enum import Enum
 from dataclasses import dataclass, field
-from collections import defaultdict
+from array import array
+from collections import OrderedDict, defaultdict, deque
+from functools import cached_property
+from itertools import accumulate, islice
 
 # ==================== ENUMS AND CONSTANTS ====================
 
@@ -137,8 +146,188 @@ class SifaAttributes(Enum):
     IZHAAR = "Z"         # Clarity
 
 
+# ==================== TEXT CANONICALISATION ====================
+
+TASHKEEL_PATTERN = re.compile(r'[\u0617-\u061A\u064B-\u0652]')
+TASHKEEL_CHARS = frozenset(map(chr, [*range(0x0617, 0x061B), *range(0x064B, 0x0653)]))
+
+# normalize_arabic(): drop tatweel, fold alif variants, ta marbuta -> ha
+NORMALIZATION_MAP = {
+    'ـ': '',
+    'إ': 'ا', 'أ': 'ا', 'ٱ': 'ا', 'آ': 'ا',
+    'ة': 'ه',
+}
+
+# Uthmani marks U+06D6-U+06ED. The pause (waqf), rub el hizb and sajdah
+# signs stand between words as tokens of their own; the rest annotate the
+# letter they follow (small high meem/seen, small waw/yeh, rounded zero, ...)
+UTHMANI_MARKS = frozenset(map(chr, range(0x06D6, 0x06EE)))
+UTHMANI_PAUSE_MARKS = frozenset(map(chr, [*range(0x06D6, 0x06DC), 0x06DE, 0x06E9]))
+# marks= for the canonicaliser: 'keep' them, drop the 'pause' signs, or 'strip' all
+UTHMANI_MARK_MODES = ('keep', 'pause', 'strip')
+# The engine strips every mark, so none is matched or read as a letter
+ENGINE_MARKS = 'strip'
+
+
+class CanonicalText(str):
+    """
+    Canonical text with its offset map back to the original string:
+    offsets[i] is the original index of character i
+    """
+    
+    def __new__(cls, text: str, original: str, offsets: Sequence[int]):
+        canonical = super().__new__(cls, text)
+        canonical.original = original
+        canonical.offsets = offsets
+        return canonical
+    
+    def __reduce__(self):
+        return CanonicalText, (str(self), self.original, self.offsets)
+    
+    def original_position(self, pos: int) -> int:
+        """Original index of canonical position pos (len(original) at the end)"""
+        if pos < len(self.offsets):
+            return self.offsets[pos]
+        return len(self.original)
+    
+    def original_span(self, start: int, end: int) -> Tuple[int, int]:
+        """Original [start, end) covering canonical [start, end)"""
+        if end <= start:
+            position = self.original_position(start)
+            return position, position
+        return self.original_position(start), self.original_position(end - 1) + 1
+
+
+class ArabicCanonicalizer:
+    """
+    Normalisation, optional tashkeel removal and Uthmani mark handling from
+    one character table. Every character maps to at most one character, so
+    offsets back to the original are just the indices of the characters
+    that are kept.
+    
+    Without tashkeel removal the table is sparse (a few alif forms, tatweel,
+    marks) and is applied as one str.replace per replaced character and one
+    regex deletion, which is several times faster than str.translate's
+    per-character lookups. Tashkeel removal deletes close to half of a
+    vowelled text, where a single str.translate pass is fastest.
+    """
+    
+    def __init__(self, normalize: bool = True, strip_tashkeel: bool = False,
+                 marks: str = 'keep'):
+        if marks not in UTHMANI_MARK_MODES:
+            raise ValueError(f"marks must be one of {UTHMANI_MARK_MODES}, not {marks!r}")
+        mapping = {}
+        if normalize:
+            mapping.update(NORMALIZATION_MAP)
+        if strip_tashkeel:
+            mapping.update(dict.fromkeys(TASHKEEL_CHARS, ''))
+        if marks == 'pause':
+            mapping.update(dict.fromkeys(UTHMANI_PAUSE_MARKS, ''))
+        elif marks == 'strip':
+            mapping.update(dict.fromkeys(UTHMANI_MARKS, ''))
+        self.mapping = mapping
+        self.removed = frozenset(char for char, replacement in mapping.items() if not replacement)
+        
+        # A list beats a dict for translate(); code points past its end raise
+        # IndexError, which translate() treats as "keep the character"
+        table = list(range(max(map(ord, mapping), default=-1) + 1))
+        for char, replacement in mapping.items():
+            table[ord(char)] = replacement or None
+        self._table = table
+        
+        # Replacing one character at a time equals the single pass as long as
+        # no replacement is itself mapped
+        self._replacements = [(char, replacement) for char, replacement in sorted(mapping.items())
+                              if replacement]
+        self._deletion = (re.compile('[' + ''.join(map(re.escape, sorted(self.removed))) + ']')
+                          if self.removed else None)
+        self._sparse = not strip_tashkeel and not any(
+            replacement in mapping for _, replacement in self._replacements)
+    
+    def __call__(self, text: str) -> str:
+        if not self._sparse:
+            return text.translate(self._table)
+        for char, replacement in self._replacements:
+            text = text.replace(char, replacement)
+        if self._deletion is not None:
+            text = self._deletion.sub('', text)
+        return text
+    
+    def canonicalize(self, text: str) -> CanonicalText:
+        """Canonical text with offsets back into text"""
+        canonical = self(text)
+        if len(canonical) == len(text):
+            offsets = range(len(text))
+        else:
+            removed = self.removed
+            offsets = [i for i, char in enumerate(text) if char not in removed]
+        return CanonicalText(canonical, text, offsets)
+
+
+_canonicalizers: Dict[Tuple[bool, bool, str], ArabicCanonicalizer] = {}
+
+
+def get_canonicalizer(normalize: bool = True, strip_tashkeel: bool = False,
+                      marks: str = 'keep') -> ArabicCanonicalizer:
+    """Shared canonicaliser for a set of options"""
+    key = (normalize, strip_tashkeel, marks)
+    canonicalizer = _canonicalizers.get(key)
+    if canonicalizer is None:
+        canonicalizer = _canonicalizers.setdefault(key, ArabicCanonicalizer(*key))
+    return canonicalizer
+
+
+def canonicalize(text: str, normalize: bool = True, strip_tashkeel: bool = False,
+                 marks: str = 'pause') -> CanonicalText:
+    """
+    One-pass canonical form of text with an offset map, e.g. to report rule
+    positions found on the canonical text in original coordinates:
+    
+        canonical = canonicalize(ayah)
+        for app in processor.process_text(canonical).rule_applications:
+            original_pos = canonical.original_position(app.position)
+    """
+    return get_canonicalizer(normalize, strip_tashkeel, marks).canonicalize(text)
+
+
+_strip_tashkeel = get_canonicalizer(normalize=False, strip_tashkeel=True)
+
+
+def remove_tashkeel(text: str) -> str:
+    """Remove harakat, tanween, shadda and sukun"""
+    return _strip_tashkeel(text)
+
+
 # ==================== DATA CLASSES ====================
 
+class VerseView(str):
+    """
+    Verse text with its tashkeel-stripped projection, built at most once per
+    verse and only when a condition first reads it. It is the raw text
+    itself, so rule conditions receive it unchanged.
+    
+    stripped:        text without tashkeel
+    raw_to_stripped: raw index -> index of the next stripped character
+    """
+    
+    @cached_property
+    def stripped(self) -> str:
+        return ''.join(char for char in self if char not in TASHKEEL_CHARS)
+    
+    @cached_property
+    def raw_to_stripped(self) -> List[int]:
+        return list(accumulate((char not in TASHKEEL_CHARS for char in self), initial=0))[:-1]
+    
+    def __reduce__(self):
+        # Pickle as the raw text only; the projection is rebuilt on load
+        return VerseView, (str(self),)
+    
+    @staticmethod
+    def of(text: str) -> 'VerseView':
+        """text itself when it is already a view, otherwise a view over it"""
+        return text if isinstance(text, VerseView) else VerseView(text)
+
+
 @dataclass
 class TajweedRule:
     """Represents a single Tajweed rule with its conditions and effects"""
@@ -149,20 +338,80 @@ class TajweedRule:
     duration: int = 1
     description: str = ""
     condition_func: Optional[callable] = None
+    triggers: str = ""  # Characters at `position` the rule can fire on; empty = anywhere
+    # How far the condition reads around `position` (None = to the end of the text);
+    # pattern rules should set lookahead to their longest match
+    lookbehind: int = 2
+    lookahead: Optional[int] = 2
+    # Same, in VerseView.stripped characters around raw_to_stripped[position]
+    stripped_lookbehind: int = 0
+    stripped_lookahead: Optional[int] = None
+    _compiled: Optional[re.Pattern] = field(default=None, init=False, repr=False, compare=False)
+    
+    @property
+    def is_pattern_rule(self) -> bool:
+        """Matched by its regex pattern alone (no condition function)"""
+        return self.condition_func is None and bool(self.pattern)
     
     def matches(self, text: str, position: int, context: Dict[str, Any]) -> bool:
         """Check if rule matches at given position"""
         if self.condition_func:
             return self.condition_func(text, position, context)
         
-        # Check pattern
+        # Check pattern, matched in place so lookbehinds see the preceding text
         if self.pattern:
-            pattern = re.compile(self.pattern)
-            return bool(pattern.match(text[position:]))
+            if self._compiled is None:
+                self._compiled = re.compile(self.pattern)
+            return bool(self._compiled.match(text, position))
         
         return False
 
 
+class PatternScanner:
+    """
+    Pattern rules compiled into one regex with a named lookahead group per
+    rule, so a single finditer over the text finds every (position, rule)
+    match. Rules with capture groups keep a scan of their own: in the
+    combined regex their groups would be renumbered and backreferences
+    would silently point at the wrong group. All rules fall back to their
+    own scan when the patterns cannot be combined (e.g. inline flags).
+    """
+    
+    def __init__(self, rules: List[TajweedRule]):
+        self.rules = list(rules)
+        combinable = [i for i, rule in enumerate(self.rules)
+                      if re.compile(rule.pattern).groups == 0]
+        self._groups = [(f'_r{i}', i) for i in combinable]
+        self._combined = None
+        if combinable:
+            try:
+                any_rule = '|'.join(f'(?:{self.rules[i].pattern})' for i in combinable)
+                each_rule = ''.join(f'(?:(?=(?P<{name}>{self.rules[i].pattern})))?'
+                                    for name, i in self._groups)
+                self._combined = re.compile(f'(?=(?:{any_rule})){each_rule}')
+            except re.error:
+                self._groups = []
+        grouped = {i for _, i in self._groups}
+        self._separate = [(i, re.compile(f'(?=(?:{rule.pattern}))'))
+                          for i, rule in enumerate(self.rules) if i not in grouped]
+    
+    def scan(self, text: str) -> Dict[int, List[TajweedRule]]:
+        """Position -> pattern rules matching there, in rule order"""
+        found = {}
+        if self._combined is not None:
+            for match in self._combined.finditer(text):
+                found[match.start()] = [i for name, i in self._groups
+                                        if match.group(name) is not None]
+        for i, regex in self._separate:
+            for match in regex.finditer(text):
+                found.setdefault(match.start(), []).append(i)
+        
+        if self._separate:
+            # Separate scans add positions out of order and rules after the combined ones
+            return {pos: [self.rules[i] for i in sorted(found[pos])] for pos in sorted(found)}
+        return {pos: [self.rules[i] for i in ids] for pos, ids in found.items()}
+
+
 @dataclass
 class PhonemeMapping:
     """Mapping from Arabic character to phoneme"""
@@ -172,18 +421,155 @@ class PhonemeMapping:
     sifa_default: List[str] = field(default_factory=list)
 
 
-@dataclass
+def letter_context(text: str, pos: int) -> Dict[str, Any]:
+    """Contextual information around a position"""
+    context = {
+        'current': text[pos] if pos < len(text) else '',
+        'prev': text[pos - 1] if pos > 0 else '',
+        'next': text[pos + 1] if pos + 1 < len(text) else '',
+        'prev_prev': text[pos - 2] if pos > 1 else '',
+        'next_next': text[pos + 2] if pos + 2 < len(text) else '',
+        'is_word_start': pos == 0 or text[pos - 1].isspace(),
+        'is_word_end': pos == len(text) - 1 or (pos + 1 < len(text) and text[pos + 1].isspace()),
+        'is_verse_end': pos == len(text) - 1,
+        'has_sukun': pos + 1 < len(text) and text[pos + 1] == 'ْ',
+        'has_shadda': pos + 1 < len(text) and text[pos + 1] == 'ّ',
+        'vowel': '',
+    }
+    
+    # Determine vowel
+    if pos + 1 < len(text):
+        if text[pos + 1] in ['َ', 'ِ', 'ُ']:
+            context['vowel'] = text[pos + 1]
+    
+    return context
+
+
 class RuleApplication:
-    """Record of a rule application"""
-    rule_name: str
-    category: str
-    position: int
-    arabic_char: str
-    phoneme_before: str
-    phoneme_after: str
-    sifa_applied: str
-    duration: int
-    context: Dict[str, Any]
+    """
+    Record of a rule application.
+    
+    Slotted to keep whole-surah results small: instead of a context dict per
+    application it keeps a reference to the verse text and builds the
+    context on first access.
+    """
+    __slots__ = ('rule_name', 'category', 'position', 'arabic_char',
+                 'phoneme_before', 'phoneme_after', 'sifa_applied', 'duration',
+                 '_context', '_text')
+    
+    def __init__(self, rule_name: str, category: str, position: int,
+                 arabic_char: str, phoneme_before: str, phoneme_after: str,
+                 sifa_applied: str, duration: int,
+                 context: Optional[Dict[str, Any]] = None,
+                 text: Optional[str] = None):
+        self.rule_name = rule_name
+        self.category = category
+        self.position = position
+        self.arabic_char = arabic_char
+        self.phoneme_before = phoneme_before
+        self.phoneme_after = phoneme_after
+        self.sifa_applied = sifa_applied
+        self.duration = duration
+        self._context = context
+        self._text = text
+    
+    @property
+    def context(self) -> Dict[str, Any]:
+        if self._context is None:
+            self._context = letter_context(self._text, self.position) if self._text is not None else {}
+        return self._context
+    
+    @context.setter
+    def context(self, value: Dict[str, Any]) -> None:
+        self._context = value
+    
+    def _key(self) -> Tuple:
+        return (self.rule_name, self.category, self.position, self.arabic_char,
+                self.phoneme_before, self.phoneme_after, self.sifa_applied,
+                self.duration)
+    
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, RuleApplication):
+            return NotImplemented
+        return self._key() == other._key() and self.context == other.context
+    
+    def __repr__(self) -> str:
+        return (f"RuleApplication(rule_name={self.rule_name!r}, category={self.category!r}, "
+                f"position={self.position!r}, arabic_char={self.arabic_char!r}, "
+                f"phoneme_before={self.phoneme_before!r}, phoneme_after={self.phoneme_after!r}, "
+                f"sifa_applied={self.sifa_applied!r}, duration={self.duration!r})")
+    
+    def __getstate__(self):
+        return tuple(getattr(self, name) for name in self.__slots__)
+    
+    def __setstate__(self, state):
+        for name, value in zip(self.__slots__, state):
+            setattr(self, name, value)
+
+
+class CompactRuleApplications:
+    """
+    Struct-of-arrays form of a list of RuleApplication records: integer rule
+    and category ids, positions, durations and phoneme changes in flat
+    arrays. Cheap to hold and pickle for whole surahs; to_dicts() gives the
+    entries extract_rules_only() reports.
+    """
+    
+    def __init__(self, applications: List[RuleApplication], rule_names: List[str],
+                 categories: List[str]):
+        self.rule_names = list(rule_names)
+        self.categories = list(categories)
+        rule_ids = {name: i for i, name in enumerate(self.rule_names)}
+        category_ids = {name: i for i, name in enumerate(self.categories)}
+        
+        self.rule_ids = array('H', [rule_ids[a.rule_name] for a in applications])
+        self.category_ids = array('B', [category_ids[a.category] for a in applications])
+        self.positions = array('I', [a.position for a in applications])
+        self.durations = array('B', [a.duration for a in applications])
+        self.chars = ''.join(a.arabic_char for a in applications)
+        self.sifa = [a.sifa_applied for a in applications]
+        self.phoneme_changes = [(a.phoneme_before, a.phoneme_after) for a in applications]
+    
+    @classmethod
+    def for_processor(cls, applications: List[RuleApplication],
+                      processor: 'GenericQuranPhoneticScript') -> 'CompactRuleApplications':
+        return cls(applications,
+                   [rule.name for rule in processor.tajweed_rules],
+                   [category.value for category in TajweedRuleCategory])
+    
+    def __len__(self) -> int:
+        return len(self.rule_ids)
+    
+    def to_applications(self, text: Optional[str] = None) -> List[RuleApplication]:
+        """Expand back to RuleApplication records (context from text, lazily)"""
+        return [
+            RuleApplication(
+                rule_name=self.rule_names[self.rule_ids[i]],
+                category=self.categories[self.category_ids[i]],
+                position=self.positions[i],
+                arabic_char=self.chars[i],
+                phoneme_before=self.phoneme_changes[i][0],
+                phoneme_after=self.phoneme_changes[i][1],
+                sifa_applied=self.sifa[i],
+                duration=self.durations[i],
+                text=text
+            )
+            for i in range(len(self))
+        ]
+    
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        """Same entries as extract_rules_only()['rule_applications']"""
+        return [
+            {
+                'rule': self.rule_names[self.rule_ids[i]],
+                'category': self.categories[self.category_ids[i]],
+                'position': self.positions[i],
+                'char': self.chars[i],
+                'sifa': self.sifa[i],
+                'duration': self.durations[i]
+            }
+            for i in range(len(self))
+        ]
 
 
 @dataclass
@@ -197,6 +583,9 @@ class QPSResult:
     rule_applications: List[RuleApplication]
     word_boundaries: List[int]
     metadata: Dict[str, Any]
+    # Character position -> applications there; filled by process_text
+    position_index: Dict[int, List[RuleApplication]] = field(
+        default_factory=dict, repr=False, compare=False)
     
     def get_phoneme_string(self) -> str:
         return ''.join(self.phoneme_sequence)
@@ -204,23 +593,249 @@ class QPSResult:
     def get_sifa_string(self) -> str:
         return ' '.join(self.sifa_sequence)
     
-    def get_detailed_breakdown(self) -> List[Dict]:
-        breakdown = []
+    def applications_at(self, position: int) -> List[RuleApplication]:
+        """Rule applications at a character position"""
+        if not self.position_index and self.rule_applications:
+            for app in self.rule_applications:
+                self.position_index.setdefault(app.position, []).append(app)
+        return self.position_index.get(position, [])
+    
+    def iter_detailed_breakdown(self) -> Iterator[Dict]:
+        """Lazy get_detailed_breakdown(): entries are built as they are consumed"""
         pos = 0
         for i, (phoneme, sifa, duration) in enumerate(zip(
             self.phoneme_sequence, self.sifa_sequence, self.duration_sequence
         )):
-            rules_here = [r.rule_name for r in self.rule_applications if r.position == i]
-            breakdown.append({
+            yield {
                 'position': pos,
                 'arabic': self.normalized_text[i] if i < len(self.normalized_text) else '',
                 'phoneme': phoneme,
                 'sifa': sifa if sifa else 'None',
                 'duration': duration,
-                'rules': rules_here
-            })
+                'rules': [r.rule_name for r in self.applications_at(i)]
+            }
             pos += duration
-        return breakdown
+    
+    def get_detailed_breakdown(self) -> List[Dict]:
+        return list(self.iter_detailed_breakdown())
+
+
+def _update_code_digest(digest, code) -> None:
+    """Feed a code object (and nested ones) into a hash, ignoring addresses"""
+    digest.update(code.co_code)
+    digest.update(repr(code.co_names).encode('utf-8'))
+    for const in code.co_consts:
+        if hasattr(const, 'co_code'):
+            _update_code_digest(digest, const)
+        else:
+            digest.update(repr(const).encode('utf-8'))
+
+
+class WordRuleCache:
+    """
+    Bounded, thread-safe LRU cache of per-word rule matches with
+    hit/miss/eviction counters. A maxsize of 0 disables caching.
+    """
+    
+    def __init__(self, maxsize: int = 32768):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def __contains__(self, word: str) -> bool:
+        return word in self._entries
+    
+    def get(self, word: str) -> Optional[Tuple]:
+        with self._lock:
+            entry = self._entries.get(word)
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._entries.move_to_end(word)
+            return entry
+    
+    def put(self, word: str, entry: Tuple) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[word] = entry
+            self._entries.move_to_end(word)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+    
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+
+@dataclass
+class RuleStats:
+    """Counters for one rule, collected by RuleProfiler"""
+    name: str
+    category: str
+    evaluations: int = 0
+    matches: int = 0
+    condition_time: float = 0.0  # seconds spent in the condition function
+    suppressed: int = 0          # matched but dropped by rule_conflicts
+    shadowed: int = 0            # matched but its category was already applied
+    
+    @property
+    def match_rate(self) -> float:
+        return self.matches / self.evaluations if self.evaluations else 0.0
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'rule': self.name,
+            'category': self.category,
+            'evaluations': self.evaluations,
+            'matches': self.matches,
+            'match_rate': self.match_rate,
+            'condition_time': self.condition_time,
+            'suppressed': self.suppressed,
+            'shadowed': self.shadowed,
+        }
+
+
+class RuleProfiler:
+    """
+    Per-rule evaluation counts, matches, condition time and conflict
+    suppressions. Installed by GenericQuranPhoneticScript.enable_profiling(),
+    which wraps each condition function; nothing is wrapped while profiling
+    is off. Counters are not locked, so totals from several threads sharing
+    one processor are approximate.
+    """
+    
+    def __init__(self, rules: List[TajweedRule]):
+        self.stats = {}
+        for rule in rules:
+            self.stats_for(rule)
+        self.pattern_scans = 0
+        self.pattern_scan_time = 0.0  # combined regex, not attributable per rule
+    
+    def stats_for(self, rule: TajweedRule) -> RuleStats:
+        stats = self.stats.get(rule.name)
+        if stats is None:
+            stats = self.stats[rule.name] = RuleStats(rule.name, rule.category.value)
+        return stats
+    
+    def wrap(self, rule: TajweedRule) -> callable:
+        """Condition function of rule that records into this profiler"""
+        condition = rule.condition_func
+        stats = self.stats_for(rule)
+        clock = time.perf_counter
+        
+        def profiled_condition(text: str, pos: int, ctx: Dict) -> bool:
+            start = clock()
+            result = condition(text, pos, ctx)
+            stats.condition_time += clock() - start
+            stats.evaluations += 1
+            if result:
+                stats.matches += 1
+            return result
+        
+        profiled_condition.__wrapped__ = condition
+        return profiled_condition
+    
+    def scan(self, scanner: 'PatternScanner', text: str) -> Dict[int, List[TajweedRule]]:
+        """PatternScanner.scan, counting every position as one evaluation per rule"""
+        start = time.perf_counter()
+        hits = scanner.scan(text)
+        self.pattern_scan_time += time.perf_counter() - start
+        self.pattern_scans += 1
+        for rule in scanner.rules:
+            self.stats_for(rule).evaluations += len(text)
+        for rules in hits.values():
+            for rule in rules:
+                self.stats_for(rule).matches += 1
+        return hits
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'rules': [stats.to_dict() for stats in self.stats.values()],
+            'pattern_scans': self.pattern_scans,
+            'pattern_scan_time': self.pattern_scan_time,
+        }
+    
+    def report(self, fmt: str = 'table') -> str:
+        """
+        'table': rules by condition time, slowest first, then the rules that
+        never matched; 'json': to_dict() as JSON
+        """
+        if fmt == 'json':
+            return json.dumps(self.to_dict(), indent=2, ensure_ascii=False)
+        if fmt != 'table':
+            raise ValueError(f"Unknown report format: {fmt!r}")
+        
+        rows = sorted(self.stats.values(), key=lambda s: s.condition_time, reverse=True)
+        total_time = sum(s.condition_time for s in rows) or 1.0
+        lines = [f"{'rule':<22} {'category':<13} {'evals':>9} {'matches':>8} {'rate':>6} "
+                 f"{'time ms':>9} {'share':>6} {'ns/eval':>8} {'suppr':>6} {'shadow':>6}"]
+        for s in rows:
+            per_eval = s.condition_time / s.evaluations * 1e9 if s.evaluations else 0.0
+            lines.append(f"{s.name:<22} {s.category:<13} {s.evaluations:>9} {s.matches:>8} "
+                         f"{s.match_rate:>6.1%} {s.condition_time * 1e3:>9.2f} "
+                         f"{s.condition_time / total_time:>6.1%} {per_eval:>8.0f} "
+                         f"{s.suppressed:>6} {s.shadowed:>6}")
+        if self.pattern_scans:
+            lines.append(f"Pattern scanner: {self.pattern_scans} scans, "
+                         f"{self.pattern_scan_time * 1e3:.2f} ms")
+        never = [s.name for s in rows if s.evaluations and not s.matches]
+        if never:
+            lines.append(f"Never matched: {', '.join(never)}")
+        return '\n'.join(lines)
+
+
+def quran_csv_words(csv_path: str = "archive/The Quran Dataset.csv") -> List[str]:
+    """Distinct words from the list_of_words column of the Quran CSV"""
+    words = {}
+    with open(csv_path, encoding='utf-8', newline='') as f:
+        for row in csv.DictReader(f):
+            for word in row['list_of_words'].strip('[]').split(','):
+                words.setdefault(word.strip(), None)
+    return [word for word in words if word]
+
+
+# ==================== RULE TABLES ====================
+
+# Letter groups, sifa matrix, priorities, conflicts and rules per qiraat,
+# as rules/<qiraat>.json; qiraat without a table of their own use Hafs
+RULES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'rules')
+RULE_CACHE_DIR = os.path.join(RULES_DIR, '__cache__')
+RULE_CACHE_FORMAT = 1
+
+
+def rule_table_path(qiraat: str = "hafs") -> str:
+    path = os.path.join(RULES_DIR, f"{qiraat}.json")
+    if not os.path.exists(path):
+        path = os.path.join(RULES_DIR, "hafs.json")
+    return path
+
+
+def load_rule_table(qiraat: str = "hafs") -> Tuple[Dict[str, Any], str]:
+    """(rule table, sha256 of the file contents) for a qiraat"""
+    with open(rule_table_path(qiraat), 'rb') as f:
+        data = f.read()
+    return json.loads(data.decode('utf-8')), hashlib.sha256(data).hexdigest()
 
 
 # ==================== MAIN GENERIC CLASS ====================
@@ -230,13 +845,17 @@ class GenericQuranPhoneticScript:
     A completely generic system for applying ALL Tajweed rules to ANY Quranic text
     """
     
-    def __init__(self, qiraat: str = "hafs"):
+    def __init__(self, qiraat: str = "hafs", word_cache_size: int = 32768):
         self.qiraat = qiraat
+        self.word_cache = WordRuleCache(word_cache_size)
+        self.profiler: Optional[RuleProfiler] = None
+        self.rule_table, self.rule_table_hash = load_rule_table(qiraat)
         self._init_phoneme_mappings()
         self._init_sifa_matrix()
-        self._init_tajweed_rules()
         self._init_letter_properties()
+        self._init_tajweed_rules()
         self._init_rule_dependencies()
+        self._init_rule_dispatch(use_cache=True)
         
     def _init_phoneme_mappings(self):
         """Initialize complete phoneme mapping system"""
@@ -303,95 +922,23 @@ class GenericQuranPhoneticScript:
     
     def _init_sifa_matrix(self):
         """Initialize the complete Sifa attributes matrix"""
+        # Format: [Hams/Jahr, Shiddah/Rikhwa/Tawassut, Isti'la/Istifal, Itbaq/Infitah, Special]
         self.sifa_matrix = {
-            # Format: [Hams/Jahr, Shiddah/Rikhwa/Tawassut, Isti'la/Istifal, Itbaq/Infitah, Special]
-            'ء': ['J', 'S', 'L', 'O', ''],
-            'ب': ['J', 'R', 'L', 'O', 'Qalqalah,Shafawi'],
-            'ت': ['H', 'S', 'L', 'O', ''],
-            'ث': ['H', 'R', 'L', 'O', ''],
-            'ج': ['J', 'S', 'L', 'O', 'Qalqalah'],
-            'ح': ['H', 'R', 'L', 'O', ''],
-            'خ': ['H', 'R', 'I', 'O', ''],
-            'د': ['J', 'S', 'L', 'O', 'Qalqalah'],
-            'ذ': ['J', 'R', 'L', 'O', ''],
-            'ر': ['J', 'T', 'L', 'O', 'Takreer,Inhiraf'],
-            'ز': ['J', 'R', 'L', 'O', 'Safeer'],
-            'س': ['H', 'R', 'L', 'O', 'Safeer'],
-            'ش': ['H', 'R', 'L', 'O', ''],
-            'ص': ['J', 'R', 'I', 'B', 'Safeer'],
-            'ض': ['J', 'R', 'I', 'B', ''],
-            'ط': ['J', 'S', 'I', 'B', 'Qalqalah'],
-            'ظ': ['J', 'R', 'I', 'B', ''],
-            'ع': ['J', 'T', 'L', 'O', ''],
-            'غ': ['J', 'R', 'I', 'O', ''],
-            'ف': ['J', 'R', 'L', 'O', 'Shafawi'],
-            'ق': ['J', 'S', 'I', 'O', 'Qalqalah'],
-            'ك': ['H', 'S', 'L', 'O', ''],
-            'ل': ['J', 'R', 'L', 'O', 'Inhiraf'],
-            'م': ['J', 'R', 'L', 'O', 'Shafawi,Ghunnah'],
-            'ن': ['J', 'T', 'L', 'O', 'Inhiraf,Ghunnah'],
-            'ه': ['H', 'R', 'L', 'O', ''],
-            'و': ['J', 'R', 'L', 'O', 'Ghunnah'],
-            'ي': ['J', 'R', 'L', 'O', ''],
+            letter: list(sifa) for letter, sifa in self.rule_table['sifa_matrix'].items()
         }
     
     def _init_letter_properties(self):
         """Initialize various letter groupings for rule application"""
-        
-        # Throat letters (for Izhaar)
-        self.throat_letters = 'ءهعحغخ'
-        
-        # Letters for Idgham with Ghunnah
-        self.idgham_bi_ghunnah = 'يومون'
-        
-        # Letters for Idgham without Ghunnah
-        self.idgham_bila_ghunnah = 'رل'
-        
-        # Iqlab letter
-        self.iqlab_letter = 'ب'
-        
-        # Ikhfaa letters
-        self.ikhfaa_letters = 'صضطظسشثدذز'
-        
-        # Qalqalah letters
-        self.qalqalah_letters = 'قطبد'
-        
-        # Always heavy letters
-        self.always_heavy = 'خصضغظقط'
-        
-        # Shamsi letters (Sun letters)
-        self.shamsi_letters = 'تثدذرزسشصضطظلن'
-        
-        # Qamari letters (Moon letters)
-        self.qamari_letters = 'ءبغحجفكوهي'
-        
-        # Madd letters
-        self.madd_letters = {'ا': 'ā', 'و': 'ū', 'ي': 'ī'}
-        
-        # Ghunnah letters
-        self.ghunnah_letters = 'نوم'
-        
-        # Shafawi letters
-        self.shafawi_letters = 'فمب'
-        
-        # Safeer letters (whistling)
-        self.safeer_letters = 'صسز'
-        
-        # Takreer letter
-        self.takreer_letter = 'ر'
-        
-        # Inhiraf letters
-        self.inhiraf_letters = 'لر'
-        
-        # Hams letters
-        self.hams_letters = 'فحثهسشكخت'
-        
-        # Jahr letters (opposite of Hams)
-        self.jahr_letters = 'ءبجدذرزصضطظعغقلمنوهي'
+        # throat_letters, ikhfaa_letters, shamsi_letters, madd_letters, ...
+        for name, letters in self.rule_table['letter_groups'].items():
+            setattr(self, name, dict(letters) if isinstance(letters, dict) else letters)
+        self.madd_chars = ''.join(self.madd_letters)
     
     def _init_tajweed_rules(self):
-        """Initialize all Tajweed rules with conditions and effects"""
-        self.tajweed_rules = []
+        """
+        Build the Tajweed rules from the rule table. Conditions are code, so
+        they are defined here and referenced by name from the table entries.
+        """
         
         # ========== 1. NOON SAKINAH AND TANWEEN RULES ==========
         
@@ -403,16 +950,6 @@ class GenericQuranPhoneticScript:
             return (current in ['ن', 'ً', 'ٍ', 'ٌ'] and 
                     pos + 1 < len(text) and text[pos + 1] in self.throat_letters)
         
-        self.tajweed_rules.append(TajweedRule(
-            name="izhaar_halqi",
-            category=TajweedRuleCategory.IZHAAR,
-            pattern="",
-            sifa_output=SifaAttributes.IZHAAR.value,
-            duration=1,
-            description="Clear pronunciation of noon sakinah/tanween before throat letters",
-            condition_func=izhaar_condition
-        ))
-        
         def idgham_bi_ghunnah_condition(text: str, pos: int, ctx: Dict) -> bool:
             if pos + 1 >= len(text):
                 return False
@@ -421,16 +958,6 @@ class GenericQuranPhoneticScript:
             return (current in ['ن', 'ً', 'ٍ', 'ٌ'] and 
                     next_char in self.idgham_bi_ghunnah)
         
-        self.tajweed_rules.append(TajweedRule(
-            name="idgham_bi_ghunnah",
-            category=TajweedRuleCategory.IDGHAM,
-            pattern="",
-            sifa_output=SifaAttributes.IDGHAM.value + SifaAttributes.GUNNAH.value,
-            duration=2,
-            description="Merging with nasalization",
-            condition_func=idgham_bi_ghunnah_condition
-        ))
-        
         def idgham_bila_ghunnah_condition(text: str, pos: int, ctx: Dict) -> bool:
             if pos + 1 >= len(text):
                 return False
@@ -439,16 +966,6 @@ class GenericQuranPhoneticScript:
             return (current in ['ن', 'ً', 'ٍ', 'ٌ'] and 
                     next_char in self.idgham_bila_ghunnah)
         
-        self.tajweed_rules.append(TajweedRule(
-            name="idgham_bila_ghunnah",
-            category=TajweedRuleCategory.IDGHAM,
-            pattern="",
-            sifa_output=SifaAttributes.IDGHAM.value,
-            duration=1,
-            description="Merging without nasalization",
-            condition_func=idgham_bila_ghunnah_condition
-        ))
-        
         def iqlab_condition(text: str, pos: int, ctx: Dict) -> bool:
             if pos + 1 >= len(text):
                 return False
@@ -457,16 +974,6 @@ class GenericQuranPhoneticScript:
             return (current in ['ن', 'ً', 'ٍ', 'ٌ'] and 
                     next_char == self.iqlab_letter)
         
-        self.tajweed_rules.append(TajweedRule(
-            name="iqlab",
-            category=TajweedRuleCategory.IQLAB,
-            pattern="",
-            sifa_output=SifaAttributes.IQLAB.value + SifaAttributes.GUNNAH.value,
-            duration=2,
-            description="Conversion of noon to meem",
-            condition_func=iqlab_condition
-        ))
-        
         def ikhfaa_condition(text: str, pos: int, ctx: Dict) -> bool:
             if pos + 1 >= len(text):
                 return False
@@ -475,16 +982,6 @@ class GenericQuranPhoneticScript:
             return (current in ['ن', 'ً', 'ٍ', 'ٌ'] and 
                     next_char in self.ikhfaa_letters)
         
-        self.tajweed_rules.append(TajweedRule(
-            name="ikhfaa",
-            category=TajweedRuleCategory.IKHFAA,
-            pattern="",
-            sifa_output=SifaAttributes.IKHFAA.value + SifaAttributes.GUNNAH.value,
-            duration=2,
-            description="Concealment of noon",
-            condition_func=ikhfaa_condition
-        ))
-        
         # ========== 2. MEEM SAKINAH RULES ==========
         
         def ikhfaa_shafawi_condition(text: str, pos: int, ctx: Dict) -> bool:
@@ -494,16 +991,6 @@ class GenericQuranPhoneticScript:
                     pos + 1 < len(text) and text[pos + 1] == 'ْ' and
                     pos + 2 < len(text) and text[pos + 2] == 'ب')
         
-        self.tajweed_rules.append(TajweedRule(
-            name="ikhfaa_shafawi",
-            category=TajweedRuleCategory.IKHFAA,
-            pattern="",
-            sifa_output=SifaAttributes.IKHFAA.value + SifaAttributes.SHAFWI.value,
-            duration=2,
-            description="Labial concealment",
-            condition_func=ikhfaa_shafawi_condition
-        ))
-        
         def idgham_shafawi_condition(text: str, pos: int, ctx: Dict) -> bool:
             if pos + 2 >= len(text):
                 return False
@@ -511,16 +998,6 @@ class GenericQuranPhoneticScript:
                     pos + 1 < len(text) and text[pos + 1] == 'ْ' and
                     pos + 2 < len(text) and text[pos + 2] == 'م')
         
-        self.tajweed_rules.append(TajweedRule(
-            name="idgham_shafawi",
-            category=TajweedRuleCategory.IDGHAM,
-            pattern="",
-            sifa_output=SifaAttributes.IDGHAM.value + SifaAttributes.SHAFWI.value,
-            duration=2,
-            description="Labial merging",
-            condition_func=idgham_shafawi_condition
-        ))
-        
         def izhaar_shafawi_condition(text: str, pos: int, ctx: Dict) -> bool:
             if pos + 2 >= len(text):
                 return False
@@ -528,54 +1005,25 @@ class GenericQuranPhoneticScript:
                     pos + 1 < len(text) and text[pos + 1] == 'ْ' and
                     pos + 2 < len(text) and text[pos + 2] not in ['ب', 'م'])
         
-        self.tajweed_rules.append(TajweedRule(
-            name="izhaar_shafawi",
-            category=TajweedRuleCategory.IZHAAR,
-            pattern="",
-            sifa_output=SifaAttributes.IZHAAR.value + SifaAttributes.SHAFWI.value,
-            duration=1,
-            description="Labial clarity",
-            condition_func=izhaar_shafawi_condition
-        ))
-        
         # ========== 3. LAM DEFINITE RULES ==========
-        def remove_tashkeel(text):
-            tashkeel = re.compile(r'[\u0617-\u061A\u064B-\u0652]')
-            return re.sub(tashkeel, '', text)
-                
+        
         def lam_shamsiyyah_condition(text: str, pos: int, ctx: Dict) -> bool:
-            text_no_tashkeel = remove_tashkeel(text)
-            if pos < 1 or pos + 2 >= len(text_no_tashkeel):
+            if pos >= len(text) or text[pos] != 'ل':
                 return False
-            return (text_no_tashkeel[pos - 1] == 'ا' and text_no_tashkeel[pos] == 'ل' and
-                    text_no_tashkeel[pos + 2] in self.shamsi_letters)
-        
-        self.tajweed_rules.append(TajweedRule(
-            name="lam_shamsiyyah",
-            category=TajweedRuleCategory.LAM_DEFINITE,
-            pattern="",
-            sifa_output=SifaAttributes.IDGHAM.value,
-            duration=2,
-            description="Sun letters - lam is assimilated",
-            condition_func=lam_shamsiyyah_condition
-        ))
+            view = VerseView.of(text)
+            i = view.raw_to_stripped[pos]
+            if i < 1 or i + 2 >= len(view.stripped):
+                return False
+            return view.stripped[i - 1] == 'ا' and view.stripped[i + 2] in self.shamsi_letters
         
         def lam_qamariyyah_condition(text: str, pos: int, ctx: Dict) -> bool:
-            text_no_tashkeel = remove_tashkeel(text)
-            if pos < 1 or pos + 2 >= len(text_no_tashkeel):
+            if pos >= len(text) or text[pos] != 'ل':
+                return False
+            view = VerseView.of(text)
+            i = view.raw_to_stripped[pos]
+            if i < 1 or i + 2 >= len(view.stripped):
                 return False
-            return (text_no_tashkeel[pos - 1] == 'ا' and text_no_tashkeel[pos] == 'ل' and
-                    text_no_tashkeel[pos + 2] in self.qamari_letters)
-        
-        self.tajweed_rules.append(TajweedRule(
-            name="lam_qamariyyah",
-            category=TajweedRuleCategory.LAM_DEFINITE,
-            pattern="",
-            sifa_output=SifaAttributes.IZHAAR.value,
-            duration=1,
-            description="Moon letters - lam is clear",
-            condition_func=lam_qamariyyah_condition
-        ))
+            return view.stripped[i - 1] == 'ا' and view.stripped[i + 2] in self.qamari_letters
         
         # ========== 4. MADD RULES ==========
         
@@ -594,16 +1042,6 @@ class GenericQuranPhoneticScript:
                     return False
             return True
         
-        self.tajweed_rules.append(TajweedRule(
-            name="madd_tabii",
-            category=TajweedRuleCategory.MADD,
-            pattern="",
-            sifa_output=SifaAttributes.DUR_2.value,
-            duration=2,
-            description="Natural elongation - 2 counts",
-            condition_func=madd_tabii_condition
-        ))
-        
         def madd_wajib_muttasil_condition(text: str, pos: int, ctx: Dict) -> bool:
             if pos + 1 >= len(text):
                 return False
@@ -611,16 +1049,6 @@ class GenericQuranPhoneticScript:
             next_char = text[pos + 1]
             return char in self.madd_letters and next_char == 'ء'
         
-        self.tajweed_rules.append(TajweedRule(
-            name="madd_wajib_muttasil",
-            category=TajweedRuleCategory.MADD,
-            pattern="",
-            sifa_output=SifaAttributes.DUR_5.value,
-            duration=5,
-            description="Required connected madd - 4-5 counts",
-            condition_func=madd_wajib_muttasil_condition
-        ))
-        
         def madd_jaiz_munfasil_condition(text: str, pos: int, ctx: Dict) -> bool:
             if pos + 2 >= len(text):
                 return False
@@ -629,16 +1057,6 @@ class GenericQuranPhoneticScript:
                     text[pos + 1].isspace() and 
                     text[pos + 2] == 'ء')
         
-        self.tajweed_rules.append(TajweedRule(
-            name="madd_jaiz_munfasil",
-            category=TajweedRuleCategory.MADD,
-            pattern="",
-            sifa_output=SifaAttributes.DUR_4.value,
-            duration=4,
-            description="Permitted separate madd - 4-5 counts",
-            condition_func=madd_jaiz_munfasil_condition
-        ))
-        
         def madd_lazim_condition(text: str, pos: int, ctx: Dict) -> bool:
             if pos + 2 >= len(text):
                 return False
@@ -646,16 +1064,6 @@ class GenericQuranPhoneticScript:
             return (char in self.madd_letters and 
                     text[pos + 2] == 'ّ')
         
-        self.tajweed_rules.append(TajweedRule(
-            name="madd_lazim",
-            category=TajweedRuleCategory.MADD,
-            pattern="",
-            sifa_output=SifaAttributes.DUR_6.value,
-            duration=6,
-            description="Necessary heavy madd - 6 counts",
-            condition_func=madd_lazim_condition
-        ))
-        
         def madd_lin_condition(text: str, pos: int, ctx: Dict) -> bool:
             if pos + 2 >= len(text):
                 return False
@@ -664,16 +1072,6 @@ class GenericQuranPhoneticScript:
                     pos + 1 < len(text) and text[pos + 1] == 'ْ' and
                     text[pos + 2] not in self.madd_letters)
         
-        self.tajweed_rules.append(TajweedRule(
-            name="madd_lin",
-            category=TajweedRuleCategory.MADD,
-            pattern="",
-            sifa_output=SifaAttributes.DUR_4.value,
-            duration=4,
-            description="Lin madd - 2-4-6 counts depending on context",
-            condition_func=madd_lin_condition
-        ))
-        
         # ========== 5. QALQALAH RULES ==========
         
         def qalqalah_kubra_condition(text: str, pos: int, ctx: Dict) -> bool:
@@ -684,16 +1082,6 @@ class GenericQuranPhoneticScript:
                     pos + 1 < len(text) and text[pos + 1] == 'ْ' and
                     (pos + 2 >= len(text) or text[pos + 2].isspace()))
         
-        self.tajweed_rules.append(TajweedRule(
-            name="qalqalah_kubra",
-            category=TajweedRuleCategory.QALQALAH,
-            pattern="",
-            sifa_output=SifaAttributes.QALQALAH.value + '!',
-            duration=2,
-            description="Major echo - at stop",
-            condition_func=qalqalah_kubra_condition
-        ))
-        
         def qalqalah_wusta_condition(text: str, pos: int, ctx: Dict) -> bool:
             if pos + 2 >= len(text):
                 return False
@@ -702,16 +1090,6 @@ class GenericQuranPhoneticScript:
                     pos + 1 < len(text) and text[pos + 1] == 'ْ' and
                     pos + 2 < len(text) and not text[pos + 2].isspace())
         
-        self.tajweed_rules.append(TajweedRule(
-            name="qalqalah_wusta",
-            category=TajweedRuleCategory.QALQALAH,
-            pattern="",
-            sifa_output=SifaAttributes.QALQALAH.value,
-            duration=1,
-            description="Medium echo - within word",
-            condition_func=qalqalah_wusta_condition
-        ))
-        
         # ========== 6. TAFKHIM AND TARQEEQ RULES ==========
         
         def tafkhim_daim_condition(text: str, pos: int, ctx: Dict) -> bool:
@@ -719,16 +1097,6 @@ class GenericQuranPhoneticScript:
                 return False
             return text[pos] in self.always_heavy
         
-        self.tajweed_rules.append(TajweedRule(
-            name="tafkhim_daim",
-            category=TajweedRuleCategory.TAFKHIM,
-            pattern="",
-            sifa_output=SifaAttributes.TAFKHIM.value,
-            duration=1,
-            description="Always heavy letters",
-            condition_func=tafkhim_daim_condition
-        ))
-        
         def tafkhim_ra_condition(text: str, pos: int, ctx: Dict) -> bool:
             if pos >= len(text) or text[pos] != 'ر':
                 return False
@@ -747,16 +1115,6 @@ class GenericQuranPhoneticScript:
             
             return False
         
-        self.tajweed_rules.append(TajweedRule(
-            name="tafkhim_ra",
-            category=TajweedRuleCategory.TAFKHIM,
-            pattern="",
-            sifa_output=SifaAttributes.TAFKHIM.value,
-            duration=1,
-            description="Heavy ra",
-            condition_func=tafkhim_ra_condition
-        ))
-        
         def tarqeeq_ra_condition(text: str, pos: int, ctx: Dict) -> bool:
             if pos >= len(text) or text[pos] != 'ر':
                 return False
@@ -775,32 +1133,12 @@ class GenericQuranPhoneticScript:
             
             return False
         
-        self.tajweed_rules.append(TajweedRule(
-            name="tarqeeq_ra",
-            category=TajweedRuleCategory.TARQEEQ,
-            pattern="",
-            sifa_output=SifaAttributes.TARQEEQ.value,
-            duration=1,
-            description="Light ra",
-            condition_func=tarqeeq_ra_condition
-        ))
-        
         def tafkhim_lam_allah_condition(text: str, pos: int, ctx: Dict) -> bool:
             if pos + 2 >= len(text) or text[pos] != 'ل':
                 return False
             # Check for Allah word
             return (text[pos:pos+3] in ['لَّه', 'لَٰه', 'لَّه'])
         
-        self.tajweed_rules.append(TajweedRule(
-            name="tafkhim_lam_allah",
-            category=TajweedRuleCategory.TAFKHIM,
-            pattern="",
-            sifa_output=SifaAttributes.TAFKHIM.value,
-            duration=1,
-            description="Heavy lam in Allah",
-            condition_func=tafkhim_lam_allah_condition
-        ))
-        
         # ========== 7. GHUNNAH RULES ==========
         
         def ghunnah_mushaddad_condition(text: str, pos: int, ctx: Dict) -> bool:
@@ -809,16 +1147,6 @@ class GenericQuranPhoneticScript:
             return (text[pos] in self.ghunnah_letters and 
                     text[pos + 1] == 'ّ')
         
-        self.tajweed_rules.append(TajweedRule(
-            name="ghunnah_mushaddad",
-            category=TajweedRuleCategory.GUNNAH,
-            pattern="",
-            sifa_output=SifaAttributes.GUNNAH.value + 'ː',
-            duration=3,
-            description="Nasalization with shadda",
-            condition_func=ghunnah_mushaddad_condition
-        ))
-        
         # ========== 8. ADDITIONAL SIFA RULES ==========
         
         # def hams_condition(text: str, pos: int, ctx: Dict) -> bool:
@@ -826,165 +1154,336 @@ class GenericQuranPhoneticScript:
         #         return False
         #     return text[pos] in self.hams_letters
         
-        # self.tajweed_rules.append(TajweedRule(
-        #     name="hams",
-        #     category=TajweedRuleCategory.HAMS,
-        #     pattern="",
-        #     sifa_output=SifaAttributes.HAMS.value,
-        #     duration=1,
-        #     description="Whispered articulation",
-        #     condition_func=hams_condition
-        # ))
-        
         # def jahr_condition(text: str, pos: int, ctx: Dict) -> bool:
         #     if pos >= len(text):
         #         return False
         #     return text[pos] in self.jahr_letters
         
-        # self.tajweed_rules.append(TajweedRule(
-        #     name="jahr",
-        #     category=TajweedRuleCategory.JAHR,
-        #     pattern="",
-        #     sifa_output=SifaAttributes.JAHR.value,
-        #     duration=1,
-        #     description="Voiced articulation",
-        #     condition_func=jahr_condition
-        # ))
-        
         # def safeer_condition(text: str, pos: int, ctx: Dict) -> bool:
         #     if pos >= len(text):
         #         return False
         #     return text[pos] in self.safeer_letters
         
-        # self.tajweed_rules.append(TajweedRule(
-        #     name="safeer",
-        #     category=TajweedRuleCategory.SAFEER,
-        #     pattern="",
-        #     sifa_output=SifaAttributes.SAFEER.value,
-        #     duration=1,
-        #     description="Whistling sound",
-        #     condition_func=safeer_condition
-        # ))
+        conditions = {
+            'izhaar': izhaar_condition,
+            'idgham_bi_ghunnah': idgham_bi_ghunnah_condition,
+            'idgham_bila_ghunnah': idgham_bila_ghunnah_condition,
+            'iqlab': iqlab_condition,
+            'ikhfaa': ikhfaa_condition,
+            'ikhfaa_shafawi': ikhfaa_shafawi_condition,
+            'idgham_shafawi': idgham_shafawi_condition,
+            'izhaar_shafawi': izhaar_shafawi_condition,
+            'lam_shamsiyyah': lam_shamsiyyah_condition,
+            'lam_qamariyyah': lam_qamariyyah_condition,
+            'madd_tabii': madd_tabii_condition,
+            'madd_wajib_muttasil': madd_wajib_muttasil_condition,
+            'madd_jaiz_munfasil': madd_jaiz_munfasil_condition,
+            'madd_lazim': madd_lazim_condition,
+            'madd_lin': madd_lin_condition,
+            'qalqalah_kubra': qalqalah_kubra_condition,
+            'qalqalah_wusta': qalqalah_wusta_condition,
+            'tafkhim_daim': tafkhim_daim_condition,
+            'tafkhim_ra': tafkhim_ra_condition,
+            'tarqeeq_ra': tarqeeq_ra_condition,
+            'tafkhim_lam_allah': tafkhim_lam_allah_condition,
+            'ghunnah_mushaddad': ghunnah_mushaddad_condition,
+        }
+        self.tajweed_rules = [self._build_rule(entry, conditions)
+                              for entry in self.rule_table['rules']]
+    
+    def _build_rule(self, entry: Dict[str, Any], conditions: Dict[str, callable]) -> TajweedRule:
+        """TajweedRule from a rule table entry"""
+        condition = entry.get('condition')
+        if condition is not None and condition not in conditions:
+            raise ValueError(f"Rule {entry['name']!r} uses unknown condition {condition!r}")
+        
+        # Triggers are given literally or as the name of a letter group
+        triggers = entry.get('triggers', '')
+        if 'trigger_group' in entry:
+            triggers = ''.join(getattr(self, entry['trigger_group']))
+        
+        return TajweedRule(
+            name=entry['name'],
+            category=TajweedRuleCategory(entry['category']),
+            pattern=entry.get('pattern', ''),
+            sifa_output=entry['sifa_output'],
+            duration=entry.get('duration', 1),
+            description=entry.get('description', ''),
+            condition_func=conditions.get(condition),
+            triggers=triggers,
+            lookbehind=entry.get('lookbehind', 2),
+            lookahead=entry.get('lookahead', 2),
+            stripped_lookbehind=entry.get('stripped_lookbehind', 0),
+            stripped_lookahead=entry.get('stripped_lookahead')
+        )
     
     def _init_rule_dependencies(self):
         """Initialize rule dependencies and conflict resolution"""
+        # Higher number = higher priority
         self.rule_priority = {
-            # Higher number = higher priority
-            TajweedRuleCategory.MADD: 100,
-            TajweedRuleCategory.NOON_SAKINAH: 90,
-            TajweedRuleCategory.MEEM_SAKINAH: 90,
-            TajweedRuleCategory.IQLAB: 85,
-            TajweedRuleCategory.IDGHAM: 80,
-            TajweedRuleCategory.IKHFAA: 75,
-            TajweedRuleCategory.IZHAAR: 70,
-            TajweedRuleCategory.QALQALAH: 60,
-            TajweedRuleCategory.GUNNAH: 50,
-            TajweedRuleCategory.TAFKHIM: 40,
-            TajweedRuleCategory.TARQEEQ: 40,
-            TajweedRuleCategory.LAM_DEFINITE: 30,
-            TajweedRuleCategory.HAMS: 20,
-            TajweedRuleCategory.JAHR: 20,
+            TajweedRuleCategory(category): priority
+            for category, priority in self.rule_table['rule_priority'].items()
         }
-        
         self.rule_conflicts = {
-            'idgham_bi_ghunnah': ['izhaar_halqi', 'ikhfaa'],
-            'idgham_bila_ghunnah': ['izhaar_halqi', 'ikhfaa'],
-            'iqlab': ['izhaar_halqi', 'ikhfaa', 'idgham'],
-            'ikhfaa': ['izhaar_halqi', 'idgham'],
+            name: list(conflicts) for name, conflicts in self.rule_table['rule_conflicts'].items()
         }
     
-    def normalize_arabic(self, text: str) -> str:
-        """Normalize Arabic text for consistent processing"""
-        # Remove tatweel (kashida)
-        text = re.sub(r'[ـ]', '', text)
-        
-        # Normalize alif variants
-        text = re.sub(r'[إأٱآ]', 'ا', text)
-        
-        # Normalize ta marbuta
-        text = re.sub(r'ة', 'ه', text)
-        
-        return text
+    def _init_rule_dispatch(self, use_cache: bool = False):
+        """
+        Index rules by the characters they can fire on, so each position only
+        evaluates its candidate rules. Rules without triggers (e.g. the lam
+        definite rules, which look at the tashkeel-stripped text) are candidates
+        everywhere. Call again after changing self.tajweed_rules.
+        use_cache: load the compiled form from RULE_CACHE_DIR when it matches
+        the rule table, and save it there after building it
+        """
+        compiled = self._load_compiled_rules() if use_cache else None
+        if compiled is None:
+            compiled = self._compile_rules()
+            if use_cache:
+                self._save_compiled_rules(compiled)
+        
+        self.word_cache.clear()
+        rules = self.tajweed_rules
+        
+        # Pattern rules are found for the whole text at once by the scanner
+        self.pattern_rules = [rules[i] for i in compiled['patterns']]
+        self.pattern_scanner = PatternScanner(self.pattern_rules) if self.pattern_rules else None
+        self._rule_rank = {id(r): i for i, r in enumerate(rules)}
+        
+        self.unindexed_rules = [rules[i] for i in compiled['unindexed']]
+        self.rule_dispatch = {
+            char: [rules[i] for i in indices] for char, indices in compiled['dispatch'].items()
+        }
+        self._init_rule_resolution(compiled['conflicts'])
+    
+    def _init_rule_resolution(self, conflicts: List[List[int]]):
+        """
+        Compile priorities and conflicts into bit operations. Rules get one
+        bit each in resolution order (priority, then rule order), so the set
+        bits of a match mask, lowest first, are the order resolve_rules()
+        tries them in. Each rule also has the mask of rules that suppress it
+        and the bit of its category, for the one-rule-per-category check.
+        """
+        rules = self.tajweed_rules
+        order = sorted(range(len(rules)),
+                       key=lambda i: -self.rule_priority.get(rules[i].category, 0))
+        self.resolution_order = [rules[i] for i in order]
+        
+        bit_of = [0] * len(rules)
+        for k, i in enumerate(order):
+            bit_of[i] = 1 << k
+        self._rule_bits = {id(rule): bit_of[i] for i, rule in enumerate(rules)}
+        
+        category_ids = {}
+        self._conflict_masks = []
+        self._category_bits = []
+        for i in order:
+            mask = 0
+            for j in conflicts[i]:
+                mask |= bit_of[j]
+            self._conflict_masks.append(mask)
+            category = rules[i].category
+            self._category_bits.append(1 << category_ids.setdefault(category, len(category_ids)))
+    
+    def rule_mask(self, rules: Iterable[TajweedRule]) -> int:
+        """Match mask for resolve_mask()"""
+        mask = 0
+        for rule in rules:
+            mask |= self._rule_bits[id(rule)]
+        return mask
+    
+    def _compiled_rules_source(self) -> Dict[str, Any]:
+        """What the compiled form is derived from, to validate a cached copy"""
+        return {
+            'rules': [[r.name, r.triggers, bool(r.condition_func), r.is_pattern_rule]
+                      for r in self.tajweed_rules],
+            'conflicts': self.rule_conflicts,
+        }
+    
+    def _compile_rules(self) -> Dict[str, Any]:
+        """
+        Dispatch index, pattern rules and conflict matrix as rule indices,
+        in a JSON-serialisable form
+        """
+        rules = self.tajweed_rules
+        condition_ids = [i for i, r in enumerate(rules) if r.condition_func]
+        trigger_chars = sorted(set(''.join(rules[i].triggers for i in condition_ids)))
+        rule_ids = {r.name: i for i, r in enumerate(rules)}
+        
+        return {
+            'format': RULE_CACHE_FORMAT,
+            'table_hash': self.rule_table_hash,
+            'source': self._compiled_rules_source(),
+            'patterns': [i for i, r in enumerate(rules) if r.is_pattern_rule],
+            'unindexed': [i for i in condition_ids if not rules[i].triggers],
+            # Each bucket keeps the original rule order so priority ties resolve as before
+            'dispatch': {
+                char: [i for i in condition_ids
+                       if not rules[i].triggers or char in rules[i].triggers]
+                for char in trigger_chars
+            },
+            # Rule index -> indices of the rules that suppress it once applied
+            'conflicts': [
+                sorted(rule_ids[c] for c in self.rule_conflicts.get(r.name, []) if c in rule_ids)
+                for r in rules
+            ],
+        }
+    
+    def _compiled_rules_path(self) -> str:
+        return os.path.join(RULE_CACHE_DIR,
+                            f"{self.qiraat}.{self.rule_table_hash[:16]}.json")
+    
+    def _load_compiled_rules(self) -> Optional[Dict[str, Any]]:
+        """Cached compiled form, or None when missing or stale"""
+        try:
+            with open(self._compiled_rules_path(), encoding='utf-8') as f:
+                compiled = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if (compiled.get('format') != RULE_CACHE_FORMAT or
+                compiled.get('table_hash') != self.rule_table_hash or
+                compiled.get('source') != self._compiled_rules_source()):
+            return None
+        return compiled
+    
+    def _save_compiled_rules(self, compiled: Dict[str, Any]) -> None:
+        # Best effort: a read-only install just rebuilds on every start
+        path = self._compiled_rules_path()
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(RULE_CACHE_DIR, exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(compiled, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError:
+            pass
+    
+    def candidate_rules(self, char: str) -> List[TajweedRule]:
+        """Condition rules that can match at a position holding `char`"""
+        return self.rule_dispatch.get(char, self.unindexed_rules)
+    
+    def scan_patterns(self, text: str) -> Dict[int, List[TajweedRule]]:
+        """Position -> matching pattern rules, for the whole text in one scan"""
+        if self.pattern_scanner is None:
+            return {}
+        if self.profiler is not None:
+            return self.profiler.scan(self.pattern_scanner, text)
+        return self.pattern_scanner.scan(text)
+    
+    def in_rule_order(self, rules: List[TajweedRule]) -> List[TajweedRule]:
+        """Sort rules back into self.tajweed_rules order"""
+        return sorted(rules, key=lambda r: self._rule_rank[id(r)])
+    
+    def normalize_arabic(self, text: str, marks: str = ENGINE_MARKS) -> str:
+        """
+        Normalize Arabic text for consistent processing: remove tatweel,
+        normalize alif variants and ta marbuta and drop Uthmani marks.
+        marks='keep' or 'pause' keeps some or all of them (see
+        ArabicCanonicalizer).
+        """
+        return get_canonicalizer(marks=marks)(text)
+    
+    def canonical_verse(self, text: str) -> CanonicalText:
+        """
+        The text process_text matches: unnormalized, without Uthmani marks,
+        with offsets back to text for reporting positions
+        """
+        return get_canonicalizer(normalize=False, marks=ENGINE_MARKS).canonicalize(text)
     
     def get_letter_context(self, text: str, pos: int, window: int = 3) -> Dict[str, Any]:
         """Get contextual information around a position"""
-        context = {
-            'current': text[pos] if pos < len(text) else '',
-            'prev': text[pos - 1] if pos > 0 else '',
-            'next': text[pos + 1] if pos + 1 < len(text) else '',
-            'prev_prev': text[pos - 2] if pos > 1 else '',
-            'next_next': text[pos + 2] if pos + 2 < len(text) else '',
-            'is_word_start': pos == 0 or text[pos - 1].isspace(),
-            'is_word_end': pos == len(text) - 1 or (pos + 1 < len(text) and text[pos + 1].isspace()),
-            'is_verse_end': pos == len(text) - 1,
-            'has_sukun': pos + 1 < len(text) and text[pos + 1] == 'ْ',
-            'has_shadda': pos + 1 < len(text) and text[pos + 1] == 'ّ',
-            'vowel': '',
-        }
-        
-        # Determine vowel
-        if pos + 1 < len(text):
-            if text[pos + 1] in ['َ', 'ِ', 'ُ']:
-                context['vowel'] = text[pos + 1]
-        
-        return context
+        return letter_context(text, pos)
     
     def apply_rules_at_position(self, text: str, pos: int, 
                                  current_phoneme: str,
-                                 context: Dict[str, Any]) -> Tuple[str, List[RuleApplication]]:
+                                 context: Dict[str, Any],
+                                 pattern_matches: Optional[List[TajweedRule]] = None
+                                 ) -> Tuple[str, List[RuleApplication]]:
         """
         Apply all relevant Tajweed rules at a given position
+        pattern_matches: pattern rules matching here, from scan_patterns();
+        when omitted they are checked one by one
         Returns: (modified_phoneme, list of rule applications)
         """
-        applications = []
-        modified_phoneme = current_phoneme
-        
-        # Collect all matching rules
-        matching_rules = []
-        for rule in self.tajweed_rules:
+        # Collect all matching rules as a mask
+        rule_bits = self._rule_bits
+        mask = 0
+        for rule in self.candidate_rules(text[pos]):
             if rule.matches(text, pos, context):
-                matching_rules.append(rule)
+                mask |= rule_bits[id(rule)]
         
-        # Sort by priority
-        matching_rules.sort(
-            key=lambda r: self.rule_priority.get(r.category, 0),
-            reverse=True
-        )
+        if pattern_matches is None:
+            pattern_matches = [r for r in self.pattern_rules if r.matches(text, pos, context)]
+        for rule in pattern_matches:
+            mask |= rule_bits[id(rule)]
+        
+        return self.resolve_mask(text, pos, current_phoneme, context, mask)
+    
+    def resolve_rules(self, text: str, pos: int,
+                      current_phoneme: str,
+                      context: Dict[str, Any],
+                      matching_rules: List[TajweedRule]) -> Tuple[str, List[RuleApplication]]:
+        """
+        Resolve priorities and conflicts among the rules matching at a position
+        Returns: (modified_phoneme, list of rule applications)
+        """
+        return self.resolve_mask(text, pos, current_phoneme, context,
+                                 self.rule_mask(matching_rules))
+    
+    def resolve_mask(self, text: str, pos: int,
+                     current_phoneme: str,
+                     context: Dict[str, Any],
+                     mask: int) -> Tuple[str, List[RuleApplication]]:
+        """
+        resolve_rules() for the matching rules given as a rule_mask()
+        Returns: (modified_phoneme, list of rule applications)
+        """
+        applications = []
+        modified_phoneme = current_phoneme
         
-        # Apply rules (highest priority first)
-        applied_categories = set()
-        for rule in matching_rules:
+        # Apply rules (highest priority first): lowest set bit first
+        applied_categories = 0
+        applied_rules = 0
+        while mask:
+            bit = mask & -mask
+            mask ^= bit
+            k = bit.bit_length() - 1
+            rule = self.resolution_order[k]
+            
             # Check for conflicts
-            if rule.name in self.rule_conflicts:
-                conflict_rules = self.rule_conflicts[rule.name]
-                if any(c in [r.name for r in applications] for c in conflict_rules):
-                    continue
+            if self._conflict_masks[k] & applied_rules:
+                if self.profiler is not None:
+                    self.profiler.stats_for(rule).suppressed += 1
+                continue
             
             # Apply if not same category already applied
-            if rule.category not in applied_categories:
-                # Create rule application record
-                application = RuleApplication(
-                    rule_name=rule.name,
-                    category=rule.category.value,
-                    position=pos,
-                    arabic_char=text[pos],
-                    phoneme_before=modified_phoneme,
-                    phoneme_after=modified_phoneme,  # Will update based on rule
-                    sifa_applied=rule.sifa_output,
-                    duration=rule.duration,
-                    context=context
-                )
-                
-                # Modify phoneme based on rule
-                if rule.category == TajweedRuleCategory.IQLAB:
-                    modified_phoneme = 'm'
-                elif rule.category == TajweedRuleCategory.IDGHAM:
-                    if rule.name == 'idgham_bi_ghunnah':
-                        modified_phoneme = ''  # Assimilated
-                
-                application.phoneme_after = modified_phoneme
-                applications.append(application)
-                applied_categories.add(rule.category)
+            if self._category_bits[k] & applied_categories:
+                if self.profiler is not None:
+                    self.profiler.stats_for(rule).shadowed += 1
+                continue
+            
+            # Modify phoneme based on rule
+            phoneme_before = modified_phoneme
+            if rule.category == TajweedRuleCategory.IQLAB:
+                modified_phoneme = 'm'
+            elif rule.category == TajweedRuleCategory.IDGHAM:
+                if rule.name == 'idgham_bi_ghunnah':
+                    modified_phoneme = ''  # Assimilated
+            
+            applications.append(RuleApplication(
+                rule_name=rule.name,
+                category=rule.category.value,
+                position=pos,
+                arabic_char=text[pos],
+                phoneme_before=phoneme_before,
+                phoneme_after=modified_phoneme,
+                sifa_applied=rule.sifa_output,
+                duration=rule.duration,
+                text=text  # Context is rebuilt from the text on demand
+            ))
+            applied_categories |= self._category_bits[k]
+            applied_rules |= bit
         
         return modified_phoneme, applications
     
@@ -992,15 +1491,26 @@ class GenericQuranPhoneticScript:
         """
         Process any Arabic text and extract ALL Tajweed rules
         This is the main generic function
+        
+        The per-word rule map is a separate pass, see
+        extract_tajweed_rules_for_words.
+        
+        Uthmani marks are dropped before matching; positions in
+        rule_applications and position_index are indices into arabic_text.
         """
         # Normalize text
         normalized = self.normalize_arabic(arabic_text)
+        verse = self.canonical_verse(arabic_text)
+        shifted = len(verse) != len(arabic_text)
+        view = VerseView(verse)
+        pattern_hits = self.scan_patterns(view)
         
         # Initialize result components
         phoneme_sequence = []
         sifa_sequence = []
         duration_sequence = []
         rule_applications = []
+        position_index = {}
         word_boundaries = []
         
         # Track position
@@ -1013,11 +1523,11 @@ class GenericQuranPhoneticScript:
                 word_boundaries.append(j)
         
         # Process each character
-        while i < len(arabic_text):
-            char = arabic_text[i]
+        while i < len(verse):
+            char = verse[i]
             
             # Get context
-            context = self.get_letter_context(arabic_text, i)
+            context = self.get_letter_context(verse, i)
             
             # Handle spaces
             if char.isspace():
@@ -1038,7 +1548,7 @@ class GenericQuranPhoneticScript:
             
             # Apply Tajweed rules
             modified_phoneme, applications = self.apply_rules_at_position(
-                arabic_text, i, base_phoneme, context
+                view, i, base_phoneme, context, pattern_hits.get(i, [])
             )
             
             # Collect sifa attributes
@@ -1049,8 +1559,14 @@ class GenericQuranPhoneticScript:
             
             # Add rule sifa
             for app in applications:
+                if shifted:
+                    # Context as matched, position in the caller's text
+                    app.context = context
+                    app.position = verse.original_position(i)
                 sifa_attrs.append(app.sifa_applied)
                 rule_applications.append(app)
+            if applications:
+                position_index[verse.original_position(i)] = applications
             
             # Add to sequences
             phoneme_sequence.append(modified_phoneme)
@@ -1082,7 +1598,8 @@ class GenericQuranPhoneticScript:
                 'char_count': len(arabic_text),
                 'rule_count': len(rule_applications),
                 'unique_rules': len(set([r.rule_name for r in rule_applications]))
-            }
+            },
+            position_index=position_index
         )
         
         return result
@@ -1179,6 +1696,11 @@ class GenericQuranPhoneticScript:
         """
         Extract Tajweed rules for each word in the Arabic text.
         Returns a dictionary where each word is mapped to a list of applicable Tajweed rules.
+        
+        This is a second pass, separate from process_text: each normalized
+        word is matched on its own and keeps every matching rule, while
+        process_text matches the raw verse and resolves conflicts, so the two
+        cannot share rule evaluations. Repeated words come from the word cache.
         """
         # Normalize and split the text into words
         normalized_text = self.normalize_arabic(arabic_text)
@@ -1189,44 +1711,156 @@ class GenericQuranPhoneticScript:
 
         # Iterate over words and check applicable rules
         for word in words:
-            # Initialize the context and result list for each word
-            word_context = {'text': word}
-            word_rules = []
-
-            # Check rules for each character in the word
-            for pos in range(len(word)):
-                context = self.get_letter_context(word, pos)
-                phoneme = word[pos]  # Start with the character itself as phoneme
-                matching_rules = []
-
-                # Find all matching rules for the character at this position
-                for rule in self.tajweed_rules:
-                    if rule.matches(word, pos, context):
-                        matching_rules.append(rule.name)
-
-                # If there are matching rules, apply them to the word
-                if matching_rules:
-                    word_rules.extend(matching_rules)
+            word_rules = [name for _, name in self.match_word_rules(word)]
 
             # Store the word and its matching rules in the dictionary
             if word_rules:
                 word_tajweed_rules[word] = word_rules
 
         return word_tajweed_rules
+
+    def match_word_rules(self, word: str) -> List[Tuple[int, str]]:
+        """
+        Match rules inside a single normalized word, each position on its own.
+        Returns (position, rule name) pairs in matching order.
+        Results are memoised per word in self.word_cache.
+        """
+        cached = self.word_cache.get(word)
+        if cached is None:
+            cached = tuple(self._match_word_rules(word))
+            self.word_cache.put(word, cached)
+        return list(cached)
+    
+    def _match_word_rules(self, word: str) -> List[Tuple[int, str]]:
+        matches = []
+        view = VerseView(word)
+        pattern_hits = self.scan_patterns(view)
+
+        # Check rules for each character in the word
+        for pos in range(len(word)):
+            context = self.get_letter_context(word, pos)
+
+            # Find all matching rules for the character at this position
+            matching_rules = [rule for rule in self.candidate_rules(word[pos])
+                              if rule.matches(view, pos, context)]
+            if pos in pattern_hits:
+                matching_rules = self.in_rule_order(matching_rules + pattern_hits[pos])
+            matches.extend((pos, rule.name) for rule in matching_rules)
+
+        return matches
+
+    def preload_word_cache(self, words: Iterable[str]) -> int:
+        """
+        Warm the word cache, e.g. with every distinct Quran word
+        (see quran_csv_words). Returns the number of words added.
+        """
+        added = 0
+        for word in words:
+            word = self.normalize_arabic(word)
+            if word and word not in self.word_cache:
+                self.word_cache.put(word, tuple(self._match_word_rules(word)))
+                added += 1
+        return added
+    
+    def rule_fingerprint(self) -> str:
+        """
+        Hash of everything that decides rule output: letter groups, rule
+        definitions (including condition code), priorities and conflicts.
+        Stored next to precomputed results so stale ones can be detected.
+        """
+        digest = hashlib.sha256()
+        digest.update(self.qiraat.encode('utf-8'))
+        # Word-level results depend on how words are normalized
+        digest.update(repr(sorted(get_canonicalizer(marks=ENGINE_MARKS).mapping.items())).encode('utf-8'))
+        for name, value in sorted(vars(self).items()):
+            if isinstance(value, (str, dict)) and not name.startswith('_') and name != 'rule_dispatch':
+                digest.update(f"{name}={value!r}".encode('utf-8'))
+        for rule in self.tajweed_rules:
+            digest.update(f"{rule.name}|{rule.category.value}|{rule.pattern}|"
+                          f"{rule.sifa_output}|{rule.duration}|{rule.triggers}".encode('utf-8'))
+            if rule.condition_func is not None:
+                condition = getattr(rule.condition_func, '__wrapped__', rule.condition_func)
+                _update_code_digest(digest, condition.__code__)
+        return digest.hexdigest()
+    
+    def enable_profiling(self) -> RuleProfiler:
+        """
+        Start recording per-rule statistics and return the profiler. Words
+        answered from the word cache are not re-evaluated; construct with
+        word_cache_size=0 to count every occurrence.
+        """
+        if self.profiler is None:
+            self.profiler = RuleProfiler(self.tajweed_rules)
+            for rule in self.tajweed_rules:
+                if rule.condition_func is not None:
+                    rule.condition_func = self.profiler.wrap(rule)
+        return self.profiler
+    
+    def disable_profiling(self) -> Optional[RuleProfiler]:
+        """Restore the plain condition functions; returns the profiler used"""
+        profiler, self.profiler = self.profiler, None
+        for rule in self.tajweed_rules:
+            wrapped = getattr(rule.condition_func, '__wrapped__', None)
+            if wrapped is not None:
+                rule.condition_func = wrapped
+        return profiler
+    
+    @contextmanager
+    def profiling(self) -> Iterator[RuleProfiler]:
+        """with processor.profiling() as profiler: ... print(profiler.report())"""
+        profiler = self.enable_profiling()
+        try:
+            yield profiler
+        finally:
+            self.disable_profiling()
+    
+    def profile_report(self, fmt: str = 'table') -> str:
+        if self.profiler is None:
+            raise RuntimeError("Profiling is not enabled; call enable_profiling() first")
+        return self.profiler.report(fmt)
+# ==================== PROCESSOR REGISTRY ====================
+
+_processors: Dict[str, GenericQuranPhoneticScript] = {}
+_processors_lock = threading.Lock()
+
+
+def get_processor(qiraat: str = "hafs") -> GenericQuranPhoneticScript:
+    """
+    Return the shared processor for a qiraat, building it on first use.
+    Processors hold no per-call state, so one instance serves all threads.
+    """
+    processor = _processors.get(qiraat)
+    if processor is None:
+        with _processors_lock:
+            processor = _processors.get(qiraat)
+            if processor is None:
+                processor = GenericQuranPhoneticScript(qiraat=qiraat)
+                _processors[qiraat] = processor
+    return processor
+
+
+def reset_processors() -> None:
+    """
+    Drop all shared processors (e.g. between tests or after editing rules)
+    """
+    with _processors_lock:
+        _processors.clear()
+
+
 # ==================== CONVENIENCE FUNCTIONS ====================
 
 def extract_tajweed_rules(arabic_text: str, qiraat: str = "hafs") -> Dict[str, Any]:
     """
     Convenience function to extract Tajweed rules from any Arabic text
     """
-    processor = GenericQuranPhoneticScript(qiraat=qiraat)
+    processor = get_processor(qiraat)
     return processor.extract_tajweed_rules_for_words(arabic_text)
 
 def print_tajweed_rules(arabic_text: str, detailed: bool = False) -> None:
     """
     Convenience function to print Tajweed rules for any Arabic text
     """
-    processor = GenericQuranPhoneticScript()
+    processor = get_processor()
     print(processor.format_rule_extraction(arabic_text, detailed))
 
 
@@ -1234,7 +1868,7 @@ def analyze_verse(arabic_text: str) -> Dict[str, Any]:
     """
     Comprehensive analysis of a verse with all Tajweed rules
     """
-    processor = GenericQuranPhoneticScript()
+    processor = get_processor()
     result = processor.process_text(arabic_text)
     
     analysis = {
@@ -1262,8 +1896,52 @@ def analyze_verse(arabic_text: str) -> Dict[str, Any]:
     return analysis
 
 
+# ==================== BATCH PROCESSING ====================
+
+def _process_chunk(qiraat: str, method: str, texts: List[str]) -> List[Any]:
+    """Worker side of process_many: one shared processor per worker process"""
+    processor = get_processor(qiraat)
+    func = getattr(processor, method)
+    return [func(text) for text in texts]
 
 
+def process_many(texts: Iterable[str], workers: Optional[int] = None,
+                 chunksize: int = 32, qiraat: str = "hafs",
+                 method: str = "extract_tajweed_rules_for_words") -> Iterator[Any]:
+    """
+    Run a processor method over many texts on a process pool.
+    
+    Results are yielded in input order. texts may be any iterable; only a
+    bounded number of chunks (twice the worker count) is in flight at a
+    time, so memory stays flat however long the input is.
+    workers=1 runs in the calling process.
+    """
+    workers = workers or os.cpu_count() or 1
+    texts = iter(texts)
+    
+    if workers == 1:
+        processor = get_processor(qiraat)
+        func = getattr(processor, method)
+        for text in texts:
+            yield func(text)
+        return
+    
+    # Imported here: it pulls in multiprocessing, which short-lived single
+    # process callers should not pay for at import time
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        while True:
+            # Keep the pool busy without reading the whole input ahead
+            while len(pending) < workers * 2:
+                chunk = list(islice(texts, chunksize))
+                if not chunk:
+                    break
+                pending.append(executor.submit(_process_chunk, qiraat, method, chunk))
+            if not pending:
+                break
+            yield from pending.popleft().result()
+
 
 # ==================== EXAMPLE USAGE ====================
 
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Incremental front end to GenericQuranPhoneticScript for live display.
+
+Text is fed in chunks (e.g. word by word) and rule events are emitted as
+soon as every candidate rule at a position has the lookahead it declares
+(TajweedRule.lookahead / stripped_lookahead). Only a window around the
+unresolved positions is buffered, and the events over the whole stream are
+the same rule applications process_text() finds on the concatenated input.
+
+    stream = RuleStream()
+    for word in words:
+        for event in stream.feed(word + ' '):
+            show(event)
+    for event in stream.close():
+        show(event)
+
+Rules that read the tashkeel-stripped projection declare how many
+letters they read either side (stripped_lookbehind / stripped_lookahead),
+so a position waits for that many letters after it however many harakat
+come between, and the buffer keeps a fixed tail behind the next position.
+Uthmani marks are dropped as they are fed, as process_text drops them;
+event positions still count them.
+"""
+
+from typing import Iterable, Iterator, List, Optional
+
+from tajweed_rule import (
+    TASHKEEL_CHARS,
+    GenericQuranPhoneticScript,
+    RuleApplication,
+    VerseView,
+    get_processor,
+    letter_context,
+)
+
+# Characters either side of a position that letter_context() reads
+CONTEXT_WINDOW = 2
+
+
+class RuleStream:
+    """Feed text chunks, receive RuleApplication events"""
+
+    def __init__(self, processor: Optional[GenericQuranPhoneticScript] = None):
+        self.processor = processor or get_processor()
+        rules = self.processor.tajweed_rules
+        self._lookbehind = max([CONTEXT_WINDOW] + [rule.lookbehind for rule in rules])
+        self._stripped_lookbehind = max([0] + [rule.stripped_lookbehind for rule in rules])
+        self._text = ''             # characters from self._base on, without Uthmani marks
+        self._offsets = []          # stream position of each of them
+        self._base = 0
+        self._next = 0              # next position to resolve
+        self._fed = 0
+        self._closed = False
+
+    @property
+    def length(self) -> int:
+        """Characters fed so far"""
+        return self._fed
+
+    @property
+    def _end(self) -> int:
+        return self._base + len(self._text)
+
+    @property
+    def buffered(self) -> int:
+        """Characters currently held"""
+        return len(self._text)
+
+    def feed(self, chunk: str) -> List[RuleApplication]:
+        """Add text; return the events that became decidable"""
+        if self._closed:
+            raise ValueError("feed() after close()")
+        # Matched without Uthmani marks, as process_text does
+        verse = self.processor.canonical_verse(chunk)
+        self._text += verse
+        self._offsets.extend(self._fed + offset for offset in verse.offsets)
+        self._fed += len(chunk)
+        return self._drain(final=False)
+
+    def close(self) -> List[RuleApplication]:
+        """End of input; return the remaining events"""
+        if self._closed:
+            return []
+        self._closed = True
+        return self._drain(final=True)
+
+    def _letter_after(self, pos: int, count: int) -> Optional[int]:
+        """Raw position of the count-th stripped character from pos on, if fed yet"""
+        text = self._text
+        for i in range(pos - self._base, len(text)):
+            if text[i] not in TASHKEEL_CHARS:
+                count -= 1
+                if count == 0:
+                    return self._base + i
+        return None
+
+    def _letter_before(self, pos: int, count: int) -> int:
+        """Raw position of the count-th stripped character before pos (or the buffer start)"""
+        text = self._text
+        i = pos - self._base
+        while count and i > 0:
+            i -= 1
+            if text[i] not in TASHKEEL_CHARS:
+                count -= 1
+        return self._base + i
+
+    @staticmethod
+    def _stripped_reach(rules) -> int:
+        return max([-1] + [rule.stripped_lookahead for rule in rules
+                           if rule.stripped_lookahead is not None])
+
+    def _ready(self, pos: int, rules) -> bool:
+        if pos + CONTEXT_WINDOW >= self._end:
+            return False
+        for rule in rules:
+            if rule.lookahead is None or pos + rule.lookahead >= self._end:
+                return False
+        reach = self._stripped_reach(rules)
+        return reach < 0 or self._letter_after(pos, reach + 1) is not None
+
+    def _drain(self, final: bool) -> List[RuleApplication]:
+        events = []
+        while self._next < self._end:
+            pos = self._next
+            char = self._text[pos - self._base]
+
+            # process_text never applies rules on whitespace
+            if not char.isspace():
+                rules = self.processor.candidate_rules(char) + self.processor.pattern_rules
+                if not final and not self._ready(pos, rules):
+                    break
+                events.extend(self._resolve(pos, char, rules))
+            self._next += 1
+
+        self._trim()
+        return events
+
+    def _resolve(self, pos: int, char: str, rules) -> List[RuleApplication]:
+        processor = self.processor
+
+        # Window wide enough for every candidate rule and the context, in raw
+        # characters and in letters of the stripped projection
+        start = max(0, min(pos - self._lookbehind,
+                           self._letter_before(pos, self._stripped_lookbehind)))
+        if any(rule.lookahead is None for rule in rules):
+            end = self._end
+        else:
+            end = pos + max([CONTEXT_WINDOW] + [rule.lookahead for rule in rules]) + 1
+        reach = self._stripped_reach(rules)
+        if reach >= 0:
+            last = self._letter_after(pos, reach + 1)
+            end = self._end if last is None else max(end, last + 1)
+
+        view = VerseView(self._text[start - self._base:end - self._base])
+        local = pos - start
+        context = letter_context(view, local)
+
+        if char in processor.reverse_phoneme_map:
+            base_phoneme = processor.reverse_phoneme_map[char]['phoneme']
+        else:
+            base_phoneme = char
+
+        mask = processor.rule_mask(rule for rule in rules if rule.matches(view, local, context))
+        _, applications = processor.resolve_mask(view, local, base_phoneme, context, mask)
+
+        # Report in stream coordinates
+        for app in applications:
+            app.position = self._offsets[pos - self._base]
+            app.context = context
+        return applications
+
+    def _trim(self) -> None:
+        keep = max(0, min(self._next - self._lookbehind,
+                          self._letter_before(self._next, self._stripped_lookbehind)))
+        if keep > self._base:
+            self._text = self._text[keep - self._base:]
+            del self._offsets[:keep - self._base]
+            self._base = keep
+
+
+def stream_rules(chunks: Iterable[str],
+                 processor: Optional[GenericQuranPhoneticScript] = None) -> Iterator[RuleApplication]:
+    """Yield rule events for an iterable of text chunks"""
+    stream = RuleStream(processor)
+    for chunk in chunks:
+        yield from stream.feed(chunk)
+    yield from stream.close()